@@ -1,8 +1,11 @@
+import argparse
 import importlib
+import json
 import os
 import shutil
 import subprocess
 import sys
+import time
 
 
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -64,6 +67,60 @@ def check_required_path(path):
     return False, f"FAIL path: {relative_path} is missing"
 
 
+def profile_imports(module_name="main", top=15):
+    """Import `module_name` in a fresh interpreter with `-X importtime`.
+
+    Output:
+    - Dict with `wall_seconds` (whole process), `import_seconds` (the module's
+      cumulative import time) and `modules` (the `top` slowest imports by self
+      time, as {module, self_seconds, cumulative_seconds}).
+    """
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+    )
+    wall_seconds = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module_name} failed:\n{completed.stderr.strip()[-2000:]}")
+
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|", 2))
+        if not self_us.isdigit():
+            continue  # header line
+        modules.append({"module": name, "self_seconds": int(self_us) / 1e6, "cumulative_seconds": int(cumulative_us) / 1e6})
+
+    import_seconds = next((entry["cumulative_seconds"] for entry in modules if entry["module"] == module_name), None)
+    modules.sort(key=lambda entry: entry["self_seconds"], reverse=True)
+    return {"wall_seconds": wall_seconds, "import_seconds": import_seconds, "modules": modules[:top]}
+
+
+def run_profile(top, json_path=None):
+    print("=== Gradio app import-time profile ===")
+    try:
+        profile = profile_imports(top=top)
+    except RuntimeError as exc:
+        print(f"FAIL profile: {exc}")
+        return 1
+
+    print(f"import main: {profile['import_seconds']:.2f}s (process wall time {profile['wall_seconds']:.2f}s)")
+    print(f"{'self':>8} {'cumulative':>11}  module")
+    for entry in profile["modules"]:
+        print(f"{entry['self_seconds']:>7.3f}s {entry['cumulative_seconds']:>10.3f}s  {entry['module']}")
+
+    if json_path:
+        # One JSON record per line, so successive runs form a startup-time history.
+        with open(json_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"time": time.time(), **profile}) + "\n")
+        print(f"Profile appended to {json_path}")
+    return 0
+
+
 def run_checks():
     print("=== Gradio app installation check ===")
     failures = []
@@ -115,4 +172,9 @@ def run_checks():
 
 
 if __name__ == "__main__":
-    sys.exit(run_checks())
+    parser = argparse.ArgumentParser(description="Check the Gradio app installation, or profile its import time.")
+    parser.add_argument("--profile", action="store_true", help="Profile `import main` instead of running the checks.")
+    parser.add_argument("--top", type=int, default=15, help="Slowest imports to list with --profile. Default: 15")
+    parser.add_argument("--json", dest="json_path", help="Append the --profile result to this JSON-lines file.")
+    args = parser.parse_args()
+    sys.exit(run_profile(args.top, args.json_path) if args.profile else run_checks())
@@ -1,37 +1,40 @@
 import os
-import sass
 import uvicorn
 import gradio as gr
-from fastapi import FastAPI
-from pymongo import MongoClient
-from fastapi.responses import RedirectResponse
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response
+from fastapi.security import HTTPBasic, HTTPBasicCredentials
 
 from src.home import home_page
 from src.session import session_page
 from src.results import results_page
 from src.error import error_page
-from src.job_manager import job_page
+from src.job_manager import is_admin_password, job_page
 from src.base import qa_page, tutorial_page, licence_page
-from src.settings import ASSETS_DIR, SASS_DIR, MOUNT_POINT
+from src.settings import MOUNT_POINT, JOB_DIR
+from src.result_cache import cache_stats
+from src.downloads import session_zip_response, zip_response
+from src.mongodb import list_session_job_names, query_stats
+from src.predictions import query_page
+from src.shap_images import get_variant
+from src.assets import IMMUTABLE_CACHE_CONTROL, STATIC_ROUTE, compile_css, static_file
+from src.compression import TextGZipMiddleware
+from src.lazy_pages import mount_lazy_gradio_app
 
 allowed_paths = ["/tandem/jobs", "assets/images"]
-sass.compile(dirname=(str(SASS_DIR), str(ASSETS_DIR)), output_style="expanded")
-with open(os.path.join(ASSETS_DIR, "main.css")) as f:
-    custom_css = f.read()
-
-client = MongoClient("mongodb://mongodb:27017/")
-db = client["app_db"]
-collections = db["input_queue"]
+custom_css = compile_css()
 
 app = FastAPI()
+app.add_middleware(TextGZipMiddleware, minimum_size=1024, compresslevel=6)
 app = gr.mount_gradio_app(app, error_page(), path=f"/{MOUNT_POINT}/error", allowed_paths=allowed_paths, css=custom_css, root_path=f"/{MOUNT_POINT}/error")
 app = gr.mount_gradio_app(app, session_page(), path=f"/{MOUNT_POINT}/session", allowed_paths=allowed_paths, css=custom_css, root_path=f"/{MOUNT_POINT}/session")
 app = gr.mount_gradio_app(app, results_page(), path=f"/{MOUNT_POINT}/results", allowed_paths=allowed_paths, css=custom_css, root_path=f"/{MOUNT_POINT}/results")
-app = gr.mount_gradio_app(app, job_page(), path=f"/{MOUNT_POINT}/jobs", allowed_paths=allowed_paths, css=custom_css, root_path=f"/{MOUNT_POINT}/jobs")
 
-app = gr.mount_gradio_app(app, qa_page(), path=f"/{MOUNT_POINT}/QA", allowed_paths=allowed_paths, css=custom_css, root_path=f"/{MOUNT_POINT}/QA")
-app = gr.mount_gradio_app(app, tutorial_page(), path=f"/{MOUNT_POINT}/tutorial", allowed_paths=allowed_paths, css=custom_css, root_path=f"/{MOUNT_POINT}/tutorial")
-app = gr.mount_gradio_app(app, licence_page(), path=f"/{MOUNT_POINT}/licence", allowed_paths=allowed_paths, css=custom_css, root_path=f"/{MOUNT_POINT}/licence")
+# Rarely visited pages are built on their first request (src/lazy_pages.py).
+app = mount_lazy_gradio_app(app, job_page, path=f"/{MOUNT_POINT}/jobs", allowed_paths=allowed_paths, css=custom_css, root_path=f"/{MOUNT_POINT}/jobs")
+app = mount_lazy_gradio_app(app, qa_page, path=f"/{MOUNT_POINT}/QA", allowed_paths=allowed_paths, css=custom_css, root_path=f"/{MOUNT_POINT}/QA")
+app = mount_lazy_gradio_app(app, tutorial_page, path=f"/{MOUNT_POINT}/tutorial", allowed_paths=allowed_paths, css=custom_css, root_path=f"/{MOUNT_POINT}/tutorial")
+app = mount_lazy_gradio_app(app, licence_page, path=f"/{MOUNT_POINT}/licence", allowed_paths=allowed_paths, css=custom_css, root_path=f"/{MOUNT_POINT}/licence")
 
 
 @app.get(f"/{MOUNT_POINT}/jobs")
@@ -50,6 +53,73 @@ def tutorial_page_redirect():
 def licence_page_redirect():
     return RedirectResponse(url=f"/{MOUNT_POINT}/licence/", status_code=307) # url=f"./licence/" is also fine
 
+def require_admin(credentials: HTTPBasicCredentials = Depends(HTTPBasic())):
+    """Allow internal endpoints only with the job manager's admin password (HTTP basic auth, any user name)."""
+    if not is_admin_password(credentials.password):
+        raise HTTPException(status_code=401, detail="Unauthorized", headers={"WWW-Authenticate": "Basic"})
+
+@app.get(f"/{MOUNT_POINT}/stats/result_cache", dependencies=[Depends(require_admin)])
+def result_cache_stats():
+    return cache_stats()
+
+@app.get(f"/{MOUNT_POINT}/stats/mongodb", dependencies=[Depends(require_admin)])
+def mongodb_stats():
+    return query_stats()
+
+def resolve_job_folder(session_id, job_name=None):
+    """Return the job (or session) folder under JOB_DIR, or raise 404 for unknown or escaping paths."""
+    jobs_root = os.path.realpath(JOB_DIR)
+    parts = [session_id] if job_name is None else [session_id, job_name]
+    folder = os.path.realpath(os.path.join(jobs_root, *parts))
+    parent = folder
+    for _ in parts:
+        parent = os.path.dirname(parent)
+    if parent != jobs_root or not os.path.isdir(folder):
+        raise HTTPException(status_code=404, detail="Not found")
+    return folder
+
+@app.get(f"/{MOUNT_POINT}/download/{{session_id}}/{{job_name}}.zip")
+def download_job_zip(session_id: str, job_name: str, request: Request):
+    job_folder = resolve_job_folder(session_id, job_name)
+    return zip_response(job_folder, f"{job_name}.zip", request.headers)
+
+@app.get(f"/{MOUNT_POINT}/download/{{session_id}}.zip")
+def download_session_zip(session_id: str, mode: str = "", job_name: list[str] = Query(default=[])):
+    session_folder = resolve_job_folder(session_id)
+    job_names = list_session_job_names(session_id, statuses=["finished"], modes=[mode] if mode else None)
+    if job_name:
+        job_names = [name for name in job_names if name in set(job_name)]
+    job_folders = (os.path.join(session_folder, name) for name in job_names if os.path.isdir(os.path.join(session_folder, name)))
+    return session_zip_response(job_folders, f"{session_id}.zip")
+
+@app.get(f"/{MOUNT_POINT}/api/predictions/{{session_id}}/{{job_name}}")
+def predictions_page(session_id: str, job_name: str, page: int = 1, page_size: int = 50, sort: str = "", desc: bool = False, q: str = "", filter: list[str] = Query(default=[])):
+    """One page of a job's predictions; `filter` takes `column:value` pairs."""
+    filters = dict(item.split(":", 1) for item in filter if ":" in item)
+    result = query_page(resolve_job_folder(session_id, job_name), page, page_size, sort=sort or None, descending=desc, search=q, filters=filters)
+    if result is None:
+        raise HTTPException(status_code=404, detail="No predictions")
+    return result
+
+@app.get(f"{STATIC_ROUTE}/{{asset_path:path}}")
+def static_asset(asset_path: str):
+    path = static_file(asset_path)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return FileResponse(path, headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
+
+@app.get(f"/{MOUNT_POINT}/shap/{{session_id}}/{{job_name}}/{{variant}}/{{image_name}}")
+def shap_image(session_id: str, job_name: str, variant: str, image_name: str, request: Request):
+    sav, ext = os.path.splitext(image_name)
+    found = get_variant(resolve_job_folder(session_id, job_name), sav, variant) if ext in {".webp", ".png"} else None
+    if found is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    path, media_type, etag = found
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=media_type, headers=headers)
+
 app = gr.mount_gradio_app(app, home_page(), path=f"/{MOUNT_POINT}", allowed_paths=allowed_paths, css=custom_css, root_path=f"/{MOUNT_POINT}")
 
 if __name__ == "__main__":
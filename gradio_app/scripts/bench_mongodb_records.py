@@ -0,0 +1,145 @@
+"""Benchmark of the record paths of `src/mongodb.py` on a large session.
+
+Builds one session of `--jobs` job records with `--savs` SAVs each (plus
+their per-SAV fields) and compares, per run over the whole session:
+
+- deep-copy + pop `_id` of every full document (the previous `_clean_record`);
+- full documents with `_id` dropped in place (current `find_records`);
+- `JobRecord` summaries of documents projected to `JobRecord.FIELDS`
+  (current `find_job_records`, used by the job manager);
+
+and building the `$set` update document of every job with and without a deep
+copy (`upsert_job_record`). The documents are decoded from BSON on every
+listing, as pymongo does, so the numbers include decoding.
+
+With `--mongo-uri` the listings also run as real queries against a scratch
+database (`--db`, dropped afterwards):
+
+    python scripts/bench_mongodb_records.py --jobs 200 --savs 2000
+    python scripts/bench_mongodb_records.py --mongo-uri mongodb://localhost:27017/
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from copy import deepcopy
+from pathlib import Path
+
+import bson
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+GRADIO_ROOT = SCRIPT_DIR.parent
+sys.path.insert(0, str(GRADIO_ROOT))
+
+from src.mongodb import JobRecord, _clean_record
+
+
+def make_session(n_jobs, n_savs):
+    docs = []
+    for index in range(n_jobs):
+        savs = [f"P{index:05d} {k + 1} A C" for k in range(n_savs)]
+        docs.append({
+            "_id": bson.ObjectId(),
+            "session_id": "bench",
+            "job_name": f"job{index:05d}",
+            "mode": "Training" if index % 5 == 0 else "Inferencing",
+            "status": "finished",
+            "IP": "127.0.0.1",
+            "geo_info": {"city": "Hsinchu", "region": "Hsinchu", "country": "Taiwan", "continent": "Asia"},
+            "job_start": 1.7e9 + index,
+            "job_end": 1.7e9 + index + 60,
+            "rev": 3,
+            "SAV": savs,
+            "label": [index % 2] * n_savs,
+            "trace": {"submit": [1.7e9, 1.7e9 + 0.2], "stages": {f"stage{k}": [k, k + 1] for k in range(8)}},
+        })
+    return docs
+
+
+def old_clean_record(record):
+    record_udt = deepcopy(record)
+    record_udt.pop("_id", None)
+    return record_udt
+
+
+def project(doc, fields):
+    return {key: value for key, value in doc.items() if key in fields}
+
+
+def bench(label, func, iterations):
+    func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = func()
+    elapsed = (time.perf_counter() - start) / iterations
+    tracemalloc.start()
+    kept = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    print(f"{label:<44} {elapsed * 1e3:9.2f} ms/run {size / 1e6:9.2f} MB held")
+    return elapsed, result
+
+
+def offline(docs, iterations):
+    encoded = [bson.encode(doc) for doc in docs]
+    summary_fields = set(JobRecord.FIELDS)
+    # The server applies the projection before sending, so the summary path decodes small documents.
+    encoded_summaries = [bson.encode(project(doc, summary_fields)) for doc in docs]
+    print(f"{len(docs)} jobs, {sum(map(len, encoded)) / 1e6:.1f} MB of BSON ({sum(map(len, encoded_summaries)) / 1e3:.1f} kB projected)")
+
+    before, _ = bench("deepcopy + pop _id (previous)", lambda: [old_clean_record(bson.decode(raw)) for raw in encoded], iterations)
+    full, _ = bench("pop _id in place (find_records)", lambda: [_clean_record(bson.decode(raw)) for raw in encoded], iterations)
+    summary, records = bench("JobRecord summaries (find_job_records)", lambda: [JobRecord.from_document(bson.decode(raw)) for raw in encoded_summaries], iterations)
+    assert records[0].get("job_name") == docs[0]["job_name"]
+    print(f"speedup {before / full:.1f}x (full records), {before / summary:.1f}x (summaries)")
+
+    def set_doc(record):
+        return {key: value for key, value in record.items() if key not in ("_id", "rev")}
+
+    copied, _ = bench("upsert $set with deepcopy (previous)", lambda: [deepcopy(doc) for doc in docs], iterations)
+    direct, _ = bench("upsert $set without copy", lambda: [set_doc(doc) for doc in docs], iterations)
+    print(f"speedup {copied / direct:.1f}x (update documents)")
+
+
+def live(docs, uri, db_name, iterations):
+    from pymongo import MongoClient
+
+    client = MongoClient(uri)
+    collection = client[db_name]["input_queue"]
+    collection.drop()
+    collection.insert_many(docs)
+    try:
+        query = {"session_id": "bench"}
+        print(f"\nlive queries against {uri}{db_name}")
+        before, _ = bench("find + deepcopy (previous)", lambda: [old_clean_record(doc) for doc in collection.find(query)], iterations)
+        full, _ = bench("find {_id: 0} (find_records)", lambda: [_clean_record(doc) for doc in collection.find(query, {"_id": 0})], iterations)
+        summary, _ = bench(
+            "find JobRecord.PROJECTION (find_job_records)",
+            lambda: [JobRecord.from_document(doc) for doc in collection.find(query, JobRecord.PROJECTION)],
+            iterations,
+        )
+        print(f"speedup {before / full:.1f}x (full records), {before / summary:.1f}x (summaries)")
+    finally:
+        client.drop_database(db_name)
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark copy-free MongoDB record handling on a large session.")
+    parser.add_argument("--jobs", type=int, default=200, help="Jobs in the session. Default: 200")
+    parser.add_argument("--savs", type=int, default=2000, help="SAVs per job. Default: 2000")
+    parser.add_argument("--iterations", type=int, default=5, help="Listings per variant. Default: 5")
+    parser.add_argument("--mongo-uri", default=None, help="Also run real queries against this mongod.")
+    parser.add_argument("--db", default="tandem_bench_records", help="Scratch database for --mongo-uri.")
+    args = parser.parse_args()
+
+    docs = make_session(args.jobs, args.savs)
+    offline(docs, args.iterations)
+    if args.mongo_uri:
+        live(docs, args.mongo_uri, args.db, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Microbenchmark for the status-panel template path.
+
+Compares reading and formatting `results_process_status.html` and the popup
+modal from disk on every call (the previous behaviour) with rendering them
+through the cached template registry in `src/js.py`.
+
+Example:
+
+    python scripts/bench_templates.py --iterations 20000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+GRADIO_ROOT = SCRIPT_DIR.parent
+sys.path.insert(0, str(GRADIO_ROOT))
+
+from src import js
+from src.components.popup import POPUP_MODAL_TEMPLATE
+from src.components.process_status import PROCESS_STATUS_TEMPLATE
+from src.settings import STAGES
+
+
+def status_panel_values():
+    values = {
+        "submission_time": "2026-01-01_12-00-00",
+        "estimated_time": "#3 in queue, starts in ~12 min, done in ~40 min",
+        "pending_count": '<span title="Inferencing: 3">3</span>',
+        "running_count": '<span title="Training: 1">1</span>',
+    }
+    for i, label in enumerate(STAGES):
+        values.update({
+            f"status_{i}": "<span>Done</span>",
+            f"file_{i}": "",
+            f"time_{i}": "1.2s",
+            f"stage_{i}_label": label,
+        })
+    return values
+
+
+def read_and_format(filepath, **keys):
+    with open(filepath, "r", encoding="utf-8") as handle:
+        return handle.read().format(**keys)
+
+
+def bench(label, func, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<32} {elapsed / iterations * 1e6:8.2f} us/call")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cached vs uncached HTML template rendering.")
+    parser.add_argument("--iterations", type=int, default=10000, help="Calls per variant. Default: 10000")
+    args = parser.parse_args()
+
+    status_values = status_panel_values()
+    popup_values = {"modal_id": "popup-stage-0", "title": "Validating SAVs: 2 Warnings", "body_html": "<p>...</p>"}
+
+    def uncached():
+        read_and_format(PROCESS_STATUS_TEMPLATE, **status_values)
+        read_and_format(POPUP_MODAL_TEMPLATE, **popup_values)
+
+    def cached():
+        js.build_html_text(PROCESS_STATUS_TEMPLATE, **status_values)
+        js.build_html_text(POPUP_MODAL_TEMPLATE, **popup_values)
+
+    assert js.build_html_text(PROCESS_STATUS_TEMPLATE, **status_values) == read_and_format(PROCESS_STATUS_TEMPLATE, **status_values)
+    before = bench("read + format (per call)", uncached, args.iterations)
+    after = bench("template registry", cached, args.iterations)
+    print(f"speedup {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
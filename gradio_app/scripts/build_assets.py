@@ -0,0 +1,40 @@
+"""Build the static assets at image build time.
+
+Compiles `sass/` into the minified `main.min.css` under `BUILD_ASSETS_DIR`
+(`/opt/gradio_assets` in the image, so the docker-compose bind mount of
+`/gradio_app` does not hide it) and the readable `assets/main.css`, and hashes
+the static files, so the app starts without running sass. At startup
+`assets.compile_css` reuses the file as long as the hash of the sass sources
+recorded in it still matches.
+
+Example:
+
+    python scripts/build_assets.py
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+GRADIO_ROOT = SCRIPT_DIR.parent
+sys.path.insert(0, str(GRADIO_ROOT))
+
+from src.assets import MINIFIED_CSS, build_css, static_assets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile the sass sources and fingerprint the static files.")
+    parser.add_argument("--force", action="store_true", help="Compile even if the sass sources did not change.")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    css, compiled = build_css(force=args.force)
+    state = "compiled" if compiled else "up to date"
+    print(f"{MINIFIED_CSS}: {state}, {len(css)} bytes ({time.perf_counter() - started:.2f}s)")
+    print(f"{len(static_assets()['files'])} fingerprinted static file(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+GRADIO_ROOT = SCRIPT_DIR.parent
+sys.path.insert(0, str(GRADIO_ROOT))
+
+from src.logger import LOGGER
+from src.settings import JOB_DIR, STAGE_MODEL_PATH, STAGE_TIMINGS_PATH
+from src.stage_model import STAGES, fit_stage_model, job_features, read_userlog_events, stage_durations
+
+
+def load_table(table_path):
+    rows = []
+    if not os.path.isfile(table_path):
+        return rows
+    with open(table_path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                rows.append(json.loads(line))
+    return rows
+
+
+def collect_job_row(job_dir):
+    """Build one table row from a finished job folder, or None if incomplete."""
+    params_path = job_dir / "params.json"
+    userlog_path = job_dir / "user_log.jsonl"
+    if not params_path.is_file() or not userlog_path.is_file():
+        return None
+
+    with params_path.open() as handle:
+        param = json.load(handle)
+    if param.get("status") != "finished":
+        return None
+
+    events = read_userlog_events(userlog_path)
+    if any(event.get("level") == "error" for event in events):
+        return None
+    stages = stage_durations(events)
+    if not stages:
+        return None
+
+    row = {
+        "job": f"{job_dir.parent.name}/{job_dir.name}",
+        "mode": param.get("mode"),
+        "job_end": param.get("job_end"),
+        "stages": stages,
+    }
+    row.update(job_features(param))
+    return row
+
+
+def update_table(jobs_dir, table_path, rebuild=False):
+    """Append rows for finished jobs that are not in the table yet."""
+    rows = [] if rebuild else load_table(table_path)
+    known = {row["job"] for row in rows}
+
+    new_rows = []
+    for session_dir in sorted(Path(jobs_dir).iterdir()):
+        if not session_dir.is_dir():
+            continue
+        for job_dir in sorted(session_dir.iterdir()):
+            if not job_dir.is_dir() or f"{session_dir.name}/{job_dir.name}" in known:
+                continue
+            try:
+                row = collect_job_row(job_dir)
+            except (OSError, ValueError) as exc:
+                LOGGER.warning(f"Skipping {job_dir}: {exc}")
+                continue
+            if row:
+                new_rows.append(row)
+
+    mode = "w" if rebuild else "a"
+    with open(table_path, mode, encoding="utf-8") as handle:
+        for row in new_rows:
+            handle.write(json.dumps(row, separators=(",", ":")) + "\n")
+    LOGGER.info(f"Stage-timing table: {len(new_rows)} new job(s), {len(rows) + len(new_rows)} total")
+    return rows + new_rows
+
+
+def write_model(rows, model_path):
+    model = fit_stage_model(rows)
+    tmp_path = f"{model_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump({"fitted_at": time.time(), "n_jobs": len(rows), "model": model}, handle, indent=2)
+    os.replace(tmp_path, model_path)
+    LOGGER.info(f"Stage model written to {model_path}")
+
+
+def report(rows, window_days):
+    """Print per-stage seconds-per-SAV for recent jobs against older jobs."""
+    cutoff = time.time() - window_days * 24 * 60 * 60
+    print(f"{'mode':<12} {'stage':<28} {'older p50':>10} {'recent p50':>11} {'change':>8}")
+    for mode in sorted({row.get("mode") or "" for row in rows}):
+        for stage in STAGES:
+            older, recent = [], []
+            for row in rows:
+                seconds = row["stages"].get(stage)
+                if row.get("mode") != mode or seconds is None:
+                    continue
+                per_sav = seconds / max(row.get("n_savs") or 1, 1)
+                (recent if (row.get("job_end") or 0) >= cutoff else older).append(per_sav)
+            if not older or not recent:
+                continue
+            older_p50 = float(np.median(older))
+            recent_p50 = float(np.median(recent))
+            change = (recent_p50 / older_p50 - 1) * 100 if older_p50 else 0.0
+            print(f"{mode:<12} {stage:<28} {older_p50:>9.2f}s {recent_p50:>10.2f}s {change:>+7.1f}%")
+
+
+def main():
+    description = "Build the per-stage timing table from finished jobs and fit the stage cost model."
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--jobs-dir", default=JOB_DIR, help=f"Jobs root folder. Default: {JOB_DIR}")
+    parser.add_argument("--table", default=STAGE_TIMINGS_PATH, help=f"Stage-timing table. Default: {STAGE_TIMINGS_PATH}")
+    parser.add_argument("--model", default=STAGE_MODEL_PATH, help=f"Fitted model output. Default: {STAGE_MODEL_PATH}")
+    parser.add_argument("--rebuild", action="store_true", help="Re-parse every job instead of only new ones.")
+    parser.add_argument("--report", action="store_true", help="Print recent vs older per-SAV stage timings.")
+    parser.add_argument("--window-days", type=float, default=14, help="Recent window for --report. Default: 14")
+    args = parser.parse_args()
+
+    rows = update_table(args.jobs_dir, args.table, rebuild=args.rebuild)
+    write_model(rows, args.model)
+    if args.report:
+        report(rows, args.window_days)
+
+
+if __name__ == "__main__":
+    main()
+    # docker exec -it gradio_app python /gradio_app/scripts/build_stage_timings.py --report
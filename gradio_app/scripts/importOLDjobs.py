@@ -3,22 +3,17 @@ import json
 import os
 import sys
 
-from pymongo import MongoClient
-
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 GRADIO_ROOT = os.path.dirname(SCRIPT_DIR)
 PROJECT_ROOT = os.path.dirname(GRADIO_ROOT)
 sys.path.insert(0, GRADIO_ROOT)
 
 from src.logger import LOGGER
+from src.mongodb import upsert_job_record
 from src.settings import JOB_DIR, MOUNT_POINT
 
 DEFAULT_JOBS_DIR = os.environ.get("JOBS_DIR", JOB_DIR)
 
-client = MongoClient("mongodb://mongodb:27017/")
-db = client["app_db"]
-collections = db["input_queue"]
-
 
 def _load_params(params_path):
     """Read one params.json file and return a dict or None."""
@@ -118,11 +113,7 @@ def import_old_jobs(jobs_dir=DEFAULT_JOBS_DIR, session_id=None):
         data["job_url"] = job_url
 
         try:
-            collections.update_one(
-                {"session_id": session_id_udt, "job_name": job_name_udt},
-                {"$set": data},
-                upsert=True,
-            )
+            upsert_job_record(data)
         except Exception as exc:
             failed += 1
             LOGGER.warning(f"Failed to upsert {session_id_udt}/{job_name_udt}: {exc}")
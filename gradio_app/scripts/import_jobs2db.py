@@ -3,7 +3,6 @@ import json
 import os
 import sys
 from pathlib import Path
-from pymongo import MongoClient
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 GRADIO_ROOT = SCRIPT_DIR.parent
@@ -11,22 +10,15 @@ PROJECT_ROOT = GRADIO_ROOT.parent
 sys.path.insert(0, str(GRADIO_ROOT))
 
 from src.logger import LOGGER
+from src.mongodb import upsert_job_record
 
 JOBS_DIR = Path(os.environ.get("JOBS_DIR", str(PROJECT_ROOT / "tandem" / "jobs")))
 
-client = MongoClient("mongodb://mongodb:27017/")
-db = client["app_db"]
-collections = db["input_queue"]
-
 def import_session_jobs(session_id: str) -> None:
     session_dir = JOBS_DIR / session_id
     if not session_dir.is_dir():
         raise FileNotFoundError(f"Session folder not found: {session_dir}")
 
-    client = MongoClient("mongodb://mongodb:27017/")
-    db = client["app_db"]
-    collections = db["input_queue"]
-
     LOGGER.info(f"Importing jobs from {session_dir} into mongodb")
 
     imported = 0
@@ -50,7 +42,7 @@ def import_session_jobs(session_id: str) -> None:
         data["session_url"] = f"/TANDEM-dev/session/?session_id={session_id}"
         data["job_url"] = f"/TANDEM-dev/results/?session_id={session_id}&job_name={job_dir.name}"
 
-        collections.update_one({"session_id": session_id, "job_name": job_dir.name}, {"$set": data}, upsert=True,)
+        upsert_job_record(data)
         imported += 1
         LOGGER.info(f"Upserted {session_id}/{job_dir.name}")
     LOGGER.info(f"Done. Imported={imported}, skipped={skipped}")
@@ -0,0 +1,151 @@
+"""Measure time-to-first-render of the results and session pages.
+
+Runs, in-process against the configured MongoDB, the consolidated
+`load_page` handlers (one browser round trip) and the same steps chained the
+way the pages used to wire them on `page.load` (one round trip per step), and
+reports the server time of each together with an estimate of
+time-to-first-render:
+
+    TTFR ~= server time + round trips x RTT
+
+Both variants call the current helpers, so the chained variant is not the
+previous code: the comparison is a round-trip estimate only. For a true
+baseline, run this script from the commit before the consolidation.
+
+The MongoDB commands each variant sends (from the query listener in
+`src/mongodb.py`) are reported too. Use an existing job, or `--seed` to copy
+a finished job folder (with its params.json) into a scratch session, measure
+it and remove it again.
+
+Examples (inside the gradio_app container):
+
+    python scripts/measure_page_load.py --session-id <session_id> --job-name <job_name> --rtt-ms 40
+    python scripts/measure_page_load.py --seed /tandem/jobs/test/<job_name>
+"""
+
+import argparse
+import json
+import os
+import secrets
+import shutil
+import statistics
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+GRADIO_ROOT = SCRIPT_DIR.parent
+sys.path.insert(0, str(GRADIO_ROOT))
+
+import gradio as gr
+
+from src.mongodb import query_listener, remove_records_by_session, upsert_job_record, upsert_session_created_record
+from src.request import job_exists, request2result_payload, request2session_payload, session_exists
+from src.results import ResultPage, resolve_result_request
+from src.session import SessionPage, on_session_id
+from src.settings import JOB_DIR
+
+
+def chained_results_load(ui, request):
+    """The results page load steps chained as before (eleven round trips), using the current helpers."""
+    session_id, job_name, example_name, example_action = request2result_payload(request)
+    session_id, job_name, launch_session_id = resolve_result_request(session_id, job_name, example_name, example_action)
+    job_exists(session_id, job_name)
+    param, job_folder = ui.search_param(session_id, job_name)
+    ui.revision_token(session_id, job_name, job_folder)
+    param = {**param, "launch_session_id": launch_session_id} if param else param
+    param, userlog, session_id, job_name, job_status, mode = ui.__update__(param, job_folder, {}, False)
+    _, render_hashes = ui.update_topbar(param, session_id, job_name, job_status, {})
+    _, render_hashes = ui.update_process_status(param, userlog, session_id, job_name, job_status, mode, render_hashes)
+    ui.update_finished_job(param, JOB_DIR, userlog, render_hashes)
+    return 11
+
+
+def chained_session_load(ui, request):
+    """The session page load steps chained as before (six round trips), using the current helpers."""
+    session_id, example_name, example_action = request2session_payload(request)
+    session_exists(session_id)
+    session_udts = on_session_id(session_id, {})
+    example_udts = ui.apply_request_payload(example_name, example_action, session_udts[-1])
+    str_file_udt = example_udts[9]
+    ui.on_str_upload(str_file_udt.get("value", "") if isinstance(str_file_udt, dict) else str_file_udt)
+    return 6
+
+
+def seed_job(source_folder):
+    """Copy a finished job folder into a scratch session and insert its record."""
+    session_id = f"ttfr{secrets.token_hex(4)}"
+    job_name = os.path.basename(os.path.normpath(source_folder))
+    with open(os.path.join(source_folder, "params.json")) as f:
+        record = json.load(f)
+    shutil.copytree(source_folder, os.path.join(JOB_DIR, session_id, job_name))
+    record.update(session_id=session_id, job_name=job_name, status="finished")
+    upsert_session_created_record(session_id)
+    upsert_job_record(record)
+    return session_id, job_name
+
+
+def remove_seed(session_id):
+    remove_records_by_session(session_id)
+    shutil.rmtree(os.path.join(JOB_DIR, session_id), ignore_errors=True)
+
+
+def mongo_commands():
+    return sum(row["count"] for row in query_listener.stats())
+
+
+def measure(label, func, repeats, rtt_ms):
+    """Run `func` `repeats` times; return the median server time and the estimated TTFR (ms)."""
+    timings = []
+    round_trips = 1
+    commands = mongo_commands()
+    for _ in range(repeats):
+        start = time.perf_counter()
+        round_trips = func() or 1
+        timings.append((time.perf_counter() - start) * 1000)
+    commands = (mongo_commands() - commands) / repeats
+    server_ms = statistics.median(timings)
+    ttfr_ms = server_ms + round_trips * rtt_ms
+    print(f"{label:<28} server {server_ms:8.2f} ms  mongo cmds {commands:4.1f}  round trips {round_trips:>2}  TTFR ~{ttfr_ms:8.2f} ms")
+    return server_ms, ttfr_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate the time-to-first-render saved by consolidating page-load round trips.")
+    parser.add_argument("--session-id", help="Existing session id.")
+    parser.add_argument("--job-name", help="Existing job name in that session.")
+    parser.add_argument("--seed", help="Finished job folder to copy into a scratch session instead.")
+    parser.add_argument("--repeats", type=int, default=20, help="Repetitions per variant (median reported). Default: 20")
+    parser.add_argument("--rtt-ms", type=float, default=40, help="Browser-server round-trip time. Default: 40")
+    args = parser.parse_args()
+    if not args.seed and not (args.session_id and args.job_name):
+        parser.error("give --session-id and --job-name, or --seed")
+
+    session_id, job_name = seed_job(args.seed) if args.seed else (args.session_id, args.job_name)
+    try:
+        run(session_id, job_name, args.repeats, args.rtt_ms)
+    finally:
+        if args.seed:
+            remove_seed(session_id)
+
+
+def run(session_id, job_name, repeats, rtt_ms):
+    with gr.Blocks():
+        results_ui = ResultPage(JOB_DIR).build()
+        session_ui = SessionPage(gr.State({})).build()
+
+    results_request = SimpleNamespace(query_params={"session_id": session_id, "job_name": job_name})
+    session_request = SimpleNamespace(query_params={"session_id": session_id})
+
+    print(f"{session_id}/{job_name}, median of {repeats}, RTT {rtt_ms:g} ms")
+    before = measure("results: chained (est.)", lambda: chained_results_load(results_ui, results_request), repeats, rtt_ms)
+    after = measure("results: load_page", lambda: results_ui.load_page(results_request) and 1, repeats, rtt_ms)
+    print(f"results TTFR {before[1]:.1f} -> {after[1]:.1f} ms ({before[1] / after[1]:.1f}x, round-trip estimate only)")
+    before = measure("session: chained (est.)", lambda: chained_session_load(session_ui, session_request), repeats, rtt_ms)
+    after = measure("session: load_page", lambda: session_ui.load_page({}, session_request) and 1, repeats, rtt_ms)
+    print(f"session TTFR {before[1]:.1f} -> {after[1]:.1f} ms ({before[1] / after[1]:.1f}x, round-trip estimate only)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Load model of results-page refresh traffic: fixed timer vs adaptive cadence.
+
+Models the Gradio requests that open results pages of active jobs send to the
+server, and compares:
+
+- timer: the former `gr.Timer(10)`, whose every tick ran a five-step chain
+  (`__update__`, topbar, status panel, finished outputs, `update_timer`)
+  whatever the job's state.
+- adaptive: the job watcher's pushes (one `check_revision` plus the four-step
+  refresh chain per job change) and its clock ticks (one status-panel request)
+  spaced by `job_watcher.refresh_interval` from the job's state and ETA.
+
+Each viewer watches one job at a uniformly drawn queue position, from now until
+the job finishes. Jobs take `--job-minutes` and run `--slots` at a time in FIFO
+order, and each produces `--events` pushes (status changes and user-log stage
+events). Requests per second are the viewers' average request rate times the
+number of concurrent viewers.
+
+Example:
+
+    python scripts/refresh_load_model.py --viewers 10 40 100 --queue-depth 40
+"""
+
+import argparse
+import math
+import sys
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+GRADIO_ROOT = SCRIPT_DIR.parent
+sys.path.insert(0, str(GRADIO_ROOT))
+
+from src.job_watcher import refresh_interval
+from src.settings import TANDEM_SLOTS
+
+TIMER_SECONDS = 10
+TIMER_CHAIN_REQUESTS = 5
+PUSH_REQUESTS = 5
+TICK_REQUESTS = 1
+
+
+def job_timeline(position, slots, duration):
+    """Start and finish (seconds from now) of the job at a 1-based queue position; 0 is running."""
+    if position == 0:
+        return 0.0, duration / 2  # caught halfway through its run
+    start = math.ceil(position / slots) * duration - duration / 2
+    return start, start + duration
+
+
+def adaptive_ticks(start, finish):
+    """Count the clock ticks a viewer receives until the job finishes."""
+    now, ticks = 0.0, 0
+    while True:
+        status = "pending" if now < start else "processing"
+        estimate = {"status": status, "position": 1, "start": start, "finish": finish}
+        now += refresh_interval(status, estimate, now=now)
+        if now >= finish:
+            return ticks
+        ticks += 1
+
+
+def per_viewer_rates(queue_depth, slots, duration, events):
+    """Average request rate (per second) of one viewer under each policy."""
+    timer_requests = adaptive_requests = lifetime = 0.0
+    for position in range(0, queue_depth + 1):
+        start, finish = job_timeline(position, slots, duration)
+        lifetime += finish
+        timer_requests += finish / TIMER_SECONDS * TIMER_CHAIN_REQUESTS
+        job_events = events / 2 if position == 0 else events
+        adaptive_requests += adaptive_ticks(start, finish) * TICK_REQUESTS + job_events * PUSH_REQUESTS
+    return timer_requests / lifetime, adaptive_requests / lifetime
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare results-page refresh traffic of the fixed timer and the adaptive cadence.")
+    parser.add_argument("--viewers", type=int, nargs="+", default=[10, 40, 100], help="Concurrent results-page viewers. Default: 10 40 100")
+    parser.add_argument("--queue-depth", type=int, default=20, help="Pending jobs ahead of the last viewer's job. Default: 20")
+    parser.add_argument("--slots", type=int, default=TANDEM_SLOTS, help=f"Jobs run concurrently. Default: {TANDEM_SLOTS}")
+    parser.add_argument("--job-minutes", type=float, default=15, help="Run time of one job. Default: 15")
+    parser.add_argument("--events", type=int, default=20, help="Pushes per job (status changes and user-log events). Default: 20")
+    args = parser.parse_args()
+
+    timer_rate, adaptive_rate = per_viewer_rates(args.queue_depth, args.slots, args.job_minutes * 60, args.events)
+    print(f"queue depth {args.queue_depth}, {args.slots} slots, {args.job_minutes:g} min jobs, {args.events} pushes/job")
+    print(f"{'viewers':>8} {'timer req/s':>12} {'adaptive req/s':>15} {'reduction':>10}")
+    for viewers in args.viewers:
+        timer_rps = timer_rate * viewers
+        adaptive_rps = adaptive_rate * viewers
+        print(f"{viewers:>8} {timer_rps:>12.2f} {adaptive_rps:>15.3f} {1 - adaptive_rps / timer_rps:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
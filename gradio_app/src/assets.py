@@ -0,0 +1,134 @@
+"""Static asset pipeline: minified CSS and fingerprinted, immutably cached files.
+
+- `compile_css` returns the compressed (minified) stylesheet. It is compiled
+  at image build time (`scripts/build_assets.py`) into `main.min.css` under
+  `BUILD_ASSETS_DIR` (`/opt/gradio_assets` in the image, outside the
+  bind-mounted `/gradio_app`; `assets/` otherwise), whose first line records
+  a hash of the sass sources. At startup the file is used as is when the hash
+  still matches, and sass runs only when a source changed. The readable
+  `assets/main.css` is written for reference when sass runs. The stylesheet
+  stays in Gradio's `css` option so Gradio keeps scoping it the same way.
+- Files under `assets/images/` are served by the single route
+  `/{MOUNT_POINT}/static/...` under content-hashed names
+  (`nthu_logo.<hash>.png`). A name never changes content, so responses carry
+  `Cache-Control: immutable` and repeat visits never revalidate them.
+  Templates keep writing `./gradio_api/file=assets/images/<name>`;
+  `rewrite_asset_urls` swaps those for the fingerprinted URLs when a template
+  is loaded (see `js.load_template`).
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+
+import sass
+
+from .settings import ASSETS_DIR, BUILD_ASSETS_DIR, MOUNT_POINT, SASS_DIR
+
+STATIC_DIRS = ("images",)
+STATIC_ROUTE = f"/{MOUNT_POINT}/static"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+MINIFIED_CSS = os.path.join(BUILD_ASSETS_DIR, "main.min.css")
+
+_ASSET_REF_RE = re.compile(r"\./gradio_api/file=assets/((?:%s)/[^\"'\s)?#]+)" % "|".join(STATIC_DIRS))
+
+_lock = threading.Lock()
+_assets = None  # {"urls": {relative path: URL}, "files": {fingerprinted path: absolute path}}
+
+
+def sass_hash():
+    """Hash of the sass sources (names and contents) and the libsass version."""
+    digest = hashlib.blake2b(sass.libsass_version.encode(), digest_size=16)
+    for dirpath, dirs, names in os.walk(SASS_DIR):
+        dirs.sort()
+        for name in sorted(names):
+            path = os.path.join(dirpath, name)
+            digest.update(os.path.relpath(path, SASS_DIR).encode())
+            with open(path, "rb") as handle:
+                digest.update(handle.read())
+    return digest.hexdigest()
+
+
+def build_css(force=False):
+    """Compile the sass sources unless `MINIFIED_CSS` is up to date.
+
+    Output:
+    - (minified CSS, True if sass was run).
+    """
+    stamp = f"/* sass:{sass_hash()} */"
+    if not force:
+        try:
+            with open(MINIFIED_CSS, encoding="utf-8") as f:
+                first_line, _, css = f.read().partition("\n")
+            if first_line == stamp:
+                return css, False
+        except OSError:
+            pass
+
+    sass.compile(dirname=(str(SASS_DIR), str(ASSETS_DIR)), output_style="expanded")
+    # Compressed output starts with a byte order mark when the CSS has non-ASCII
+    # characters; inside a <style> element it would break the first selector.
+    css = sass.compile(filename=os.path.join(SASS_DIR, "main.scss"), output_style="compressed").lstrip("\ufeff")
+    try:
+        os.makedirs(BUILD_ASSETS_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=BUILD_ASSETS_DIR)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(f"{stamp}\n{css}")
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, MINIFIED_CSS)
+    except OSError:
+        pass  # read-only image: keep serving the freshly compiled CSS
+    return css, True
+
+
+def compile_css():
+    """Return the minified stylesheet, compiling sass only when its sources changed."""
+    return build_css()[0]
+
+
+def _fingerprint(relpath, path):
+    digest = hashlib.blake2b(digest_size=6)
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 16), b""):
+            digest.update(chunk)
+    stem, ext = os.path.splitext(relpath)
+    return f"{stem}.{digest.hexdigest()}{ext}"
+
+
+def static_assets():
+    """Return the fingerprint table of the static files, hashing them on first use."""
+    global _assets
+    if _assets is not None:
+        return _assets
+    with _lock:
+        if _assets is None:
+            urls, files = {}, {}
+            for directory in STATIC_DIRS:
+                root = os.path.join(ASSETS_DIR, directory)
+                for dirpath, _, names in os.walk(root):
+                    for name in sorted(names):
+                        path = os.path.join(dirpath, name)
+                        relpath = "/".join(os.path.relpath(path, ASSETS_DIR).split(os.sep))
+                        fingerprinted = _fingerprint(relpath, path)
+                        urls[relpath] = f"{STATIC_ROUTE}/{fingerprinted}"
+                        files[fingerprinted] = path
+            _assets = {"urls": urls, "files": files}
+    return _assets
+
+
+def static_url(relpath):
+    """Return the fingerprinted URL of `assets/<relpath>`, or None if it is not a static asset."""
+    return static_assets()["urls"].get(relpath)
+
+
+def static_file(fingerprinted):
+    """Return the absolute path served for a fingerprinted name, or None."""
+    return static_assets()["files"].get(fingerprinted)
+
+
+def rewrite_asset_urls(text):
+    """Point `./gradio_api/file=assets/...` references at their fingerprinted URLs."""
+    return _ASSET_REF_RE.sub(lambda match: static_url(match.group(1)) or match.group(0), text)
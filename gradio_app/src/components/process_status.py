@@ -1,49 +1,55 @@
 import html
 import os
 
-from pymongo import MongoClient
 
+from .. import js, queue_stats
 from .popup import build_event_popup
-from ..settings import JOB_DIR, HTML_DIR, MOUNT_POINT
-from ..mongodb import count_records
+from ..settings import JOB_DIR, HTML_DIR, MOUNT_POINT, STAGES
+from ..queue_eta import estimate_job, format_duration, format_estimate
+from ..stage_model import remaining_stage_seconds
+from ..userlog import index_events
+from ..manifest import has_file
 from .. logger import LOGGER
 
 PROCESS_STATUS_TEMPLATE = os.path.join(HTML_DIR, "results_process_status.html")
 
-client = MongoClient("mongodb://mongodb:27017/")
-db = client["app_db"]
-collections = db["input_queue"]
-
-STAGE_LABELS = [
-    "Validating SAVs",
-    "Mapping SAVs to structures",
-    "Feature calculation",
-    "Model inferencing/Training",
-    "Summary",
-]
-
 def build_process_status_html(param, userlog, session_id, job_name, job_status):
     """Build the staged process-status table HTML."""
     events = userlog.get("events", []) if isinstance(userlog, dict) else []
+    index = userlog.get("index") if isinstance(userlog, dict) else None
+    if index is None:
+        index = index_events(events)
     job_folder = os.path.join(JOB_DIR, session_id, job_name) if session_id and job_name else ""
 
-    stage_cells, popup_html = _build_stage_cells(events, job_folder, job_status)
-    stage_labels = _build_stage_labels(events)
-    with open(PROCESS_STATUS_TEMPLATE, "r", encoding="utf-8") as handle:
-        template_text = handle.read()
+    stage_cells, popup_html = _build_stage_cells(index, job_folder, job_status, param or {})
+    stage_labels = _build_stage_labels(index)
     # variable dictionary contains all variables that fill up template
     var_dict = {
         "submission_time": (param or {}).get("submission_time", "-"),
-        "estimated_time": "-",
-        "pending_count": count_records({"status": "pending"}),
-        "running_count": count_records({"status": "processing"}),
+        "estimated_time": html.escape(_estimated_time(session_id, job_name, job_status)),
+        "pending_count": queue_stats.format_count("pending"),
+        "running_count": queue_stats.format_count("processing"),
     }
     var_dict.update(stage_cells)
     var_dict.update(stage_labels)
-    return template_text.format(**var_dict) + popup_html
-     
-def file2link(filepath):
-    if not os.path.exists(filepath):
+    return js.build_html_text(PROCESS_STATUS_TEMPLATE, **var_dict) + popup_html
+
+def _estimated_time(session_id, job_name, job_status):
+    if job_status not in {"pending", "processing"}:
+        return "-"
+    return format_estimate(estimate_job(session_id, job_name))
+
+def _remaining_time(param, events, label):
+    remaining = remaining_stage_seconds(param, events, label)
+    if remaining is None:
+        return ""
+    if remaining <= 0:
+        return "finishing soon"
+    return f"~{format_duration(remaining)} left"
+
+def file2link(job_folder, file_value):
+    filepath = os.path.join(job_folder, file_value)
+    if not has_file(job_folder, os.path.relpath(filepath, job_folder)):
         LOGGER.warn(f"{filepath} does not exist")
 
     filename = os.path.splitext(os.path.basename(filepath))[0]
@@ -52,16 +58,19 @@ def file2link(filepath):
     safe_label = html.escape(filename)
     return f'<a href="{safe_href}" target="_blank" rel="noopener"><font size="-1">{safe_label}</font></a>'
 
-def _build_stage_cells(events, job_folder, job_status):
+def _build_stage_cells(index, job_folder, job_status, param):
     results = {}
+    # The last info event of each stage carries its duration; enough for the remaining-time estimate.
+    info_events = [record["info"] for record in index.values() if record.get("info")]
     previous_stage_done = False
     previous_stage_failed = False
     popup_html_parts = []
 
-    for i, label in enumerate(STAGE_LABELS):
-        main_event = next((event for event in reversed(events) if event.get("stage") == label and event.get("level") == "info"),None)
-        warning_events = [event for event in events if event.get("stage") == label and event.get("level") == "warning"]
-        error_events = [event for event in events if event.get("stage") == label and event.get("level") == "error"]
+    for i, label in enumerate(STAGES):
+        stage = index.get(label) or {}
+        main_event = stage.get("info")
+        warning_events = stage.get("warning", [])
+        error_events = stage.get("error", [])
         n_warning = len(warning_events)
         n_error = len(error_events)
 
@@ -80,14 +89,13 @@ def _build_stage_cells(events, job_folder, job_status):
             else:
                 status = "Pend"
             results[f"file_{i}"] = ""
-            results[f"time_{i}"] = ""
+            results[f"time_{i}"] = _remaining_time(param, info_events, label) if status == "Process" else ""
         else:
             status = "Done"
             previous_stage_done = True
             context = main_event.get("context", {})
             file_value = context.get("file")
-            filepath = os.path.join(job_folder, file_value) if file_value else ""
-            results[f"file_{i}"] = file2link(filepath) if filepath else ""
+            results[f"file_{i}"] = file2link(job_folder, file_value) if file_value else ""
             results[f"time_{i}"] = context.get("duration_text")
 
         if n_error:
@@ -123,10 +131,10 @@ def _build_stage_cells(events, job_folder, job_status):
     return results, "".join(popup_html_parts)
 
 
-def _build_stage_labels(events):
+def _build_stage_labels(index):
     r = {}
-    for i, label in enumerate(STAGE_LABELS):
-        mapping_event = next((event for event in reversed(events) if event.get("stage") == label and event.get("level") == "important"), None)
+    for i, label in enumerate(STAGES):
+        mapping_event = (index.get(label) or {}).get("important")
         msg = mapping_event.get("message", {}) if mapping_event else label
         r[f"stage_{i}_label"] = msg
     return r
@@ -1,7 +1,6 @@
 import html
 import os
 
-from pymongo import MongoClient
 
 from .. import js
 from ..request import build_job_url, build_session_url
@@ -9,9 +8,7 @@ from ..settings import HTML_DIR
 
 TOPBAR_TEMPLATE = os.path.join(HTML_DIR, "results_topbar.html")
 
-client = MongoClient("mongodb://mongodb:27017/")
-db = client["app_db"]
-collections = db["input_queue"]
+from ..mongodb import list_session_job_names
 
 
 def build_topbar_html(param, session_id, job_name, job_status):
@@ -40,11 +37,7 @@ def build_topbar_html(param, session_id, job_name, job_status):
             cancel_job_html="",
         )
 
-    job_list = collections.distinct(
-        "job_name",
-        {"session_id": session_id_udt, "status": {"$in": ["pending", "processing", "finished"]}},
-    )
-    job_list = sorted(job_list)
+    job_list = list_session_job_names(session_id_udt, statuses=["pending", "processing", "finished"])
 
     option_html = []
     for item in job_list:
@@ -0,0 +1,39 @@
+"""Gzip for the text responses of the FastAPI app.
+
+Starlette's `GZipMiddleware` compresses every response above its size limit,
+including the zip downloads, SHAP images and partial (206) responses.
+`TextGZipMiddleware` only compresses text formats (HTML, CSS, JavaScript,
+JSON, SVG) and passes everything else through untouched. Server-sent events
+stay uncompressed, so Gradio's queue streaming is not buffered.
+"""
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+
+COMPRESSIBLE_TYPES = (
+    "text/html", "text/css", "text/plain", "text/javascript", "text/csv",
+    "application/javascript", "application/json", "application/xml", "image/svg+xml",
+)
+
+
+def is_compressible(message):
+    """Return True if an `http.response.start` message describes a compressible response."""
+    headers = Headers(raw=message["headers"])
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    return message["status"] != 206 and "content-range" not in headers and content_type in COMPRESSIBLE_TYPES
+
+
+class _TextGZipResponder(GZipResponder):
+    async def send_with_compression(self, message):
+        await super().send_with_compression(message)
+        if message["type"] == "http.response.start" and not is_compressible(message):
+            self.content_encoding_set = True  # makes the responder pass the body through
+
+
+class TextGZipMiddleware(GZipMiddleware):
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or "gzip" not in Headers(scope=scope).get("accept-encoding", ""):
+            await self.app(scope, receive, send)
+            return
+        responder = _TextGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+        await responder(scope, receive, send)
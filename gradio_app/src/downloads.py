@@ -0,0 +1,419 @@
+"""Streaming zip downloads of job folders.
+
+The archive is never written to disk: it is generated chunk by chunk while the
+response is sent. Its bytes are deterministic for a given folder state (files
+in sorted order, timestamps from their mtimes, fixed deflate settings), which
+makes HTTP range requests and `ETag` revalidation possible:
+
+- Each entry's CRC and sizes follow its data in a data descriptor, so the
+  first download of a folder state streams immediately, compressing every
+  file once while it is sent (`stream_archive`). On the way it records the
+  archive's plan (per-file CRC, compressed size and offset) in a small LRU
+  keyed by folder and `ETag`.
+- With a plan, the total length and the position of every entry are known:
+  later downloads carry a `Content-Length`, and a range request regenerates
+  only the entries it overlaps. A range request without a plan (e.g. after
+  a restart) builds it first, reading each file once.
+- Already-compressed files (PNG, ...) are stored rather than deflated.
+
+The `ETag` is derived from the relative path, size and mtime of every file, so
+it changes whenever the folder does; for post-processed jobs these come from
+the job manifest rather than a walk of the folder. Job archives are limited to the classic
+zip format (no zip64, so under 4 GiB).
+
+Session archives (`session_zip_response`) bundle many job folders and are
+streamed with `zipfile` in write-only mode instead: each entry is followed by
+a data descriptor, so nothing is planned or read ahead and memory stays
+constant whatever the number of jobs (only the central directory, about a
+hundred bytes per file, is kept). They use zip64 as needed and are sent
+without a length, ETag or range support.
+"""
+
+import hashlib
+import io
+import os
+import re
+import struct
+import threading
+import time
+import zipfile
+import zlib
+from collections import OrderedDict
+from urllib.parse import quote
+
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+
+from .manifest import read_manifest
+
+CHUNK_SIZE = 1 << 16
+MAX_CACHED_PLANS = 64
+ZIP_LIMIT = 0xFFFFFFFF
+
+# Already-compressed formats are stored as-is.
+STORED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp", ".zip", ".gz", ".bz2", ".xz", ".pt", ".pth"}
+# Top-level files that are not job outputs: the legacy on-disk archive and
+# thumbnails, and the derivatives written by post-processing.
+EXCLUDED_NAMES = {
+    "result.zip", "manifest.json", "predictions.columns.json",
+    "tandem_shap_thumbs", "tandem_shap_derived", "predictions_store",
+}
+
+_lock = threading.Lock()
+_plans = OrderedDict()  # (job_folder, etag) -> plan
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _excluded(relpath):
+    parts = relpath.split("/")
+    return parts[0] in EXCLUDED_NAMES or any(part.startswith(".tmp-") for part in parts)
+
+
+def scan_folder(job_folder):
+    """List (path, relative path, size, mtime) of the files to archive, in archive order.
+
+    Post-processed jobs are listed from their manifest (one stat); other
+    folders are walked.
+    """
+    manifest = read_manifest(job_folder)
+    if manifest.get("files") is not None:
+        return [
+            (os.path.join(job_folder, *relpath.split("/")), os.path.join(*relpath.split("/")), entry["size"], entry["mtime"])
+            for relpath, entry in sorted(manifest["files"].items(), key=lambda item: item[0].split("/"))
+            if not _excluded(relpath)
+        ]
+
+    files = []
+    for root, dirs, names in os.walk(job_folder):
+        if root == job_folder:
+            dirs[:] = [name for name in dirs if name not in EXCLUDED_NAMES and not name.startswith(".tmp-")]
+        dirs.sort()
+        for name in sorted(names):
+            if root == job_folder and name in EXCLUDED_NAMES or name.startswith(".tmp-"):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((path, os.path.relpath(path, job_folder), stat.st_size, stat.st_mtime))
+    return files
+
+
+def folder_etag(files):
+    """Return a quoted `ETag` for the listed folder state."""
+    digest = hashlib.blake2b(repr([(rel, size, mtime) for _, rel, size, mtime in files]).encode("utf-8"), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def _dos_datetime(mtime):
+    t = time.localtime(mtime)
+    if t.tm_year < 1980:
+        return 0, (1 << 5) | 1
+    dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+    dos_date = ((t.tm_year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+    return dos_time, dos_date
+
+
+def _read_chunks(path):
+    with open(path, "rb") as handle:
+        while True:
+            chunk = handle.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _entry_method(path):
+    return zipfile.ZIP_STORED if os.path.splitext(path)[1].lower() in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+
+
+def _entry_chunks(path, method, stats=None):
+    """Yield the stored or deflated bytes of a file.
+
+    When `stats` is given, its `crc`, `size` and `compressed` are filled in
+    during the same pass.
+    """
+    stats = {} if stats is None else stats
+    stats.update(crc=0, size=0, compressed=0)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -15) if method == zipfile.ZIP_DEFLATED else None
+    for chunk in _read_chunks(path):
+        stats["crc"] = zlib.crc32(chunk, stats["crc"])
+        stats["size"] += len(chunk)
+        data = compressor.compress(chunk) if compressor else chunk
+        if data:
+            stats["compressed"] += len(data)
+            yield data
+    if compressor:
+        data = compressor.flush()
+        stats["compressed"] += len(data)
+        yield data
+
+
+def _local_header(arcname, method, mtime):
+    # Flag bit 3: CRC and sizes follow the data in a descriptor, so the header
+    # can be sent before the file is compressed.
+    name = arcname.encode("utf-8")
+    dos_time, dos_date = _dos_datetime(mtime)
+    return struct.pack("<IHHHHHIIIHH", 0x04034B50, 20, 0x0808, method, dos_time, dos_date, 0, 0, 0, len(name), 0) + name
+
+
+def _finish_entry(path, arcname, method, mtime, offset, header, stats):
+    """Complete an entry's layout once its CRC and sizes are known."""
+    name = arcname.encode("utf-8")
+    dos_time, dos_date = _dos_datetime(mtime)
+    descriptor = struct.pack("<IIII", 0x08074B50, stats["crc"], stats["compressed"], stats["size"])
+    central = struct.pack(
+        "<IHHHHHHIIIHHHHHII", 0x02014B50, (3 << 8) | 20, 20, 0x0808, method, dos_time, dos_date,
+        stats["crc"], stats["compressed"], stats["size"], len(name), 0, 0, 0, 0, 0o100644 << 16, offset,
+    ) + name
+    return {
+        "path": path, "method": method, "offset": offset, "header": header, "compressed": stats["compressed"],
+        "descriptor": descriptor, "central": central,
+    }
+
+
+def _entry_length(entry):
+    return len(entry["header"]) + entry["compressed"] + len(entry["descriptor"])
+
+
+def _layout(files, base_dir):
+    """Yield (path, arcname, method, mtime) of the archive entries, in order."""
+    for path, relpath, _, mtime in files:
+        yield path, "/".join([base_dir] + relpath.split(os.sep)), _entry_method(path), mtime
+
+
+def _finish_plan(entries, offset):
+    if offset > ZIP_LIMIT:
+        raise ValueError("Archive exceeds 4 GiB")
+    central = b"".join(entry["central"] for entry in entries)
+    end = struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, len(entries), len(entries), len(central), offset, 0)
+    return {"entries": entries, "tail": central + end, "size": offset + len(central) + len(end)}
+
+
+def build_plan(files, base_dir):
+    """Lay out the archive of `files` with entries under `base_dir/`, reading each file once.
+
+    Output:
+    - Dict with `entries` (offset, header, compressed size, data descriptor
+      and central directory record of each file), `tail` (central directory
+      and end record bytes) and `size` (total archive length).
+    """
+    entries, offset = [], 0
+    for path, arcname, method, mtime in _layout(files, base_dir):
+        header = _local_header(arcname, method, mtime)
+        stats = {}
+        for _ in _entry_chunks(path, method, stats):
+            pass
+        entries.append(_finish_entry(path, arcname, method, mtime, offset, header, stats))
+        offset += _entry_length(entries[-1])
+        if offset > ZIP_LIMIT:
+            raise ValueError("Archive exceeds 4 GiB")
+    return _finish_plan(entries, offset)
+
+
+def cached_plan(job_folder, etag):
+    """Return the cached archive plan of a folder state, or None."""
+    key = (job_folder, etag)
+    with _lock:
+        plan = _plans.get(key)
+        if plan is not None:
+            _plans.move_to_end(key)
+        return plan
+
+
+def _cache_plan(job_folder, etag, plan):
+    with _lock:
+        _plans[(job_folder, etag)] = plan
+        while len(_plans) > MAX_CACHED_PLANS:
+            _plans.popitem(last=False)
+
+
+def get_plan(job_folder, files, etag):
+    """Return the cached archive plan of a folder state, building it on first use."""
+    plan = cached_plan(job_folder, etag)
+    if plan is None:
+        plan = build_plan(files, os.path.basename(os.path.normpath(job_folder)))
+        _cache_plan(job_folder, etag, plan)
+    return plan
+
+
+def stream_archive(job_folder, files, etag):
+    """Yield the whole archive while compressing it, then cache its plan.
+
+    The bytes are the same as `iter_archive(plan)`, so a download started
+    here can be resumed with a range request; the plan recorded on the way
+    serves those and gives later downloads their `Content-Length`.
+    """
+    entries, offset = [], 0
+    for path, arcname, method, mtime in _layout(files, os.path.basename(os.path.normpath(job_folder))):
+        header = _local_header(arcname, method, mtime)
+        yield header
+        stats = {}
+        yield from _entry_chunks(path, method, stats)
+        entries.append(_finish_entry(path, arcname, method, mtime, offset, header, stats))
+        yield entries[-1]["descriptor"]
+        offset += _entry_length(entries[-1])
+    plan = _finish_plan(entries, offset)
+    yield plan["tail"]
+    _cache_plan(job_folder, etag, plan)
+
+
+def iter_archive(plan, start=0, end=None):
+    """Yield the archive bytes in [start, end] (inclusive), generating only what is needed."""
+    end = plan["size"] - 1 if end is None else end
+    segments = []
+    for entry in plan["entries"]:
+        data_offset = entry["offset"] + len(entry["header"])
+        segments.append((entry["offset"], len(entry["header"]), lambda entry=entry: iter([entry["header"]])))
+        segments.append((data_offset, entry["compressed"], lambda entry=entry: _entry_chunks(entry["path"], entry["method"])))
+        segments.append((data_offset + entry["compressed"], len(entry["descriptor"]), lambda entry=entry: iter([entry["descriptor"]])))
+    segments.append((plan["size"] - len(plan["tail"]), len(plan["tail"]), lambda: iter([plan["tail"]])))
+
+    for seg_start, seg_size, chunks in segments:
+        seg_end = seg_start + seg_size - 1
+        if seg_size == 0 or seg_end < start:
+            continue
+        if seg_start > end:
+            return
+        position = seg_start
+        for chunk in chunks():
+            chunk_end = position + len(chunk) - 1
+            if chunk_end >= start and position <= end:
+                yield chunk[max(start - position, 0):min(end - position, len(chunk) - 1) + 1]
+            position += len(chunk)
+            if position > end:
+                return
+
+
+def parse_range(header, size):
+    """Parse a single-range `Range` header.
+
+    Output:
+    - (start, end) inclusive, None to send the whole archive (no header or a
+      multi-range request), or raises HTTPException 416 when unsatisfiable.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+
+def zip_response(job_folder, filename, headers):
+    """Return a streaming (or 304/206) response with the zip of `job_folder`.
+
+    Inputs:
+    - job_folder: existing folder to archive.
+    - filename: download file name for `Content-Disposition`.
+    - headers: the request headers (for `If-None-Match`, `Range`, `If-Range`).
+    """
+    files = scan_folder(job_folder)
+    etag = folder_etag(files)
+    common = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}",
+    }
+    if etag in [tag.strip() for tag in headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=common)
+
+    if sum(size for _, _, size, _ in files) > ZIP_LIMIT:
+        raise HTTPException(status_code=413, detail="Archive exceeds 4 GiB")
+
+    plan = cached_plan(job_folder, etag)
+    if_range = headers.get("if-range")
+    wants_range = headers.get("range") and (not if_range or if_range == etag)
+    if plan is None and not wants_range:
+        # First download of this folder state: start sending right away.
+        return StreamingResponse(stream_archive(job_folder, files, etag), media_type="application/zip", headers=common)
+
+    try:
+        plan = plan or get_plan(job_folder, files, etag)
+    except ValueError as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+
+    byte_range = parse_range(headers.get("range"), plan["size"]) if wants_range else None
+    if byte_range is None:
+        return StreamingResponse(iter_archive(plan), media_type="application/zip", headers={**common, "Content-Length": str(plan["size"])})
+
+    start, end = byte_range
+    return StreamingResponse(
+        iter_archive(plan, start, end), status_code=206, media_type="application/zip",
+        headers={**common, "Content-Length": str(end - start + 1), "Content-Range": f"bytes {start}-{end}/{plan['size']}"},
+    )
+
+
+class _StreamSink(io.RawIOBase):
+    """Write-only, unseekable buffer that `zipfile` writes the archive into."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_session_archive(job_folders):
+    """Yield a zip of several job folders, entries under `<job_name>/`, one chunk at a time.
+
+    Input:
+    - job_folders: iterable of job folder paths; each is scanned only when
+      its turn comes.
+    """
+    sink = _StreamSink()
+    with zipfile.ZipFile(sink, "w", allowZip64=True) as archive:
+        for job_folder in job_folders:
+            base_dir = os.path.basename(os.path.normpath(job_folder))
+            for path, relpath, size, mtime in scan_folder(job_folder):
+                info = zipfile.ZipInfo("/".join([base_dir] + relpath.split(os.sep)), time.localtime(max(mtime, 315532800))[:6])
+                info.external_attr = 0o100644 << 16
+                info.compress_type = zipfile.ZIP_STORED if os.path.splitext(path)[1].lower() in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+                info.file_size = size
+                try:
+                    with archive.open(info, "w", force_zip64=size > ZIP_LIMIT // 2) as entry:
+                        for chunk in _read_chunks(path):
+                            entry.write(chunk)
+                            data = sink.drain()
+                            if data:
+                                yield data
+                except OSError:
+                    continue  # removed while streaming; the entry stays truncated
+                yield sink.drain()
+    yield sink.drain()
+
+
+def session_zip_response(job_folders, filename):
+    """Return a streaming response with the zip of several job folders."""
+    return StreamingResponse(
+        iter_session_archive(job_folders), media_type="application/zip",
+        headers={"Cache-Control": "no-store", "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}"},
+    )
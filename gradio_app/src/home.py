@@ -2,21 +2,13 @@ import os
 import gradio as gr
 import secrets
 import string
-import json
 from datetime import datetime
 from . import js
-from .settings import EXAMPLES_JSON, FIGURE_1, HTML_DIR, JOB_DIR, TITLE, TAIPEI_TIME_ZONE
+from .settings import FIGURE_1, HTML_DIR, JOB_DIR, TITLE, TAIPEI_TIME_ZONE
+from .registry import get_examples
 from .base import build_footer, build_header, build_last_updated
 from .request import request2info, build_job_url, build_session_url
-
-from pymongo import MongoClient
-
-client = MongoClient("mongodb://mongodb:27017/")
-db = client["app_db"]
-collections = db["input_queue"]
-
-with open(EXAMPLES_JSON, "r", encoding="utf-8") as f:
-    EXAMPLES = json.load(f)
+from .mongodb import session_exists, upsert_record
 
 def left_column():
     overall_acc = 83.6
@@ -39,7 +31,6 @@ class HomeTab:
         self.folder = folder
 
     def build(self):
-        self.timer = gr.Timer(value=1, active=True) # Timer to check result
         self.job_folder = gr.State()
         self.session_url_state = gr.Textbox(value="", visible=False)
 
@@ -86,22 +77,19 @@ class HomeTab:
     
     def save_session_id(self, session_id, ip=None, geo_info=None) -> None:
         geo_info = geo_info or {}
-        collections.update_one({"session_id": session_id},
-            {
-                "$setOnInsert": {
-                    "session_id": session_id,
-                    "status": "created",
-                    "refresh": False,
-                    "IP": ip,
-                    "geo_info": geo_info,
-                    "city": geo_info.get("city", ""),
-                    "region": geo_info.get("region", ""),
-                    "country": geo_info.get("country", ""),
-                    "continent": geo_info.get("continent", ""),
-                    "created_at": datetime.now(TAIPEI_TIME_ZONE).strftime('%H%M%S%d%m%Y'),
-                }
+        upsert_record({"session_id": session_id}, None,
+            set_on_insert={
+                "session_id": session_id,
+                "status": "created",
+                "refresh": False,
+                "IP": ip,
+                "geo_info": geo_info,
+                "city": geo_info.get("city", ""),
+                "region": geo_info.get("region", ""),
+                "country": geo_info.get("country", ""),
+                "continent": geo_info.get("continent", ""),
+                "created_at": datetime.now(TAIPEI_TIME_ZONE).strftime('%H%M%S%d%m%Y'),
             },
-            upsert=True,
         )
         
     def generate_token(self, length=10):
@@ -109,10 +97,9 @@ class HomeTab:
         return ''.join(secrets.choice(alphabet) for _ in range(length))
 
     def create_new_session(self, ip=None, geo_info=None):
-        old_session_ids = collections.distinct("session_id")
         while True:
             new_id = self.generate_token(length=10)
-            if new_id not in old_session_ids:
+            if not session_exists(new_id):
                 self.save_session_id(new_id, ip=ip, geo_info=geo_info)
                 return new_id
 
@@ -122,7 +109,7 @@ class HomeTab:
             gr.Warning("Please select an example first.")
             return ""
 
-        ex = EXAMPLES.get(example_name)
+        ex = get_examples().get(example_name)
         if not ex:
             gr.Warning(f"No example configuration is available for '{example_name}'.")
             return ""
@@ -137,7 +124,7 @@ class HomeTab:
             gr.Warning("Please select an example first.")
             return ""
 
-        ex = EXAMPLES.get(example_name)
+        ex = get_examples().get(example_name)
         if not ex:
             gr.Warning(f"No example configuration is available for '{example_name}'.")
             return ""
@@ -147,7 +134,6 @@ class HomeTab:
         return build_job_url(session_id, "", example_name=example_name, example_action="view_output")
 
     def on_home_session(self, _session_id, param, request: gr.Request):
-        old_session_ids = collections.distinct("session_id")
         _session_id = _session_id.strip()
         ip, _, geo_info = request2info(request)
         param_udt = param.copy()
@@ -165,18 +151,15 @@ class HomeTab:
             session_url_udt = build_session_url(new_id)
             param_udt["session_url"] = session_url_udt
         # Case 2: User-provided input, invalid format
-        elif _session_id not in old_session_ids:
+        elif not session_exists(_session_id):
             session_id_udt = gr.update(value="", interactive=True)
             gr.Warning("Please enter a valid session ID")
         # Case 3: Valid existing/new session ID
-        elif _session_id in old_session_ids:
+        else:
             param_udt["session_id"] = _session_id
             session_url_udt = build_session_url(_session_id)
             param_udt["session_url"] = session_url_udt
             session_id_udt = gr.update(value=_session_id, interactive=False)
-        else:
-            session_id_udt = gr.update(value="", interactive=True)
-            gr.Warning("Unexpected error. Please try again.")
         
         return (session_id_udt, param_udt, session_url_udt)
 
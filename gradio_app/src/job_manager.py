@@ -1,12 +1,12 @@
-import jsonyx, json, os, shutil
+import jsonyx, json, os, secrets, shutil
 from datetime import datetime
 
 import gradio as gr
-from pymongo import MongoClient
 
-client = MongoClient("mongodb://mongodb:27017/")
-db = client["app_db"]
-collections = db["input_queue"]
+from .userlog import read_events
+from .tracing import build_waterfall_html
+
+from .mongodb import find_job_records, find_record, remove_record, upsert_job_record
 
 ADMIN_PASSWORD = "yanglab"
 JOBS_ROOT = "/tandem/jobs"
@@ -74,11 +74,8 @@ def on_save_job(json_text, df_jobs):
             return "❌ JSON must contain 'session_id' and 'job_name'", df_jobs_udt
 
         # ---- MongoDB upsert ----
-        collections.update_one(
-            {"session_id": session_id, "job_name": job_name},
-            {"$set": data},
-            upsert=True
-        )
+        data.pop("rev", None)
+        upsert_job_record(data)
 
         # ---- Update dataframe (append or update) ----
         df_jobs_copy = df_jobs.copy()
@@ -135,7 +132,7 @@ def on_delete_job(session_id, job_name, df_jobs):
 
     try:
         # ---- Remove from MongoDB ----
-        collections.delete_one({"session_id": session_id, "job_name": job_name})
+        remove_record(session_id, job_name)
         # ---- Remove job folder ----
         job_dir = f"{JOBS_ROOT}/{session_id}/{job_name}"
         if os.path.exists(job_dir):
@@ -162,7 +159,7 @@ def on_refresh(status, keyword):
             {"job_name": {"$regex": keyword, "$options": "i"}}
         ]
 
-    jobs = list(collections.find(q, {"_id": 0}))
+    jobs = find_job_records(q)
     seen = set()
     unique_jobs = []
 
@@ -205,25 +202,30 @@ def on_select_job(evt: gr.SelectData, df):
             lines=4,
         )
         status_msg_udt = gr.update(value="This session has been created, but no submitted job exists in this row.")
-        return session_id, job_name, params_box_udt, status_msg_udt
+        return session_id, job_name, params_box_udt, status_msg_udt, gr.update(value="")
 
-    job = collections.find_one(
-        {"session_id": session_id, "job_name": job_name},
-        {"_id": 0}
-    )
+    job = find_record(session_id, job_name)
     if job:
         params = jsonyx.dumps(job, indent=2, indent_leaves=False, separators=(",", ": "))
         nlines = len(job)+3
     else:
         params = ""
         nlines = 1
-    
+
+    events = read_events(f"{JOBS_ROOT}/{session_id}/{job_name}")
+    trace_html = build_waterfall_html(job, events) if job else ""
+
     params_box_udt = gr.update(value=params, lines=nlines)
     status_msg_udt = gr.update(value=None)
-    return session_id, job_name, params_box_udt, status_msg_udt
+    trace_box_udt = gr.update(value=trace_html)
+    return session_id, job_name, params_box_udt, status_msg_udt, trace_box_udt
+
+def is_admin_password(pw):
+    """Return True if `pw` is the job manager's admin password (constant-time compare)."""
+    return secrets.compare_digest(str(pw or "").encode(), ADMIN_PASSWORD.encode())
 
 def on_authentication(pw):
-    if pw == ADMIN_PASSWORD:
+    if is_admin_password(pw):
         authenticated_udt = True
         password_gate_udt = gr.update(visible=False)
         job_manager_ui = gr.update(visible=True)
@@ -280,6 +282,7 @@ def manager_tab():
         selected_session = gr.State(None)
         selected_job = gr.State(None)
         params_box = gr.Code(label="Job Parameters")
+        trace_box = gr.HTML()
 
         with gr.Row():
             save_btn = gr.Button("💾 Save Changes")
@@ -291,7 +294,7 @@ def manager_tab():
         # =========================================================
         search.change(on_refresh,        inputs=[status_filter, search], outputs=[df_jobs, params_box, status_msg])
         status_filter.change(on_refresh, inputs=[status_filter, search], outputs=[df_jobs, params_box, status_msg])
-        df_jobs.select(on_select_job,    inputs=[df_jobs],  outputs=[selected_session, selected_job, params_box, status_msg])
+        df_jobs.select(on_select_job,    inputs=[df_jobs],  outputs=[selected_session, selected_job, params_box, status_msg, trace_box])
         save_btn.click(on_save_job,      inputs=[params_box, df_jobs], outputs=[status_msg, df_jobs])
         delete_btn.click(on_delete_job,  inputs=[selected_session, selected_job, df_jobs], outputs=[status_msg, df_jobs])
         new_job_btn.click(on_new_job,    inputs=[],outputs=[params_box, status_msg])
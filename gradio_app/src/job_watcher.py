@@ -0,0 +1,278 @@
+"""Process-wide watcher that pushes job changes to open results pages.
+
+Results pages subscribe to their job with `watch_job`, an async generator
+bound to a hidden component. Two shared background threads watch all
+subscribed jobs and bump a per-job revision when something changes:
+
+- MongoDB: a change stream on `input_queue` when the server supports it
+  (replica set), otherwise one batched `find` over all subscribed jobs per
+  `WATCH_INTERVAL_SECONDS`.
+- Filesystem: one `stat` of each subscribed job's `user_log.jsonl` per
+  interval.
+
+The cost therefore grows with the number of watched jobs and job events, not
+with the number of open tabs; viewers wait on an `asyncio.Event` and only
+refresh when their job's revision moves.
+
+Between pushes, the queue position and ETA text of a viewer's status panel
+still age, so each subscription also emits clock ticks at an interval chosen
+from the job's state and estimate (`refresh_interval`): rarely for a job far
+back in the queue, more often as its start or finish approaches.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import gradio as gr
+from pymongo.errors import PyMongoError
+
+from . import queue_stats
+from .logger import LOGGER
+from .mongodb import find_record, find_records, watch_records
+from .queue_eta import estimate_job
+from .settings import JOB_DIR, REFRESH_ETA_FRACTION, REFRESH_MAX_SECONDS, REFRESH_MIN_SECONDS, WATCH_INTERVAL_SECONDS
+
+_lock = threading.Lock()
+_jobs = {}  # (session_id, job_name) -> watch state
+_started = False
+_change_stream_active = threading.Event()
+
+_WATCH_PROJECTION = {"session_id": 1, "job_name": 1, "status": 1, "job_start": 1, "job_end": 1}
+
+
+def _job_state():
+    return {"revision": 0, "status": "", "doc_signature": None, "file_signature": None, "object_id": None, "waiters": set()}
+
+
+def _doc_signature(record):
+    if not record:
+        return None
+    return (record.get("status"), record.get("job_start"), record.get("job_end"))
+
+
+def _file_signature(session_id, job_name):
+    try:
+        stat = os.stat(os.path.join(JOB_DIR, session_id, job_name, "user_log.jsonl"))
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _bump(key, state):
+    """Advance a job's revision and wake its viewers. Caller holds `_lock`."""
+    state["revision"] += 1
+    for loop, event in list(state["waiters"]):
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:  # loop already closed
+            state["waiters"].discard((loop, event))
+
+
+def _apply_record(key, record):
+    """Store a fresh job record; bump the revision if it changed. Caller holds `_lock`."""
+    state = _jobs.get(key)
+    if state is None:
+        return
+    signature = _doc_signature(record)
+    state["object_id"] = (record or {}).get("_id", state["object_id"])
+    state["status"] = (record or {}).get("status", "") if record else "deleted"
+    if signature != state["doc_signature"]:
+        state["doc_signature"] = signature
+        _bump(key, state)
+        queue_stats.invalidate()
+
+
+def _poll_once():
+    """Check the files of all watched jobs, and their records without a change stream."""
+    with _lock:
+        keys = list(_jobs)
+    if not keys:
+        return
+
+    records = {}
+    if not _change_stream_active.is_set():
+        query = {"$or": [{"session_id": session_id, "job_name": job_name} for session_id, job_name in keys]}
+        try:
+            for record in find_records(query, _WATCH_PROJECTION, with_id=True):
+                records[(record.get("session_id"), record.get("job_name"))] = record
+        except PyMongoError as exc:
+            LOGGER.warning(f"Job watcher poll failed: {exc}")
+            records = None
+
+    file_signatures = {key: _file_signature(*key) for key in keys}
+    with _lock:
+        for key in keys:
+            state = _jobs.get(key)
+            if state is None:
+                continue
+            if records is not None and not _change_stream_active.is_set():
+                _apply_record(key, records.get(key))
+            if file_signatures[key] != state["file_signature"]:
+                state["file_signature"] = file_signatures[key]
+                _bump(key, state)
+
+
+def _poll_loop():
+    while True:
+        try:
+            _poll_once()
+        except Exception as exc:
+            LOGGER.warning(f"Job watcher error: {exc}")
+        time.sleep(WATCH_INTERVAL_SECONDS)
+
+
+def _change_stream_loop():
+    """Follow `input_queue` changes; give up (and leave polling on) if unsupported."""
+    pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace", "delete"]}}}]
+    while True:
+        try:
+            with watch_records(pipeline, full_document="updateLookup") as stream:
+                _change_stream_active.set()
+                LOGGER.info("Job watcher: following MongoDB change stream")
+                for change in stream:
+                    _handle_change(change)
+        except PyMongoError as exc:
+            was_active = _change_stream_active.is_set()
+            _change_stream_active.clear()
+            if not was_active:
+                LOGGER.info(f"Job watcher: change streams unavailable ({exc}); polling every {WATCH_INTERVAL_SECONDS}s")
+                return
+            LOGGER.warning(f"Job watcher: change stream interrupted ({exc}); reconnecting")
+            time.sleep(WATCH_INTERVAL_SECONDS)
+
+
+def _handle_change(change):
+    queue_stats.invalidate()
+    with _lock:
+        if change.get("operationType") == "delete":
+            object_id = (change.get("documentKey") or {}).get("_id")
+            for key, state in _jobs.items():
+                if object_id is not None and state["object_id"] == object_id:
+                    _apply_record(key, None)
+            return
+        record = change.get("fullDocument") or {}
+        key = (record.get("session_id"), record.get("job_name"))
+        if key in _jobs:
+            _apply_record(key, record)
+
+
+def _ensure_started():
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+    threading.Thread(target=_change_stream_loop, name="job-watcher-stream", daemon=True).start()
+    threading.Thread(target=_poll_loop, name="job-watcher-poll", daemon=True).start()
+
+
+def _subscribe(key, loop, event):
+    with _lock:
+        state = _jobs.setdefault(key, _job_state())
+        state["waiters"].add((loop, event))
+        new_job = state["doc_signature"] is None and state["object_id"] is None
+    if new_job:
+        # Prime the signatures so the first change is measured against the current state.
+        try:
+            record = find_record(key[0], key[1], _WATCH_PROJECTION, with_id=True)
+        except PyMongoError:
+            record = None
+        with _lock:
+            state["doc_signature"] = _doc_signature(record)
+            state["object_id"] = (record or {}).get("_id")
+            state["status"] = (record or {}).get("status", "")
+            state["file_signature"] = _file_signature(*key)
+    return state
+
+
+def _unsubscribe(key, loop, event):
+    with _lock:
+        state = _jobs.get(key)
+        if state is None:
+            return
+        state["waiters"].discard((loop, event))
+        if not state["waiters"]:
+            _jobs.pop(key, None)
+
+
+def refresh_interval(job_status, estimate, now=None):
+    """Return how long (seconds) a viewer may go without a clock refresh.
+
+    Inputs:
+    - job_status: job status string.
+    - estimate: the job's estimate from `queue_eta.estimate_job`, or None.
+    - now: current epoch seconds (defaults to `time.time()`).
+
+    Output:
+    - `REFRESH_ETA_FRACTION` of the time until the job's next milestone (its
+      start while pending, its finish while processing), clamped to
+      [`REFRESH_MIN_SECONDS`, `REFRESH_MAX_SECONDS`]. `REFRESH_MAX_SECONDS`
+      without an estimate or once the milestone has passed (the panel then
+      reads "soon" until a push arrives), and None for jobs that are not
+      active.
+    """
+    if job_status not in {"pending", "processing"}:
+        return None
+    if not estimate:
+        return REFRESH_MAX_SECONDS
+    now = time.time() if now is None else now
+    milestone = estimate["start"] if estimate["status"] == "pending" else estimate["finish"]
+    if milestone <= now:
+        return REFRESH_MAX_SECONDS
+    return min(max((milestone - now) * REFRESH_ETA_FRACTION, REFRESH_MIN_SECONDS), REFRESH_MAX_SECONDS)
+
+
+def _next_refresh(session_id, job_name, job_status):
+    return refresh_interval(job_status, estimate_job(session_id, job_name))
+
+
+async def watch_job(session_id, job_name, job_status):
+    """Yield a new revision string each time the job changes, and clock ticks in between.
+
+    Inputs:
+    - session_id: session identifier string.
+    - job_name: job name string.
+    - job_status: status shown on the page; finished jobs are not watched.
+
+    Output:
+    - Async generator of `(revision, tick)` pairs bound to two hidden
+      components: a revision string when the job changed (the page refreshes)
+      or a tick string when only the clock moved (the status panel
+      refreshes), the other being a no-op update. It stops once the job is
+      finished or removed.
+    """
+    if not session_id or not job_name or job_status not in {"pending", "processing"}:
+        return
+
+    _ensure_started()
+    key = (session_id, job_name)
+    loop = asyncio.get_running_loop()
+    event = asyncio.Event()
+    state = await asyncio.to_thread(_subscribe, key, loop, event)
+    seen = state["revision"]
+    status = state["status"] or job_status
+    ticks = 0
+    try:
+        while True:
+            timeout = await asyncio.to_thread(_next_refresh, session_id, job_name, status)
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+            except asyncio.TimeoutError:
+                ticks += 1
+                yield gr.update(), f"{session_id}/{job_name}~{ticks}"
+                continue
+            event.clear()
+            with _lock:
+                revision = state["revision"]
+                status = state["status"]
+            if revision == seen:
+                continue
+            seen = revision
+            yield f"{session_id}/{job_name}#{revision}", gr.update()
+            if status in {"finished", "deleted"}:
+                return
+    finally:
+        _unsubscribe(key, loop, event)
+
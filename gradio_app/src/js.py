@@ -1,4 +1,8 @@
-import os 
+import os
+import string
+import threading
+
+from .assets import rewrite_asset_urls
 from .logger import LOGGER
 
 direct2url_refresh = """
@@ -275,13 +279,53 @@ if (!element.dataset.popupModalBound) {
 }
 """
 
+_TEMPLATES = {}  # filepath -> {"mtime": ns, "text": str, "fields": frozenset or None}
+_TEMPLATE_LOCK = threading.Lock()
+
+
+def _template_fields(text):
+    """Return the `{placeholder}` names of a template, or None if it is not a format string."""
+    try:
+        return frozenset(name.split(".")[0].split("[")[0] for _, name, _, _ in string.Formatter().parse(text) if name)
+    except ValueError:
+        return None
+
+
+def load_template(filepath):
+    """Return the cached template entry for `filepath`, reloading it when its mtime changes.
+
+    Output:
+    - Dict with `mtime`, `text` and `fields` (placeholder names, or None when
+      the file contains braces that are not placeholders), or None if the file
+      does not exist.
+    """
+    try:
+        mtime = os.stat(filepath).st_mtime_ns
+    except OSError:
+        return None
+    entry = _TEMPLATES.get(filepath)
+    if entry is not None and entry["mtime"] == mtime:
+        return entry
+
+    with open(filepath, "r", encoding="utf-8") as f:
+        text = rewrite_asset_urls(f.read())
+    entry = {"mtime": mtime, "text": text, "fields": _template_fields(text)}
+    with _TEMPLATE_LOCK:
+        _TEMPLATES[filepath] = entry
+    return entry
+
+
 def build_html_text(filepath, **keys) -> str:
-    if not os.path.isfile(filepath):
+    entry = load_template(filepath)
+    if entry is None:
         LOGGER.warn(f"{filepath} is not a file")
         return ""
-    
-    with open(filepath, "r", encoding="utf-8") as f:
-        tpl = f.read()
+
     if not keys:
-        return tpl
-    return tpl.format(**keys)
+        return entry["text"]
+    fields = entry["fields"]
+    if fields is not None:
+        missing = fields.difference(keys)
+        if missing:
+            raise KeyError(f"{os.path.basename(filepath)} is missing placeholder(s): {', '.join(sorted(missing))}")
+    return entry["text"].format(**keys)
@@ -0,0 +1,59 @@
+"""Gradio apps built on their first request instead of at startup.
+
+`gr.mount_gradio_app` needs a finished `gr.Blocks`, so every page used to be
+built (and its Gradio app created) while `main.py` was imported. Rarely
+visited pages (QA, tutorial, licence, jobs) are mounted through
+`mount_lazy_gradio_app` instead: a small ASGI app takes the page's path, and
+the first request to it builds the Blocks, mounts it on a private FastAPI app
+and starts its lifespan (Gradio's queue); later requests go straight to it.
+"""
+
+import asyncio
+import contextlib
+
+import gradio as gr
+from fastapi import FastAPI
+
+from .logger import LOGGER
+
+
+class LazyGradioApp:
+    """ASGI app that builds and mounts a Gradio page on its first request."""
+
+    def __init__(self, build_page, mount_kwargs):
+        self.build_page = build_page
+        self.mount_kwargs = mount_kwargs
+        self.app = None
+        self._lock = asyncio.Lock()
+        self._lifespan = contextlib.AsyncExitStack()
+
+    async def _build(self):
+        async with self._lock:
+            if self.app is None:
+                app = gr.mount_gradio_app(FastAPI(), self.build_page(), path="/", **self.mount_kwargs)
+                await self._lifespan.enter_async_context(app.router.lifespan_context(app))
+                LOGGER.info(f"Built lazy page {self.mount_kwargs.get('root_path') or self.build_page.__name__}")
+                self.app = app
+        return self.app
+
+    async def __call__(self, scope, receive, send):
+        app = self.app or await self._build()
+        await app(scope, receive, send)
+
+    async def close(self):
+        await self._lifespan.aclose()
+
+
+def mount_lazy_gradio_app(app, build_page, path, **mount_kwargs):
+    """Mount `build_page()` at `path`, building it on the first request.
+
+    Inputs:
+    - app: the FastAPI app.
+    - build_page: function returning the page's `gr.Blocks`.
+    - path: mount path.
+    - mount_kwargs: `gr.mount_gradio_app` options (css, allowed_paths, root_path, ...).
+    """
+    lazy_app = LazyGradioApp(build_page, mount_kwargs)
+    app.mount(path, lazy_app)
+    app.router.on_shutdown.append(lazy_app.close)
+    return app
@@ -0,0 +1,165 @@
+"""Per-job artifact manifest: the one place readers learn what a job folder holds.
+
+The worker's post-finish pipeline (worker/postprocess.py) writes, in each
+finished job folder, a column-wise predictions file, WebP SHAP variants and a
+`manifest.json` listing every file of the folder with its size, mtime and
+content hash:
+
+    {"created": ..., "predictions": ..., "shap_images": [...], ...,
+     "files": {"<relative path>": {"size": ..., "mtime": ..., "hash": ...}}}
+
+On the shared jobs volume each `exists`/`listdir`/`stat` is a network round
+trip, so readers ask this module instead (`file_entry`, `has_file`,
+`list_dir`): the manifest is cached per job folder and validated with a single
+stat of `manifest.json`. Files the web app derives later (e.g. SHAP variants
+built on demand) are added with `record_files`, so the manifest stays complete.
+
+Jobs finished before the pipeline existed, or still running or being
+post-processed, have no manifest; the same helpers then fall back to probing
+the filesystem, and callers compute missing outputs themselves.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+MANIFEST_NAME = "manifest.json"
+MAX_CACHED_MANIFESTS = 512
+HASH_CHUNK_SIZE = 1 << 16
+
+_lock = threading.Lock()
+_write_lock = threading.Lock()
+_manifests = OrderedDict()  # job folder -> (signature, manifest)
+
+
+def manifest_signature(job_folder):
+    """Return (mtime_ns, size) of the job's manifest, or None without one."""
+    try:
+        stat = os.stat(os.path.join(job_folder, MANIFEST_NAME))
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def read_manifest(job_folder):
+    """Return the job's manifest dict (shared, read-only), or {} without one."""
+    signature = manifest_signature(job_folder) if job_folder else None
+    if signature is None:
+        return {}
+    with _lock:
+        cached = _manifests.get(job_folder)
+        if cached is not None and cached[0] == signature:
+            _manifests.move_to_end(job_folder)
+            return cached[1]
+    try:
+        with open(os.path.join(job_folder, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    _cache(job_folder, signature, manifest)
+    return manifest
+
+
+def _cache(job_folder, signature, manifest):
+    with _lock:
+        _manifests[job_folder] = (signature, manifest)
+        _manifests.move_to_end(job_folder)
+        while len(_manifests) > MAX_CACHED_MANIFESTS:
+            _manifests.popitem(last=False)
+
+
+def file_hash(path):
+    """Hex content hash of a file, as stored in manifests."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_entry(job_folder, relpath):
+    """Return `{size, mtime[, hash]}` of a file in the job folder, or None if it does not exist.
+
+    Inputs:
+    - job_folder: job directory.
+    - relpath: path relative to the job folder, with '/' separators.
+
+    Output:
+    - The manifest entry when the job has a manifest (no other filesystem
+      access), otherwise size and mtime from `os.stat` (no hash).
+    """
+    manifest = read_manifest(job_folder)
+    if manifest.get("files") is not None:
+        return manifest["files"].get(relpath)
+    try:
+        stat = os.stat(os.path.join(job_folder, relpath))
+    except OSError:
+        return None
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def has_file(job_folder, relpath):
+    """Return True if the job folder holds the file or directory `relpath`."""
+    manifest = read_manifest(job_folder)
+    if manifest.get("files") is not None:
+        prefix = relpath.rstrip("/") + "/"
+        return relpath in manifest["files"] or any(name.startswith(prefix) for name in manifest["files"])
+    return os.path.exists(os.path.join(job_folder, relpath))
+
+
+def list_dir(job_folder, relpath):
+    """Return the sorted names of the files directly inside `relpath` ([] if it does not exist)."""
+    manifest = read_manifest(job_folder)
+    if manifest.get("files") is not None:
+        prefix = relpath.rstrip("/") + "/"
+        return sorted(name[len(prefix):] for name in manifest["files"] if name.startswith(prefix) and "/" not in name[len(prefix):])
+    try:
+        return sorted(entry.name for entry in os.scandir(os.path.join(job_folder, relpath)) if entry.is_file())
+    except OSError:
+        return []
+
+
+def artifact_path(job_folder, manifest, key):
+    """Return the absolute path of a built artifact (`predictions`, `shap_derivatives`, ...) if the manifest lists it."""
+    name = manifest.get(key)
+    if not name:
+        return None
+    return os.path.join(job_folder, name) if has_file(job_folder, name) else None
+
+
+def record_files(job_folder, relpaths):
+    """Add (or refresh) files written after the worker's manifest to it.
+
+    Jobs without a manifest are left alone: the worker writes the first one
+    once the job is post-processed, and readers probe the folder until then.
+    """
+    with _write_lock:
+        manifest = read_manifest(job_folder)
+        if manifest.get("files") is None:
+            return
+        files = dict(manifest["files"])
+        for relpath in relpaths:
+            path = os.path.join(job_folder, relpath)
+            try:
+                stat = os.stat(path)
+                files[relpath] = {"size": stat.st_size, "mtime": stat.st_mtime, "hash": file_hash(path)}
+            except OSError:
+                files.pop(relpath, None)
+        updated = {**manifest, "files": dict(sorted(files.items()))}
+
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=job_folder)
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(updated, f, indent=1)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, os.path.join(job_folder, MANIFEST_NAME))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        signature = manifest_signature(job_folder)
+        if signature is not None:
+            _cache(job_folder, signature, updated)
@@ -1,12 +1,136 @@
-from copy import deepcopy
+"""Data access layer for the Gradio app's MongoDB collection.
+
+Every module reads and writes job records through the functions below; none
+of them creates its own client or touches the collection directly. This
+keeps one connection pool for the whole process (sized by the
+`MONGODB_*_POOL_SIZE` settings) and makes every read project out `_id`
+unless the caller asks for it.
+
+Nothing here deep-copies documents. pymongo decodes a fresh dict for every
+result, so `_id` is dropped by the projection (or popped in place), and update
+documents reference the caller's values directly (pymongo only reads them).
+Listings that need a few fields per job use `find_job_records`, which fetches
+only `JobRecord.FIELDS` and returns `__slots__` records instead of dicts
+holding the SAV lists (see `scripts/bench_mongodb_records.py`).
+
+`QueryListener` is registered on the client as a command listener: it times
+each command, aggregates the latencies per call site (the first frame
+outside pymongo and this module) and logs commands slower than
+`MONGODB_SLOW_QUERY_MS`. `query_stats` returns the aggregates
+(served at `/{MOUNT_POINT}/stats/mongodb`).
+"""
+
+import os
+import sys
+import threading
+
+import bson
+import pymongo
+from pymongo import MongoClient, monitoring
+
+from .logger import LOGGER
+from .settings import (
+    MONGODB_MAX_IDLE_MS, MONGODB_MAX_POOL_SIZE, MONGODB_MIN_POOL_SIZE,
+    MONGODB_SLOW_QUERY_MS, MONGODB_TIMEOUT_MS, MONGODB_URI,
+)
 
-from pymongo import MongoClient
-
-MONGODB_URI = "mongodb://mongodb:27017/"
 DATABASE_NAME = "app_db"
 COLLECTION_NAME = "input_queue"
 
-client = MongoClient(MONGODB_URI)
+_SKIPPED_DIRS = tuple(os.path.dirname(module.__file__) + os.sep for module in (pymongo, bson))
+
+
+def _call_site():
+    """Return `file.py:function:line` of the first caller outside pymongo and this module."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename != __file__ and not filename.startswith(_SKIPPED_DIRS) and not filename.startswith("<frozen"):
+            return f"{os.path.basename(filename)}:{frame.f_code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class QueryListener(monitoring.CommandListener):
+    """Record command latency per call site and log slow commands."""
+
+    def __init__(self, slow_ms=MONGODB_SLOW_QUERY_MS):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._pending = {}  # (connection id, request id) -> (call site, opens change stream, stream cursor id)
+        # Cursors of open change streams: their getMore waits for events by
+        # design, so its latency is recorded but never reported as slow.
+        self._change_stream_cursors = set()
+        self._stats = {}  # (call site, command) -> {count, failures, total_ms, max_ms}
+
+    def started(self, event):
+        site = _call_site()
+        command = event.command
+        opens_stream = event.command_name == "aggregate" and any("$changeStream" in stage for stage in command.get("pipeline", ()))
+        with self._lock:
+            stream_cursor = command.get("getMore") if event.command_name == "getMore" else None
+            if stream_cursor not in self._change_stream_cursors:
+                stream_cursor = None
+            if event.command_name == "killCursors":
+                self._change_stream_cursors.difference_update(command.get("cursors", ()))
+            self._pending[(event.connection_id, event.request_id)] = (site, opens_stream, stream_cursor)
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+    def _finish(self, event, failed):
+        elapsed_ms = event.duration_micros / 1000
+        cursor_id = None if failed else event.reply.get("cursor", {}).get("id")
+        with self._lock:
+            site, opens_stream, stream_cursor = self._pending.pop((event.connection_id, event.request_id), ("unknown", False, None))
+            if opens_stream and cursor_id:
+                self._change_stream_cursors.add(cursor_id)
+            elif stream_cursor is not None and not cursor_id:
+                # The server closed the stream's cursor (failure or invalidate).
+                self._change_stream_cursors.discard(stream_cursor)
+            stats = self._stats.setdefault(
+                (site, event.command_name), {"count": 0, "failures": 0, "total_ms": 0.0, "max_ms": 0.0}
+            )
+            stats["count"] += 1
+            stats["failures"] += failed
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        if failed:
+            LOGGER.warning(f"MongoDB {event.command_name} failed after {elapsed_ms:.1f} ms at {site}: {event.failure}")
+        elif elapsed_ms >= self.slow_ms and stream_cursor is None:
+            LOGGER.warning(f"Slow MongoDB {event.command_name} ({elapsed_ms:.1f} ms) at {site}")
+
+    def stats(self):
+        """Return the per-call-site latency table, slowest total first."""
+        with self._lock:
+            rows = [
+                {
+                    "site": site,
+                    "command": command,
+                    "count": stats["count"],
+                    "failures": stats["failures"],
+                    "total_ms": round(stats["total_ms"], 3),
+                    "mean_ms": round(stats["total_ms"] / stats["count"], 3),
+                    "max_ms": round(stats["max_ms"], 3),
+                }
+                for (site, command), stats in self._stats.items()
+            ]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+
+query_listener = QueryListener()
+client = MongoClient(
+    MONGODB_URI,
+    maxPoolSize=MONGODB_MAX_POOL_SIZE,
+    minPoolSize=MONGODB_MIN_POOL_SIZE,
+    maxIdleTimeMS=MONGODB_MAX_IDLE_MS,
+    serverSelectionTimeoutMS=MONGODB_TIMEOUT_MS,
+    connectTimeoutMS=MONGODB_TIMEOUT_MS,
+    event_listeners=[query_listener],
+)
 db = client[DATABASE_NAME]
 collections = db[COLLECTION_NAME]
 
@@ -20,36 +144,119 @@ def get_collection():
     return collections
 
 
+def query_stats():
+    """Return the connection pool settings and per-call-site command latencies.
+
+    Output:
+    - dict with `pool` options, `slow_query_ms` and the `queries` table.
+    """
+    return {
+        "pool": {"max_size": MONGODB_MAX_POOL_SIZE, "min_size": MONGODB_MIN_POOL_SIZE, "max_idle_ms": MONGODB_MAX_IDLE_MS},
+        "slow_query_ms": query_listener.slow_ms,
+        "queries": query_listener.stats(),
+    }
+
+
+def _projection(projection, with_id=False):
+    """Return `projection` with `_id` excluded unless requested.
+
+    Inputs:
+    - projection: MongoDB projection dict or None.
+    - with_id: keep `_id` in the results (e.g. to match change-stream keys).
+
+    Output:
+    - Projection dict, or None for whole documents with `_id`.
+    """
+    if with_id or (projection and "_id" in projection):
+        return projection
+    return {**(projection or {}), "_id": 0}
+
+
 def _clean_record(record):
-    """Return a copy of a MongoDB record without the internal `_id` field.
+    """Drop the internal `_id` field from a freshly decoded MongoDB record.
 
     Input:
-    - record: MongoDB document dict or None.
+    - record: MongoDB document dict or None (modified in place).
 
     Output:
-    - Cleaned dict without `_id`, or None if record is missing.
+    - The dict without `_id`, or None if record is missing.
     """
-    if record is None:
-        return None
-    record_udt = deepcopy(record)
-    record_udt.pop("_id", None)
-    return record_udt
+    if record is not None:
+        record.pop("_id", None)
+    return record
 
 
-def find_record(session_id, job_name, projection=None):
+class JobRecord:
+    """Summary of one job record for listings that do not need its SAV lists.
+
+    `find_job_records` fetches only `FIELDS` and wraps each decoded document
+    without copying it. `get` mirrors `dict.get` (fields missing from the
+    document read as `default`), so helpers written for record dicts accept
+    either; `to_dict` converts back.
+    """
+
+    FIELDS = (
+        "session_id", "job_name", "mode", "status", "IP", "geo_info", "city", "region", "country", "continent",
+        "submitted_at", "created_at", "job_start", "job_end", "timestamp", "time", "rev",
+    )
+    PROJECTION = {"_id": 0, **{field: 1 for field in FIELDS}}
+    __slots__ = FIELDS
+
+    @classmethod
+    def from_document(cls, document):
+        """Build a record from a MongoDB document dict."""
+        record = cls.__new__(cls)
+        for field in cls.FIELDS:
+            setattr(record, field, document.get(field))
+        return record
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in self.FIELDS else None
+        return default if value is None else value
+
+    def to_dict(self):
+        """Return the fields present in the document as a plain dict."""
+        return {field: getattr(self, field) for field in self.FIELDS if getattr(self, field) is not None}
+
+    def __repr__(self):
+        return f"JobRecord({self.session_id!r}, {self.job_name!r}, status={self.status!r})"
+
+
+def find_record(session_id, job_name, projection=None, with_id=False):
     """Find one unique job record by `session_id` and `job_name`.
 
     Inputs:
     - session_id: session identifier string.
     - job_name: job name string.
     - projection: optional MongoDB projection dict.
+    - with_id: keep the MongoDB `_id` field.
 
     Output:
     - Cleaned record dict, or None if no match is found.
     """
     query = {"session_id": session_id, "job_name": job_name}
-    record = collections.find_one(query, projection)
-    return _clean_record(record)
+    record = collections.find_one(query, _projection(projection, with_id))
+    return record if with_id else _clean_record(record)
+
+
+def find_revision(session_id, job_name):
+    """Return the `rev` counter of one job record.
+
+    Every writer of a job record increments `rev`, so an unchanged value
+    means the record has not changed.
+
+    Inputs:
+    - session_id: session identifier string.
+    - job_name: job name string.
+
+    Output:
+    - Integer revision (0 for records written before `rev` existed), or None
+      if the job does not exist.
+    """
+    record = collections.find_one({"session_id": session_id, "job_name": job_name}, {"_id": 0, "rev": 1})
+    if record is None:
+        return None
+    return record.get("rev", 0)
 
 
 def find_created_record(session_id, projection=None):
@@ -63,7 +270,7 @@ def find_created_record(session_id, projection=None):
     - Cleaned created-record dict, or None if it does not exist.
     """
     query = {"session_id": session_id, "status": "created"}
-    record = collections.find_one(query, projection)
+    record = collections.find_one(query, _projection(projection))
     return _clean_record(record)
 
 
@@ -78,13 +285,13 @@ def find_records_by_session(session_id, projection=None, sort_by=None):
     Output:
     - List of cleaned record dicts.
     """
-    cursor = collections.find({"session_id": session_id}, projection)
+    cursor = collections.find({"session_id": session_id}, _projection(projection))
     if sort_by:
         cursor = cursor.sort(sort_by)
     return [_clean_record(record) for record in cursor]
 
 
-def find_records(query, projection=None, sort_by=None, limit=None):
+def find_records(query, projection=None, sort_by=None, limit=None, with_id=False):
     """Run a general record search against the input queue collection.
 
     Inputs:
@@ -92,18 +299,65 @@ def find_records(query, projection=None, sort_by=None, limit=None):
     - projection: optional MongoDB projection dict.
     - sort_by: optional list of `(field, direction)` tuples for sorting.
     - limit: optional integer to limit returned records.
+    - with_id: keep the MongoDB `_id` field.
 
     Output:
     - List of cleaned record dicts.
     """
-    cursor = collections.find(query, projection)
+    cursor = collections.find(query, _projection(projection, with_id))
     if sort_by:
         cursor = cursor.sort(sort_by)
     if limit is not None:
         cursor = cursor.limit(limit)
+    if with_id:
+        return list(cursor)
     return [_clean_record(record) for record in cursor]
 
 
+def find_job_records(query, sort_by=None, limit=None):
+    """Find job summaries (`JobRecord.FIELDS` only) matching a query.
+
+    Inputs:
+    - query: MongoDB query dict.
+    - sort_by: optional list of `(field, direction)` tuples for sorting.
+    - limit: optional integer to limit returned records.
+
+    Output:
+    - List of `JobRecord`.
+    """
+    cursor = collections.find(query, JobRecord.PROJECTION)
+    if sort_by:
+        cursor = cursor.sort(sort_by)
+    if limit is not None:
+        cursor = cursor.limit(limit)
+    return [JobRecord.from_document(document) for document in cursor]
+
+
+def session_exists(session_id):
+    """Return True if any record belongs to `session_id`.
+
+    Input:
+    - session_id: session identifier string.
+
+    Output:
+    - Boolean, from one indexed `find_one` instead of listing every session id.
+    """
+    return collections.find_one({"session_id": session_id}, {"_id": 1}) is not None
+
+
+def watch_records(pipeline, **kwargs):
+    """Open a change stream on the job collection.
+
+    Inputs:
+    - pipeline: list of aggregation stages filtering the change events.
+    - kwargs: `Collection.watch` options (`full_document`, `resume_after`, ...).
+
+    Output:
+    - pymongo change stream (use as a context manager).
+    """
+    return collections.watch(pipeline, **kwargs)
+
+
 def list_session_ids(query=None):
     """List distinct session ids.
 
@@ -117,12 +371,13 @@ def list_session_ids(query=None):
     return sorted(value for value in values if value)
 
 
-def list_session_job_names(session_id, statuses=None):
+def list_session_job_names(session_id, statuses=None, modes=None):
     """List distinct job names for one session.
 
     Inputs:
     - session_id: session identifier string.
     - statuses: optional list of status strings to filter jobs.
+    - modes: optional list of modes to filter jobs.
 
     Output:
     - Sorted list of distinct job names.
@@ -130,6 +385,8 @@ def list_session_job_names(session_id, statuses=None):
     query = {"session_id": session_id}
     if statuses:
         query["status"] = {"$in": list(statuses)}
+    if modes:
+        query["mode"] = {"$in": list(modes)}
     values = collections.distinct("job_name", query)
     return sorted(value for value in values if value)
 
@@ -156,12 +413,13 @@ def insert_record(record):
     """Insert one record into MongoDB.
 
     Input:
-    - record: dict to insert.
+    - record: dict to insert (not modified).
 
     Output:
     - The inserted MongoDB object id.
     """
-    result = collections.insert_one(deepcopy(record))
+    # insert_one adds `_id` to the dict it is given; a shallow copy keeps it off the caller's.
+    result = collections.insert_one(dict(record))
     return result.inserted_id
 
 
@@ -170,15 +428,15 @@ def upsert_record(query, values, set_on_insert=None):
 
     Inputs:
     - query: MongoDB query dict.
-    - values: dict assigned through `$set`.
+    - values: dict assigned through `$set` (may be empty with `set_on_insert`).
     - set_on_insert: optional dict assigned through `$setOnInsert`.
 
     Output:
     - pymongo update result object.
     """
-    update_doc = {"$set": deepcopy(values or {})}
+    update_doc = {"$set": values or {}} if values or not set_on_insert else {}
     if set_on_insert:
-        update_doc["$setOnInsert"] = deepcopy(set_on_insert)
+        update_doc["$setOnInsert"] = set_on_insert
     return collections.update_one(query, update_doc, upsert=True)
 
 
@@ -192,9 +450,7 @@ def upsert_session_created_record(session_id, values=None):
     Output:
     - pymongo update result object.
     """
-    values_udt = {"session_id": session_id, "status": "created"}
-    if values:
-        values_udt.update(deepcopy(values))
+    values_udt = {"session_id": session_id, "status": "created", **(values or {})}
     return collections.update_one(
         {"session_id": session_id, "status": "created"},
         {"$set": values_udt},
@@ -216,25 +472,26 @@ def upsert_job_record(record):
     if not session_id or not job_name:
         raise ValueError("record must contain both 'session_id' and 'job_name'")
 
-    record_udt = deepcopy(record)
-    record_udt.pop("_id", None)
+    record_udt = {key: value for key, value in record.items() if key not in ("_id", "rev")}
     query = {"session_id": session_id, "job_name": job_name}
-    return collections.update_one(query, {"$set": record_udt}, upsert=True)
+    return collections.update_one(query, {"$set": record_udt, "$inc": {"rev": 1}}, upsert=True)
 
 
-def update_record(session_id, job_name, values):
+def update_record(session_id, job_name, values, where=None):
     """Update one job record by `session_id` and `job_name`.
 
     Inputs:
     - session_id: session identifier string.
     - job_name: job name string.
     - values: dict of fields to update.
+    - where: optional extra filter; the record (and its `rev`) is left alone
+      unless it matches.
 
     Output:
     - pymongo update result object.
     """
-    query = {"session_id": session_id, "job_name": job_name}
-    return collections.update_one(query, {"$set": deepcopy(values or {})})
+    query = {**(where or {}), "session_id": session_id, "job_name": job_name}
+    return collections.update_one(query, {"$set": values or {}, "$inc": {"rev": 1}})
 
 
 def update_records(query, values):
@@ -247,7 +504,7 @@ def update_records(query, values):
     Output:
     - pymongo update-many result object.
     """
-    return collections.update_many(query, {"$set": deepcopy(values or {})})
+    return collections.update_many(query, {"$set": values or {}})
 
 
 def remove_record(session_id, job_name):
@@ -298,3 +555,49 @@ def count_records(query=None):
     - Integer count.
     """
     return collections.count_documents(query or {})
+
+
+def aggregate_records(pipeline):
+    """Run an aggregation pipeline on the job collection.
+
+    Input:
+    - pipeline: list of MongoDB aggregation stages.
+
+    Output:
+    - List of result documents.
+    """
+    return list(collections.aggregate(pipeline))
+
+
+class RequestReads:
+    """Memoize MongoDB reads for the duration of one request handler.
+
+    A page-load handler creates one instance and passes it to the helpers it
+    calls, so a job record or session lookup needed by several of them is
+    fetched once. `count` is the number of reads that reached MongoDB.
+    """
+
+    def __init__(self):
+        self._cache = {}
+        self.count = 0
+
+    def _memo(self, key, fetch):
+        if key not in self._cache:
+            self._cache[key] = fetch()
+            self.count += 1
+        return self._cache[key]
+
+    def find_record(self, session_id, job_name):
+        """Memoized `find_record`; callers must not modify the returned dict."""
+        return self._memo(("record", session_id, job_name), lambda: find_record(session_id, job_name))
+
+    def session_exists(self, session_id):
+        """Return True if any record belongs to `session_id`."""
+        return self._memo(
+            ("session", session_id),
+            lambda: session_exists(session_id),
+        )
+
+    def distinct(self, field, query):
+        """Memoized `distinct(field, query)`."""
+        return self._memo(("distinct", field, repr(query)), lambda: collections.distinct(field, query))
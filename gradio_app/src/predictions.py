@@ -0,0 +1,291 @@
+"""Memory-mapped, column-wise predictions store with server-side paging.
+
+A finished job's predictions are converted once into `predictions_store/` in
+the job folder: one `.npy` file per column (numbers as int64/float64, text as
+fixed-width unicode, so every column can be memory-mapped) and a `meta.json`
+with the column names, the row count and the signature of the source it was
+built from. The source is the worker's `predictions.columns.json` when the
+manifest lists one, otherwise `Main_Predictions.txt` (see
+`read_predictions_csv`).
+
+`query_page` answers one table page: search (case-insensitive substring over
+the text columns), exact-match filters and sorting are computed with numpy on
+the mapped columns, the resulting row order is cached per query, and only the
+rows of the requested page are materialized and sent to the browser.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .manifest import artifact_path, file_entry, list_dir, read_manifest, record_files
+
+STORE_DIR = "predictions_store"
+META_RELPATH = f"{STORE_DIR}/meta.json"
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+MAX_OPEN_STORES = 64
+MAX_CACHED_ORDERS = 256
+MISSING_VALUE = "Not available"
+MISSING_VALUES = {MISSING_VALUE, ""}
+
+_lock = threading.Lock()
+_stores = OrderedDict()  # job folder -> store dict
+_orders = OrderedDict()  # (job folder, store version, query) -> row index array
+_build_locks = {}
+
+
+def read_predictions_csv(job_folder):
+    """Parse `Main_Predictions.txt`, keep the SAVs that have a prediction and number them from 1."""
+    df_pred = pd.read_csv(os.path.join(job_folder, "Main_Predictions.txt"))
+
+    prediction_cols = [col for col in df_pred.columns if col != "SAV"]
+    if prediction_cols:
+        predicted_mask = (df_pred[prediction_cols].astype(str).apply(lambda col: col.str.strip()) != "Not available").any(axis=1)
+        df_pred = df_pred[predicted_mask].copy()
+
+    # ---- Add index column FIRST ----
+    df_pred = df_pred.reset_index(drop=True)
+    df_pred.insert(0, "#", df_pred.index + 1)
+    return df_pred
+
+
+def _source(job_folder):
+    """Return (kind, path, signature) of the predictions source, or None without one."""
+    predictions_path = artifact_path(job_folder, read_manifest(job_folder), "predictions")
+    path = predictions_path or os.path.join(job_folder, "Main_Predictions.txt")
+    entry = file_entry(job_folder, os.path.relpath(path, job_folder))
+    if entry is None:
+        return None
+    return ("columns" if predictions_path else "csv"), path, [os.path.basename(path), entry["mtime"], entry["size"]]
+
+
+def _read_source(kind, path):
+    """Return (column names, list of column value lists) from the source file."""
+    if kind == "columns":
+        with open(path) as f:
+            stored = json.load(f)
+        return stored["columns"], stored["data"]
+
+    df_pred = read_predictions_csv(os.path.dirname(path))
+    return list(df_pred.columns), [df_pred[col].tolist() for col in df_pred.columns]
+
+
+def _to_array(values):
+    """Convert one column to a memory-mappable array (no object dtype).
+
+    A column of numbers where some rows read "Not available" (the SAV has
+    other predictions) becomes a float column with NaN for those rows, so it
+    sorts numerically; `query_page` shows NaN as "Not available" again.
+    """
+    array = np.asarray(values)
+    if array.dtype.kind in "iuf":
+        return array
+    try:
+        return np.asarray([np.nan if str(value).strip() in MISSING_VALUES else value for value in values], dtype=np.float64)
+    except (TypeError, ValueError):
+        return np.asarray([str(value) for value in values], dtype=str)
+
+
+def _page_values(array, selected):
+    values = np.asarray(array[selected])
+    if values.dtype.kind == "f" and np.isnan(values).any():
+        return [MISSING_VALUE if value != value else value for value in values.tolist()]
+    return values.tolist()
+
+
+def build_store(job_folder):
+    """(Re)build `predictions_store/` from the job's predictions source.
+
+    Output:
+    - True if a store was written, False when the job has no predictions.
+    """
+    source = _source(job_folder)
+    if source is None:
+        return False
+    kind, path, signature = source
+    columns, data = _read_source(kind, path)
+    stale = list_dir(job_folder, STORE_DIR)
+
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-store-", dir=job_folder)
+    try:
+        for index, values in enumerate(data):
+            np.save(os.path.join(tmp_dir, f"{index}.npy"), _to_array(values), allow_pickle=False)
+        with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+            json.dump({"columns": columns, "rows": len(data[0]) if data else 0, "source": signature}, f)
+        store_dir = os.path.join(job_folder, STORE_DIR)
+        if os.path.isdir(store_dir):
+            shutil.rmtree(store_dir, ignore_errors=True)
+        os.replace(tmp_dir, store_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    _record_store(job_folder, stale)
+    return True
+
+
+def _record_store(job_folder, stale=()):
+    """Add the store's files to the job's manifest, dropping files of a previous build."""
+    names = set(stale)
+    try:
+        names.update(os.listdir(os.path.join(job_folder, STORE_DIR)))
+    except OSError:
+        pass
+    record_files(job_folder, [f"{STORE_DIR}/{name}" for name in sorted(names)])
+
+
+def _meta_signature(job_folder):
+    """Signature of the store's meta.json: its manifest entry when listed, otherwise one stat."""
+    entry = file_entry(job_folder, META_RELPATH)
+    if entry is None and read_manifest(job_folder).get("files") is not None:
+        try:
+            stat = os.stat(os.path.join(job_folder, META_RELPATH))
+        except OSError:
+            return None
+        entry = {"size": stat.st_size, "mtime": stat.st_mtime}
+    if entry is None:
+        return None
+    return (entry["mtime"], entry["size"], entry.get("hash"))
+
+
+def _open(job_folder):
+    manifest_files = read_manifest(job_folder).get("files")
+    if manifest_files is not None and META_RELPATH not in manifest_files:
+        # Built before the job's manifest was written: list it now.
+        _record_store(job_folder)
+    with open(os.path.join(job_folder, STORE_DIR, "meta.json")) as f:
+        meta = json.load(f)
+    arrays = [np.load(os.path.join(job_folder, STORE_DIR, f"{index}.npy"), mmap_mode="r") for index in range(len(meta["columns"]))]
+    return {"version": _meta_signature(job_folder), "meta": meta, "columns": meta["columns"], "arrays": arrays, "rows": meta["rows"], "lowered": {}}
+
+
+def open_store(job_folder):
+    """Return the job's open predictions store, building it on first use.
+
+    Output:
+    - Dict with `columns`, `arrays` (memory-mapped, one per column), `rows`
+      and `version`, or None when the job has no predictions.
+    """
+    source = _source(job_folder)
+    if source is None:
+        return None
+    with _lock:
+        store = _stores.get(job_folder)
+        build_lock = _build_locks.setdefault(job_folder, threading.Lock())
+    if store is not None and store["version"] == _meta_signature(job_folder) and store["meta"]["source"] == source[2]:
+        with _lock:
+            _stores.move_to_end(job_folder)
+        return store
+
+    with build_lock:
+        try:
+            store = _open(job_folder) if _meta_signature(job_folder) else None
+        except (OSError, ValueError):
+            # Listed in the manifest but removed or partly written: rebuild it.
+            store = None
+        if store is None or store["meta"]["source"] != source[2]:
+            if not build_store(job_folder):
+                return None
+            store = _open(job_folder)
+    with _lock:
+        _stores[job_folder] = store
+        while len(_stores) > MAX_OPEN_STORES:
+            evicted, _ = _stores.popitem(last=False)
+            _build_locks.pop(evicted, None)
+    return store
+
+
+def _lowered(store, index):
+    """Lower-cased copy of a text column, computed once per open store."""
+    lowered = store["lowered"].get(index)
+    if lowered is None:
+        lowered = store["lowered"][index] = np.char.lower(np.asarray(store["arrays"][index]))
+    return lowered
+
+
+def _row_order(job_folder, store, sort, descending, search, filters):
+    key = (job_folder, store["version"], sort, descending, search, filters)
+    with _lock:
+        order = _orders.get(key)
+        if order is not None:
+            _orders.move_to_end(key)
+            return order
+
+    mask = np.ones(store["rows"], dtype=bool)
+    if search:
+        found = np.zeros(store["rows"], dtype=bool)
+        for index, array in enumerate(store["arrays"]):
+            if array.dtype.kind == "U":
+                found |= np.char.find(_lowered(store, index), search.lower()) >= 0
+        mask &= found
+    for column, value in filters:
+        if column not in store["columns"]:
+            continue
+        array = store["arrays"][store["columns"].index(column)]
+        if array.dtype.kind == "U":
+            mask &= array == str(value)
+        else:
+            try:
+                mask &= array == float(value)
+            except ValueError:
+                mask &= False
+
+    order = np.flatnonzero(mask)
+    if sort in store["columns"]:
+        keys = np.asarray(store["arrays"][store["columns"].index(sort)])[order]
+        if descending and keys.dtype.kind in "iuf":
+            order = order[np.argsort(-keys, kind="stable")]  # NaN ("Not available") stays last
+        else:
+            order = order[np.argsort(keys, kind="stable")]
+            if descending:
+                order = order[::-1]
+
+    with _lock:
+        _orders[key] = order
+        while len(_orders) > MAX_CACHED_ORDERS:
+            _orders.popitem(last=False)
+    return order
+
+
+def query_page(job_folder, page=1, page_size=PAGE_SIZE, sort=None, descending=False, search="", filters=None):
+    """Return one page of a job's predictions.
+
+    Inputs:
+    - job_folder: finished job directory.
+    - page: 1-based page number (clamped to the available pages).
+    - page_size: rows per page (at most `MAX_PAGE_SIZE`).
+    - sort: column to sort by, or None for file order.
+    - descending: sort direction.
+    - search: case-insensitive substring matched against the text columns.
+    - filters: dict `{column: value}` of exact matches.
+
+    Output:
+    - Dict with `columns`, `rows` (list of row lists for this page only),
+      `total` (matching rows), `page` and `pages`, or None without predictions.
+    """
+    store = open_store(job_folder)
+    if store is None:
+        return None
+    page_size = min(max(int(page_size or PAGE_SIZE), 1), MAX_PAGE_SIZE)
+    filters = tuple(sorted((filters or {}).items()))
+    order = _row_order(job_folder, store, sort or None, bool(descending), (search or "").strip(), filters)
+
+    total = len(order)
+    pages = max((total + page_size - 1) // page_size, 1)
+    page = min(max(int(page or 1), 1), pages)
+    selected = order[(page - 1) * page_size:page * page_size]
+    columns = [_page_values(array, selected) for array in store["arrays"]]
+    return {"columns": store["columns"], "rows": [list(row) for row in zip(*columns)], "total": total, "page": page, "pages": pages}
+
+
+def column_values(job_folder, column):
+    """Return every value of one column (e.g. the predicted SAVs), or [] without predictions."""
+    store = open_store(job_folder)
+    if store is None or column not in store["columns"]:
+        return []
+    return np.asarray(store["arrays"][store["columns"].index(column)]).tolist()
@@ -0,0 +1,258 @@
+"""Queue position and ETA estimates for pending and processing jobs.
+
+The worker runs at most one job per tandem container and picks the next
+pending job with its `SCHEDULING_POLICY` (see worker/scheduling.py). This
+module replays the same policy, with the worker's own `select_job` and
+container pools, on a snapshot of the active queue, using the historical
+`job_start`/`job_end` durations of finished jobs (per mode and SAV-count
+bucket) as the cost of each job. One background thread rebuilds the snapshot
+every `ETA_REFRESH_SECONDS` and extends the duration history incrementally
+with jobs that finished since the last refresh; rendering only reads the
+snapshot and never queries MongoDB.
+"""
+
+import importlib.util
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from statistics import median
+
+from .logger import LOGGER
+from .mongodb import find_records
+from .settings import (
+    ETA_REFRESH_SECONDS, SCHEDULING_POLICY, TANDEM_SLOTS, TANDEM_URLS, TRAINING_POOL_SIZE, WORKER_DIR,
+)
+from .stage_model import predict_job_seconds
+
+DEFAULT_DURATION_SECONDS = 15 * 60
+HISTORY_PER_BUCKET = 200
+MIN_BUCKET_SAMPLES = 3
+SAV_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+_lock = threading.Lock()
+_history = defaultdict(lambda: deque(maxlen=HISTORY_PER_BUCKET))  # (mode, bucket) -> durations
+_history_cursor = 0.0  # largest `job_end` already folded into `_history`
+_estimates = {}  # (session_id, job_name) -> estimate dict
+_scheduling = None  # (pool_modes, select_job), loaded by the refresh thread
+_started = False
+
+_N_SAVS = {"$size": {"$ifNull": ["$SAV", []]}}
+
+
+def sav_bucket(n_savs):
+    """Return the index of the SAV-count bucket used to group durations."""
+    return bisect_left(SAV_BUCKETS, max(int(n_savs or 0), 1))
+
+
+def predict_duration(mode, n_savs):
+    """Predict the run time (seconds) of a job from finished-job history.
+
+    Inputs:
+    - mode: job mode, e.g. 'Inferencing' or 'Training'.
+    - n_savs: number of SAVs submitted with the job.
+
+    Output:
+    - Median duration of the closest populated bucket of the same mode, the
+      per-stage model prediction (see `stage_model`), the median of the whole
+      mode, or `DEFAULT_DURATION_SECONDS` without any history.
+    """
+    bucket = sav_bucket(n_savs)
+    candidates = sorted(
+        (abs(b - bucket), b) for (m, b), values in _history.items()
+        if m == mode and len(values) >= MIN_BUCKET_SAMPLES
+    )
+    if candidates:
+        return median(_history[(mode, candidates[0][1])])
+
+    predicted = predict_job_seconds(mode, {"n_savs": n_savs or 0})
+    if predicted:
+        return predicted
+
+    mode_values = [value for (m, _), values in _history.items() if m == mode for value in values]
+    if mode_values:
+        return median(mode_values)
+    return DEFAULT_DURATION_SECONDS
+
+
+def _refresh_history():
+    global _history_cursor
+    finished = find_records(
+        {"status": "finished", "job_start": {"$exists": True}, "job_end": {"$gt": _history_cursor}},
+        projection={"_id": 0, "mode": 1, "job_start": 1, "job_end": 1, "n_savs": _N_SAVS},
+        sort_by=[("job_end", 1)],
+    )
+    for record in finished:
+        job_start = record.get("job_start")
+        job_end = record.get("job_end")
+        if not isinstance(job_start, (int, float)) or not isinstance(job_end, (int, float)):
+            continue
+        if job_end > job_start:
+            _history[(record.get("mode"), sav_bucket(record.get("n_savs")))].append(job_end - job_start)
+        _history_cursor = max(_history_cursor, job_end)
+
+
+def _fifo_pool_modes(containers, training_pool_size):
+    return {container: None for container in containers}
+
+
+def _fifo_select_job(policy, pending, running, container_mode=None):
+    return pending[0] if pending else None
+
+
+def _load_scheduling():
+    """Return `(pool_modes, select_job)` from the worker's `scheduling.py`.
+
+    The worker and this module then make exactly the same choices. Without
+    the worker's code (e.g. `WORKER_DIR` not mounted) the estimates fall back
+    to FIFO.
+    """
+    path = os.path.join(WORKER_DIR, "scheduling.py")
+    try:
+        spec = importlib.util.spec_from_file_location("worker_scheduling", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    except (OSError, ImportError) as exc:
+        LOGGER.warning(f"Worker scheduling policies unavailable ({exc}); queue estimates assume FIFO")
+        return _fifo_pool_modes, _fifo_select_job
+    if SCHEDULING_POLICY not in module.POLICIES:
+        LOGGER.warning(f"Unknown SCHEDULING_POLICY {SCHEDULING_POLICY!r}; queue estimates assume FIFO")
+        return _fifo_pool_modes, _fifo_select_job
+    return module.pool_modes, module.select_job
+
+
+def _simulate_queue(now):
+    """Replay the worker's claims under `SCHEDULING_POLICY` over the active queue.
+
+    Each container runs one job at a time. Processing jobs occupy the
+    container they were dispatched to (`tandem_url`) until their predicted
+    finish; whenever containers free up, they pick pending jobs with the
+    worker's `select_job`, in container order like `fill_free_slots`.
+    Processing jobs beyond the number of containers get an estimate but no
+    extra capacity, and pending jobs no container would ever claim (e.g. an
+    empty `mode_pools` pool) get none.
+    """
+    pool_modes, select_job = _scheduling
+    active = find_records(
+        {"status": {"$in": ["pending", "processing"]}},
+        projection={"_id": 0, "session_id": 1, "job_name": 1, "status": 1, "mode": 1, "job_start": 1, "tandem_url": 1, "n_savs": _N_SAVS},
+        sort_by=[("_id", 1)],
+    )
+    containers = TANDEM_URLS or [f"tandem{index + 1}" for index in range(max(TANDEM_SLOTS, 1))]
+    modes = pool_modes(containers, TRAINING_POOL_SIZE)
+    free_at = {container: now for container in containers}
+    running = {}  # container -> job record
+    estimates = {}
+
+    processing = [record for record in active if record.get("status") == "processing"]
+    for record in processing:
+        job_start = record.get("job_start") or now
+        finish = max(job_start + predict_duration(record.get("mode"), record.get("n_savs")), now)
+        estimates[(record.get("session_id"), record.get("job_name"))] = {
+            "status": "processing", "position": 0, "start": job_start, "finish": finish,
+        }
+        container = record.get("tandem_url")
+        if container not in free_at or container in running:
+            idle = [c for c in containers if c not in running]
+            container = next((c for c in idle if modes[c] in (None, record.get("mode"))), idle[0] if idle else None)
+        if container is not None:
+            free_at[container] = finish
+            running[container] = record
+
+    pending = [record for record in active if record.get("status") == "pending"]
+    position = 0
+    while pending:
+        t = min(free_at.values())
+        for container in containers:
+            if free_at[container] <= t:
+                running.pop(container, None)
+        for container in containers:
+            if free_at[container] > t:
+                continue
+            job = select_job(SCHEDULING_POLICY, pending, list(running.values()), modes[container])
+            if job is None:
+                continue
+            pending.remove(job)
+            position += 1
+            finish = t + max(predict_duration(job.get("mode"), job.get("n_savs")), 1)
+            free_at[container] = finish
+            running[container] = job
+            estimates[(job.get("session_id"), job.get("job_name"))] = {
+                "status": "pending", "position": position, "start": t, "finish": finish,
+            }
+        later = [value for value in free_at.values() if value > t]
+        if not later:
+            break  # the remaining jobs can never be claimed
+        for container in containers:
+            if free_at[container] <= t:
+                free_at[container] = min(later)  # idle until the next container frees up
+    return estimates
+
+
+def refresh():
+    """Rebuild the estimates now; keep the previous ones if MongoDB fails."""
+    global _estimates, _scheduling
+    if _scheduling is None:
+        _scheduling = _load_scheduling()
+    try:
+        _refresh_history()
+        estimates = _simulate_queue(time.time())
+    except Exception as exc:
+        LOGGER.warning(f"Queue ETA refresh failed: {exc}")
+        return
+    _estimates = estimates
+
+
+def _refresh_loop():
+    while True:
+        refresh()
+        time.sleep(ETA_REFRESH_SECONDS)
+
+
+def _ensure_started():
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+    threading.Thread(target=_refresh_loop, name="queue-eta", daemon=True).start()
+
+
+def estimate_job(session_id, job_name):
+    """Return the job's estimate from the latest snapshot (no MongoDB access).
+
+    Output:
+    - Dict with `status`, `position` (1-based claim order, 0 while
+      processing), `start` and `finish` epoch seconds, or None when the job
+      is not queued (or before the first snapshot).
+    """
+    _ensure_started()
+    return _estimates.get((session_id, job_name))
+
+
+def format_duration(seconds):
+    """Format a positive number of seconds as a short human string."""
+    minutes = int(round(max(seconds, 0) / 60))
+    if minutes < 1:
+        return "<1 min"
+    if minutes < 60:
+        return f"{minutes} min"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours} h {minutes} min" if minutes else f"{hours} h"
+
+
+def format_estimate(estimate, now=None):
+    """Render an estimate dict from `estimate_job` for the status panel."""
+    if not estimate:
+        return "-"
+    now = time.time() if now is None else now
+    remaining = estimate["finish"] - now
+    if estimate["status"] == "processing":
+        if remaining <= 0:
+            return "finishing soon"
+        return f"~{format_duration(remaining)} remaining"
+
+    wait = estimate["start"] - now
+    starts = "starts soon" if wait <= 60 else f"starts in ~{format_duration(wait)}"
+    return f"#{estimate['position']} in queue, {starts}, done in ~{format_duration(remaining)}"
@@ -0,0 +1,99 @@
+"""Process-wide snapshot of the job queue counts shown on the status panel.
+
+One background thread rebuilds the snapshot with a single aggregation
+(grouped by status and mode) at most once every `QUEUE_STATS_REFRESH_SECONDS`.
+It refreshes sooner, but never more than once per `MIN_REFRESH_GAP_SECONDS`,
+after `invalidate()` is called by the job watcher on a change event. Rendering
+only reads the in-memory snapshot.
+"""
+
+import html
+import threading
+import time
+
+from .logger import LOGGER
+from .mongodb import aggregate_records
+from .settings import QUEUE_STATS_REFRESH_SECONDS
+
+ACTIVE_STATUSES = ("pending", "processing")
+MIN_REFRESH_GAP_SECONDS = 1
+
+_lock = threading.Lock()
+_dirty = threading.Event()
+_started = False
+_snapshot = {"counts": {status: 0 for status in ACTIVE_STATUSES}, "by_mode": {status: {} for status in ACTIVE_STATUSES}, "updated": 0.0}
+
+
+def _build_snapshot():
+    rows = aggregate_records([
+        {"$match": {"status": {"$in": list(ACTIVE_STATUSES)}}},
+        {"$group": {"_id": {"status": "$status", "mode": "$mode"}, "count": {"$sum": 1}}},
+    ])
+    counts = {status: 0 for status in ACTIVE_STATUSES}
+    by_mode = {status: {} for status in ACTIVE_STATUSES}
+    for row in rows:
+        status = row["_id"].get("status")
+        mode = row["_id"].get("mode") or "Unknown"
+        counts[status] += row["count"]
+        by_mode[status][mode] = by_mode[status].get(mode, 0) + row["count"]
+    return {"counts": counts, "by_mode": by_mode, "updated": time.time()}
+
+
+def refresh():
+    """Rebuild the snapshot now; keep the previous one if MongoDB fails."""
+    global _snapshot
+    try:
+        snapshot = _build_snapshot()
+    except Exception as exc:
+        LOGGER.warning(f"Queue stats refresh failed: {exc}")
+        return
+    with _lock:
+        _snapshot = snapshot
+
+
+def _refresh_loop():
+    while True:
+        time.sleep(MIN_REFRESH_GAP_SECONDS)
+        _dirty.wait(max(QUEUE_STATS_REFRESH_SECONDS - MIN_REFRESH_GAP_SECONDS, 0))
+        _dirty.clear()
+        refresh()
+
+
+def _ensure_started():
+    global _started
+    with _lock:
+        if _started:
+            return
+        _started = True
+    refresh()
+    threading.Thread(target=_refresh_loop, name="queue-stats", daemon=True).start()
+
+
+def invalidate():
+    """Ask for an early refresh after a job was queued, claimed or finished."""
+    _dirty.set()
+
+
+def get_snapshot():
+    """Return the current queue snapshot.
+
+    Output:
+    - Dict with `counts` ({status: n}), `by_mode` ({status: {mode: n}}) and
+      `updated` (epoch seconds) for the pending and processing statuses.
+    """
+    _ensure_started()
+    with _lock:
+        return _snapshot
+
+
+def count(status):
+    """Return the cached number of jobs with `status` ('pending' or 'processing')."""
+    return get_snapshot()["counts"].get(status, 0)
+
+
+def format_count(status):
+    """Render a cached count with its per-mode breakdown as a tooltip."""
+    snapshot = get_snapshot()
+    modes = snapshot["by_mode"].get(status, {})
+    title = ", ".join(f"{mode}: {n}" for mode, n in sorted(modes.items())) or "none"
+    return f'<span title="{html.escape(title, quote=True)}">{snapshot["counts"].get(status, 0)}</span>'
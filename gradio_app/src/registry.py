@@ -0,0 +1,30 @@
+"""Process-wide registry of shared, read-only resources.
+
+Pages and callbacks used to load these separately at import time (e.g.
+`examples.json` was parsed by the home, session and results modules). They
+are now loaded once per process, on first use, and shared. The MongoDB client
+is shared the same way through `mongodb`.
+"""
+
+import json
+import threading
+
+from .settings import EXAMPLES_JSON
+
+_lock = threading.Lock()
+_examples = None
+
+
+def get_examples():
+    """Return the example jobs from `examples.json` (shared, read-only).
+
+    Output:
+    - Dict `{example name: example entry}`.
+    """
+    global _examples
+    if _examples is None:
+        with _lock:
+            if _examples is None:
+                with open(EXAMPLES_JSON, "r", encoding="utf-8") as f:
+                    _examples = json.load(f)
+    return _examples
@@ -0,0 +1,75 @@
+"""Render diffing for results-page panels.
+
+Each client keeps a `render_hashes` state (`{panel: hash}`) of what it last
+received. A panel is identified by a content hash of its render inputs; when
+the hash matches, the callback returns `gr.update()` no-ops instead of
+rebuilding and re-sending the panel. Rendered HTML is shared across clients in
+a small LRU keyed by the same hash, so viewers of the same job render it once.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import gradio as gr
+
+MAX_CACHED_RENDERS = 512
+
+_lock = threading.Lock()
+_renders = OrderedDict()  # content hash -> rendered value
+
+
+def content_hash(value):
+    """Return a short stable hash of a (nested) tuple/dict/str value."""
+    return hashlib.blake2b(repr(value).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _cached_render(key, render):
+    with _lock:
+        if key in _renders:
+            _renders.move_to_end(key)
+            return _renders[key]
+    value = render()
+    with _lock:
+        _renders[key] = value
+        while len(_renders) > MAX_CACHED_RENDERS:
+            _renders.popitem(last=False)
+    return value
+
+
+def render_panel(render_hashes, panel, inputs, render):
+    """Render a panel only if its inputs changed for this client.
+
+    Inputs:
+    - render_hashes: the client's `{panel: hash}` state dict (updated in place).
+    - panel: panel name, e.g. 'process_status'.
+    - inputs: hashable summary of everything the panel's HTML depends on.
+    - render: zero-argument function returning the panel HTML.
+
+    Output:
+    - The rendered HTML, or None when the client already has it.
+    """
+    key = content_hash((panel, inputs))
+    if render_hashes.get(panel) == key:
+        return None
+    value = _cached_render(key, render)
+    render_hashes[panel] = key
+    return value
+
+
+def diff_output(render_hashes, panel, value):
+    """Return `value`, or a no-op update if this client already received it."""
+    key = content_hash((panel, value))
+    if render_hashes.get(panel) == key:
+        return gr.update()
+    render_hashes[panel] = key
+    return value
+
+
+def unchanged(render_hashes, panel, inputs):
+    """Record `inputs` for a multi-output panel; True if the client already has them."""
+    key = content_hash((panel, inputs))
+    if render_hashes.get(panel) == key:
+        return True
+    render_hashes[panel] = key
+    return False
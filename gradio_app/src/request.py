@@ -1,17 +1,13 @@
 import gradio as gr
 import ipaddress
 from functools import lru_cache
-from urllib.parse import urlencode
+from urllib.parse import quote, urlencode
 from zoneinfo import ZoneInfo
-from pymongo import MongoClient
 import requests
 
 from .settings import TAIPEI_TIME_ZONE, MOUNT_POINT
 from .logger import LOGGER
-
-client = MongoClient("mongodb://mongodb:27017/")
-db = client["app_db"]
-collections = db["input_queue"]
+from .mongodb import RequestReads
 IPWHOIS_URL = "https://ipwho.is/{ip}"
 
 def build_session_url(session_id, example_name="", example_action=""):
@@ -22,6 +18,13 @@ def build_session_url(session_id, example_name="", example_action=""):
         params["example_action"] = example_action
     return f"/{MOUNT_POINT}/session/?{urlencode(params)}"
 
+def build_download_url(session_id, job_name):
+    return f"/{MOUNT_POINT}/download/{quote(session_id, safe='')}/{quote(job_name, safe='')}.zip"
+
+def build_session_download_url(session_id, mode=""):
+    query = f"?{urlencode({'mode': mode})}" if mode else ""
+    return f"/{MOUNT_POINT}/download/{quote(session_id, safe='')}.zip{query}"
+
 def build_job_url(session_id, job_name, example_name="", example_action=""):
     params = {"session_id": session_id}
     if job_name:
@@ -40,18 +43,21 @@ def build_error_url(kind, session_id="", job_name=""):
         params["job_name"] = job_name
     return f"/{MOUNT_POINT}/error/?{urlencode(params)}"
 
-def session_exists(session_id):
+def session_exists(session_id, reads=None):
     """Check https://{root_path}/session/?session_id={session_id} is valid
     """
     if not session_id:
         return build_error_url("missing_session")
-    exists = collections.count_documents({"session_id": session_id}) > 0
-    if exists:
+    reads = reads or RequestReads()
+    if reads.session_exists(session_id):
         return ""
     return build_error_url("session_not_found", session_id=session_id)
 
-def job_exists(session_id, job_name):
+def job_exists(session_id, job_name, reads=None):
     """Check https://{root_path}/results/?session_id={session_id}&job_name={job_name} is valid
+
+    The job record is fetched through `reads`, so a page-load handler can
+    reuse it instead of querying it again.
     """
     if not session_id:
         return build_error_url("missing_session")
@@ -59,13 +65,13 @@ def job_exists(session_id, job_name):
     if not job_name:
         return build_error_url("missing_job", session_id=session_id)
     
-    error_url = session_exists(session_id)
+    reads = reads or RequestReads()
+    if reads.find_record(session_id, job_name) is not None:
+        return ""
+
+    error_url = session_exists(session_id, reads)
     if error_url:
         return error_url
-    
-    exists = collections.count_documents({"session_id": session_id, "job_name": job_name}) > 0
-    if exists:
-        return ""
     return build_error_url("job_not_found", session_id=session_id, job_name=job_name,)
 
 def _header_geo_info(request: gr.Request):
@@ -0,0 +1,143 @@
+"""Cross-client cache of prepared result bundles for finished jobs.
+
+A finished job's outputs never change, yet every viewer used to re-read and
+re-filter them. Bundles are keyed by the job folder plus the signature of its
+manifest (a single stat; see `manifest`), or the mtimes of the artifacts they
+are built from for jobs without one, so a re-run or re-imported job is picked
+up automatically. The cache is a bounded LRU on both entry count and an estimate
+of the bundles' memory (`RESULT_CACHE_MAX_BYTES`); `cache_stats()` reports its
+usage.
+"""
+
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from .manifest import MANIFEST_NAME, has_file, list_dir, manifest_signature, read_manifest
+from .predictions import STORE_DIR, column_values
+from .settings import RESULT_CACHE_MAX_BYTES, RESULT_CACHE_MAX_ENTRIES
+
+INFERENCING_ARTIFACTS = ("Main_Predictions.txt", "tandem_shap", STORE_DIR)
+TRAINING_ARTIFACTS = ("cross_validation_SAVs.json", "test_evaluation.txt", "loss.png")
+
+_lock = threading.Lock()
+_bundles = OrderedDict()  # key -> (bundle, size in bytes)
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+
+
+def _artifact_signature(job_folder, names):
+    manifest = manifest_signature(job_folder)
+    if manifest is not None:
+        return ((MANIFEST_NAME, manifest),)
+    signature = []
+    for name in names:
+        try:
+            signature.append((name, os.stat(os.path.join(job_folder, name)).st_mtime_ns))
+        except OSError:
+            signature.append((name, None))
+    return tuple(signature)
+
+
+def _approx_size(value):
+    """Rough memory footprint of a bundle, in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_approx_size(k) + _approx_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_approx_size(item) for item in value)
+    return sys.getsizeof(value)
+
+
+def _build_inferencing_bundle(job_folder):
+    manifest = read_manifest(job_folder)
+    if manifest.get("shap_images") is not None:
+        # Precomputed by the worker: SHAP images of the predicted SAVs.
+        images = list(manifest["shap_images"])
+    else:
+        predicted_savs = set(column_values(job_folder, "SAV"))
+        images = [
+            image_name for image_name in list_dir(job_folder, "tandem_shap")
+            if os.path.splitext(image_name)[0] in predicted_savs
+        ]
+
+    return {"images": images}
+
+
+def _build_training_bundle(job_folder):
+    with open(os.path.join(job_folder, "cross_validation_SAVs.json")) as f:
+        folds = json.load(f)
+
+    sav_sets = {"Test set": folds["1"]["test"]}
+    for fold_id in sorted(k for k in folds.keys() if k != "test"):
+        fold_num = fold_id.replace("fold_", "")
+        sav_sets[f"Fold {fold_num} - Training set"] = folds[str(fold_num)]["train"]
+        sav_sets[f"Fold {fold_num} - Validation set"] = folds[str(fold_num)]["val"]
+
+    loss_image = os.path.join(job_folder, "loss.png")
+    return {
+        "sav_sets": sav_sets,
+        "loss_image": loss_image if has_file(job_folder, "loss.png") else None,
+        "test_evaluation": pd.read_csv(os.path.join(job_folder, "test_evaluation.txt")),
+    }
+
+
+def get_result_bundle(job_folder, mode):
+    """Return the prepared, shared result bundle of a finished job.
+
+    Inputs:
+    - job_folder: finished job directory.
+    - mode: 'Inferencing' or 'Training'.
+
+    Output:
+    - Inferencing: dict with `images` (SHAP image names of predicted SAVs,
+      served by `shap_images`). The predictions table itself is paged from
+      the columnar store (see `predictions.query_page`).
+    - Training: dict with `sav_sets` ({label: SAVs}), `loss_image` (path or
+      None) and `test_evaluation` (DataFrame).
+    - None for other modes. Callers must not modify the shared bundle.
+    """
+    if mode == "Inferencing":
+        key = (job_folder, mode, _artifact_signature(job_folder, INFERENCING_ARTIFACTS))
+    elif mode == "Training":
+        key = (job_folder, mode, _artifact_signature(job_folder, TRAINING_ARTIFACTS))
+    else:
+        return None
+
+    with _lock:
+        cached = _bundles.get(key)
+        if cached is not None:
+            _bundles.move_to_end(key)
+            _stats["hits"] += 1
+            return cached[0]
+        _stats["misses"] += 1
+
+    bundle = _build_inferencing_bundle(job_folder) if mode == "Inferencing" else _build_training_bundle(job_folder)
+    size = _approx_size(bundle)
+    with _lock:
+        if key not in _bundles:
+            _bundles[key] = (bundle, size)
+            _stats["bytes"] += size
+        while _bundles and (len(_bundles) > RESULT_CACHE_MAX_ENTRIES or _stats["bytes"] > RESULT_CACHE_MAX_BYTES):
+            _, (_, evicted_size) = _bundles.popitem(last=False)
+            _stats["bytes"] -= evicted_size
+            _stats["evictions"] += 1
+    return bundle
+
+
+def cache_stats():
+    """Return the cache usage: entries, bytes, limits, hits, misses and evictions."""
+    with _lock:
+        return {
+            "entries": len(_bundles),
+            "bytes": _stats["bytes"],
+            "max_entries": RESULT_CACHE_MAX_ENTRIES,
+            "max_bytes": RESULT_CACHE_MAX_BYTES,
+            "hits": _stats["hits"],
+            "misses": _stats["misses"],
+            "evictions": _stats["evictions"],
+        }
@@ -1,41 +1,41 @@
 import os
 import shutil
-import json
 import html
 import time
-import pandas as pd 
 import gradio as gr
-from pymongo import MongoClient
+import pandas as pd
 
-from . import js
+from . import js, queue_stats
 from .components.process_status import build_process_status_html
 from .components.topbar import build_topbar_html
 from .settings import JOB_DIR, TITLE, HTML_DIR
-from .request import build_session_url, passthrough_url, job_exists, request2result_payload
+from .request import build_download_url, build_session_url, passthrough_url, job_exists, request2result_payload
+from .registry import get_examples
 from .base import build_footer, build_header
 from .logger import LOGGER
-from .settings import EXAMPLES_JSON
+from .tracing import record_first_view
+from .job_watcher import watch_job
+from .userlog import read_userlog
+from .mongodb import RequestReads, find_record, find_revision, remove_record, update_record
+from .queue_eta import estimate_job
+from .render_cache import diff_output, render_panel, unchanged
+from .result_cache import get_result_bundle
+from .predictions import query_page
+from .shap_images import build_viewer_html
 
-client = MongoClient("mongodb://mongodb:27017/")
-db = client["app_db"]
-collections = db["input_queue"]
-
-with open(EXAMPLES_JSON, "r", encoding="utf-8") as f:
-    EXAMPLES = json.load(f)
 
 class ResultPage:
     """Container for results UI and callbacks."""
     def __init__(self, folder):
         self.folder = folder
 
-    def update_timer(self, job_status):
-        """Enable or disable the refresh timer based on job status."""
-        decide = False if job_status == 'finished' else True
-        return gr.update(active=decide)
-
     def build(self):
         """Create UI components and layout."""
-        self.timer = gr.Timer(value=10, active=False)
+        self.push_rev = gr.Textbox(value="", visible=False)
+        self.eta_tick = gr.Textbox(value="", visible=False)
+        self.rev_token = gr.Textbox(value="", visible=False)
+        self.rendered_rev = gr.State("")
+        self.render_hashes = gr.State({})
         self.session_id = gr.Textbox(value="", visible=False)
         self.job_name = gr.Textbox(value="", visible=False)
         self.job_status = gr.Textbox(value="", visible=False)
@@ -65,9 +65,20 @@ class ResultPage:
             with gr.Group(visible=False) as self.inf_output_secion:
                 with gr.Row():
                     with gr.Column():
+                        # Paged on the server (src/predictions.py): the browser only holds the visible page.
+                        with gr.Row():
+                            self.pred_search = gr.Textbox(placeholder="Search SAVs, press Enter", show_label=False, elem_classes="gr-textbox", scale=3)
+                            self.pred_sort = gr.Dropdown(label="Sort by", choices=[], value=None, show_label=False, filterable=False, scale=2)
+                            self.pred_desc = gr.Checkbox(label="Descending", value=False, scale=1)
                         self.pred_table = gr.Dataframe(interactive=False,max_height=340,show_label=False,column_widths=[60, 150, "auto", "auto"],)
+                        with gr.Row():
+                            self.pred_prev = gr.Button("◀ Previous", size="sm", elem_classes="gr-button")
+                            self.pred_page_info = gr.Markdown("", elem_classes="gr-p")
+                            self.pred_next = gr.Button("Next ▶", size="sm", elem_classes="gr-button")
+                        self.pred_page = gr.State(1)
                     with gr.Column():
-                        self.image_viewer = gr.Image(height=340, show_label=False, buttons=["fullscreen"])
+                        # Cached WebP variants served by the /shap route (src/shap_images.py).
+                        self.image_viewer = gr.HTML(elem_classes="shap-viewer-panel")
 
             with gr.Group(visible=False) as self.tf_output_secion:
                 with gr.Row():
@@ -79,7 +90,7 @@ class ResultPage:
                     self.loss_image = gr.Image(label="", show_label=False, height=364, buttons=["fullscreen"])
                 self.model_save = gr.Markdown(elem_classes="gr-p")
 
-            self.result_zip = gr.File(label="Download Results")
+            self.result_zip = gr.HTML(visible=False)
             self.focus_refresh_btn = gr.Button(elem_id="focus_refresh_btn", visible=False)
             gr.HTML(js.focus_refresh)
 
@@ -112,29 +123,70 @@ class ResultPage:
     def _bind_events(self):
         """Wire UI events to callbacks."""
         self.pred_table.select(self.on_select_sav, inputs=[self.pred_table, self.job_folder], outputs=[self.image_viewer])
-
-        self.cancel_job_btn.click(fn=self.cancel_job, inputs=[self.param_state, self.jobs_folder_state, self.session_id, self.job_name, self.job_status], outputs=[self.param_state, self.timer, self.cancel_url], queue=False, 
+        pred_query_inputs = [self.job_folder, self.param_state, self.pred_search, self.pred_sort, self.pred_desc]
+        pred_query_outputs = [self.pred_table, self.pred_page, self.pred_page_info]
+        self.pred_search.submit(self.on_pred_filter, inputs=pred_query_inputs, outputs=pred_query_outputs, queue=False)
+        self.pred_sort.input(self.on_pred_filter, inputs=pred_query_inputs, outputs=pred_query_outputs, queue=False)
+        self.pred_desc.input(self.on_pred_filter, inputs=pred_query_inputs, outputs=pred_query_outputs, queue=False)
+        self.pred_prev.click(self.on_pred_prev, inputs=pred_query_inputs + [self.pred_page], outputs=pred_query_outputs, queue=False)
+        self.pred_next.click(self.on_pred_next, inputs=pred_query_inputs + [self.pred_page], outputs=pred_query_outputs, queue=False)
+
+        self.cancel_job_btn.click(fn=self.cancel_job, inputs=[self.param_state, self.jobs_folder_state, self.session_id, self.job_name, self.job_status], outputs=[self.param_state, self.cancel_url], queue=False, 
         ).then(fn=passthrough_url, inputs=[self.cancel_url], outputs=[self.cancel_url], js=js.direct2url_refresh, queue=False,
         )
 
-        self.focus_refresh_btn.click(fn=self.__update__, inputs=[self.param_state, self.job_folder, self.userlog, gr.State(True)], outputs=[self.param_state, self.userlog, self.session_id, self.job_name, self.job_status, self.mode],
-        ).then(fn=build_topbar_html, inputs=[self.param_state, self.session_id, self.job_name, self.job_status], outputs=[self.top_bar],
-        ).then(fn=self.update_process_status, inputs=[self.param_state, self.userlog, self.session_id, self.job_name, self.job_status, self.mode], outputs=[self.process_status],
-        ).then(fn=self.update_finished_job, inputs=[self.param_state, self.jobs_folder_state, self.userlog],
-            outputs=[self.output_section,self.results_heading,self.result_zip,self.inf_output_secion,self.pred_table,self.image_viewer,self.tf_output_secion,self.folds_state,self.fold_dropdown,self.sav_textbox,self.loss_image,self.test_evaluation,self.model_save,self.job_folder,],
-        ).then(fn=self.update_timer, inputs=[self.job_status], outputs=[self.timer],
+        # Focus and watcher pushes only ask for the job's revision; the refresh chain
+        # below runs when it differs from the one this page rendered.
+        self.focus_refresh_btn.click(fn=self.check_revision, inputs=[self.session_id, self.job_name, self.job_folder, self.rendered_rev], outputs=[self.rendered_rev, self.rev_token], queue=False,
+        )
+        # Pushed by the shared job watcher only when this job's record or user log changes.
+        self.push_rev.change(fn=self.check_revision, inputs=[self.session_id, self.job_name, self.job_folder, self.rendered_rev], outputs=[self.rendered_rev, self.rev_token], queue=False,
+        )
+
+        # Clock ticks from the watcher, spaced by the job's state and ETA: only the
+        # status panel's queue position and remaining-time text can have moved.
+        self.eta_tick.change(fn=self.update_process_status, inputs=[self.param_state, self.userlog, self.session_id, self.job_name, self.job_status, self.mode, self.render_hashes], outputs=[self.process_status, self.render_hashes], queue=False,
         )
 
-        self.timer.tick(fn=self.__update__,inputs=[self.param_state, self.job_folder, self.userlog, gr.State(True)],outputs=[self.param_state, self.userlog, self.session_id, self.job_name, self.job_status, self.mode],
-        ).then(fn=build_topbar_html, inputs=[self.param_state, self.session_id, self.job_name, self.job_status], outputs=[self.top_bar],
-        ).then(fn=self.update_process_status, inputs=[self.param_state, self.userlog, self.session_id, self.job_name, self.job_status, self.mode], outputs=[self.process_status],
-        ).then(fn=self.update_finished_job, inputs=[self.param_state, self.jobs_folder_state, self.userlog],
-            outputs=[self.output_section, self.results_heading, self.result_zip, self.inf_output_secion, self.pred_table, self.image_viewer, self.tf_output_secion, self.folds_state, self.fold_dropdown, self.sav_textbox, self.loss_image, self.test_evaluation, self.model_save, self.job_folder,],
-        ).then(fn=self.update_timer,inputs=[self.job_status],outputs=[self.timer],
+        self.rev_token.change(fn=self.__update__,inputs=[self.param_state, self.job_folder, self.userlog, gr.State(True)],outputs=[self.param_state, self.userlog, self.session_id, self.job_name, self.job_status, self.mode],
+        ).then(fn=self.update_topbar, inputs=[self.param_state, self.session_id, self.job_name, self.job_status, self.render_hashes], outputs=[self.top_bar, self.render_hashes],
+        ).then(fn=self.update_process_status, inputs=[self.param_state, self.userlog, self.session_id, self.job_name, self.job_status, self.mode, self.render_hashes], outputs=[self.process_status, self.render_hashes],
+        ).then(fn=self.update_finished_job, inputs=[self.param_state, self.jobs_folder_state, self.userlog, self.render_hashes],
+            outputs=self.finished_outputs(),
         )
 
         self.fold_dropdown.change(fn=self.on_select_sav_set, inputs=[self.fold_dropdown, self.folds_state], outputs=self.sav_textbox)
     
+    def revision_token(self, session_id, job_name, job_folder):
+        """Summarize the job's current state as `<rev>|<user-log mtime:size>`.
+
+        `rev` is bumped by every writer of the job record; the backend appends
+        to user_log.jsonl without touching the record, so its stat is included.
+        """
+        rev = find_revision(session_id, job_name) if session_id and job_name else None
+        return self._revision_token(rev, job_folder)
+
+    def _revision_token(self, rev, job_folder):
+        try:
+            stat = os.stat(os.path.join(job_folder, "user_log.jsonl")) if job_folder else None
+        except OSError:
+            stat = None
+        userlog_sig = f"{stat.st_mtime_ns}:{stat.st_size}" if stat else "-"
+        return f"{rev}|{userlog_sig}"
+
+    def check_revision(self, session_id, job_name, job_folder, rendered_rev):
+        """Compare the job's revision with the one this page rendered.
+
+        Output:
+        - rendered_rev_udt: the current revision token.
+        - rev_token_udt: the new token when the job changed (its `.change` runs
+          the refresh chain), otherwise a no-op update.
+        """
+        token = self.revision_token(session_id, job_name, job_folder)
+        if token == rendered_rev:
+            return rendered_rev, gr.update()
+        return token, token
+
     def __update__(self, param, job_folder, userlog, search_db: bool):
         """Update param_state, userlog, and other simple variables.
         If the job hits an error, we mark the job as finished in MongoDB and update the local job_status_udt.
@@ -152,7 +204,7 @@ class ResultPage:
             job_name = param_udt.get("job_name")
             if session_id and job_name:
                 # Find job
-                updated = collections.find_one({"session_id": session_id, "job_name": job_name}, {"_id": 0},)
+                updated = find_record(session_id, job_name)
                 if updated:
                     param_udt = updated
         userlog_udt = self.update_userlog(job_folder, userlog)
@@ -173,53 +225,49 @@ class ResultPage:
             last_event_level = str((last_event or {}).get("level", "")).lower()
             if last_event_level == "error":
                 job_status_udt = "finished"
-                if session_id_udt and job_name_udt:
-                    now = time.time()
-                    collections.update_one(
-                        {"session_id": session_id_udt, "job_name": job_name_udt},
-                        {"$set": {"status": "finished", "job_end": now}},
-                    )
+                # Written once: a repeated write would bump `rev` (re-rendering every
+                # viewer) and move `job_end`, which the stage model and traces read.
+                if session_id_udt and job_name_udt and param_udt.get("status") != "finished":
+                    values = {"status": "finished"}
+                    if not param_udt.get("job_end"):
+                        values["job_end"] = time.time()
+                    update_record(session_id_udt, job_name_udt, values, where={"status": {"$ne": "finished"}})
         return param_udt, userlog_udt, session_id_udt, job_name_udt, job_status_udt, mode_udt
     
     def update_userlog(self, job_folder, userlog):
-        """Refresh cached user-log state (mtime-aware).
-        
+        """Refresh cached user-log state from the shared tailer.
+
         Inputs:
         - job_folder: path to the job directory that contains user_log.jsonl.
-        - userlog: previous cached state dict (used to skip re-reading if unchanged).
+        - userlog: previous cached state dict (kept as-is if unchanged).
 
         Output: A dict with:
-          - mtime: last modified time of user_log.jsonl
-          - events: parsed list of log events (dicts)
-          - history: formatted multi-line HTML-ready message string
+          - version: changes whenever new events were appended
+          - events: parsed list of log events (dicts), shared by all viewers
         """
         if not job_folder:
             return userlog or {}
 
-        userlog_path = os.path.join(job_folder, "user_log.jsonl")
-        if not os.path.exists(userlog_path):
-            return {}
-
-        mtime = os.path.getmtime(userlog_path)
-        if isinstance(userlog, dict) and userlog.get("mtime") == mtime:
+        userlog_udt = read_userlog(job_folder)
+        if isinstance(userlog, dict) and userlog_udt and userlog.get("version") == userlog_udt["version"]:
             return userlog
+        return userlog_udt
 
-        events = []
-        with open(userlog_path, "r", encoding="utf-8") as handle:
-            for line in handle:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    events.append(json.loads(line))
-                except json.JSONDecodeError:
-                    continue
-
-        return {"mtime": mtime, "events": events}
-
-    def update_process_status(self, param, userlog, session_id, job_name, job_status, mode):
-        """Refresh the status panel using cached user-log data."""
+    def update_topbar(self, param, session_id, job_name, job_status, render_hashes):
+        """Refresh the topbar; a no-op update if this client already has the same HTML."""
+        render_hashes = render_hashes if isinstance(render_hashes, dict) else {}
+        topbar_html = build_topbar_html(param, session_id, job_name, job_status)
+        return diff_output(render_hashes, "top_bar", topbar_html), render_hashes
+
+    def update_process_status(self, param, userlog, session_id, job_name, job_status, mode, render_hashes):
+        """Refresh the status panel using cached user-log data.
+
+        The panel is only rebuilt and re-sent when its inputs (job record
+        fields, user-log version, queue snapshot and estimate) changed since
+        this client last received it.
+        """
         process_status_udt = gr.update()
+        render_hashes = render_hashes if isinstance(render_hashes, dict) else {}
         param_udt = param.copy() if isinstance(param, dict) else {}
         session_id = session_id or param_udt.get("session_id", "")
         job_name = job_name or param_udt.get("job_name", "")
@@ -227,11 +275,23 @@ class ResultPage:
         mode = mode or param_udt.get("mode", "")
 
         if not session_id or not job_name or not param_udt:
-            return process_status_udt
-
-        process_status_html = build_process_status_html(param_udt, userlog, session_id, job_name, job_status)
-        process_status_udt = gr.update(value=process_status_html, visible=True)
-        return process_status_udt
+            return process_status_udt, render_hashes
+
+        inputs = (
+            session_id, job_name, job_status,
+            param_udt.get("rev"), param_udt.get("submission_time"), param_udt.get("job_start"),
+            userlog.get("version") if isinstance(userlog, dict) else None,
+            queue_stats.get_snapshot()["updated"],
+            repr(estimate_job(session_id, job_name)) if job_status in {"pending", "processing"} else None,
+            int(time.time() // 60),  # remaining-time texts move with the clock
+        )
+        process_status_html = render_panel(
+            render_hashes, "process_status", inputs,
+            lambda: build_process_status_html(param_udt, userlog, session_id, job_name, job_status),
+        )
+        if process_status_html is not None:
+            process_status_udt = gr.update(value=process_status_html, visible=True)
+        return process_status_udt, render_hashes
 
     def cancel_job(self, param, folder, session_id, job_name, job_status):
         """Cancel the active job and prepare redirect state.
@@ -245,29 +305,27 @@ class ResultPage:
 
         Output:
         - param_udt: updated param state after cancellation.
-        - timer_udt: timer update to stop polling.
         - cancel_url_udt: URL used for redirect back to the session page.
         """
         param_udt = param.copy() if isinstance(param, dict) else {}
         session_id = session_id or param_udt.get("session_id", "")
         job_name = job_name or param_udt.get("job_name", "")
         job_status = job_status or param_udt.get("status", "")
-        timer_udt = gr.update(active=False)
         cancel_url_udt = ""
 
         if not session_id or not job_name or not param_udt:
-            return param_udt, timer_udt, cancel_url_udt
+            return param_udt, cancel_url_udt
 
         if session_id == "test":
             gr.Warning("Demo jobs cannot be cancelled.")
-            return param_udt, timer_udt, cancel_url_udt
+            return param_udt, cancel_url_udt
 
         if job_status not in {"pending", "processing"}:
             gr.Warning("Only pending or processing jobs can be cancelled from the website.")
-            return param_udt, timer_udt, cancel_url_udt
+            return param_udt, cancel_url_udt
 
         try:
-            collections.delete_one({"session_id": session_id, "job_name": job_name})
+            remove_record(session_id, job_name)
             job_dir = os.path.join(folder, session_id, job_name)
             if os.path.exists(job_dir):
                 shutil.rmtree(job_dir)
@@ -283,41 +341,61 @@ class ResultPage:
             gr.Warning(value)
             cancel_url_udt = build_session_url(session_id)
             LOGGER.info(f"Cancelled job {session_id}/{job_name} from results page")
-            return param_udt, timer_udt, cancel_url_udt
+            return param_udt, cancel_url_udt
         except Exception:
             gr.Warning(f"Failed to cancel job {session_id}/{job_name}")
-            return param_udt, timer_udt, cancel_url_udt
+            return param_udt, cancel_url_udt
 
     def on_select_sav(self, evt: gr.SelectData, df, job_folder):
-        """Update the SHAP image for the selected SAV row."""
+        """Show the SHAP image of the selected SAV row and prefetch its neighbours."""
         row_idx, col_idx = evt.index
-        sav = df.iloc[row_idx]['SAV']
-        shap_img = os.path.join(job_folder, "tandem_shap", f"{sav}.png")
-        if os.path.exists(shap_img):
-            return gr.update(value=shap_img)
-        return gr.update(value=None)
+        savs = df["SAV"].tolist() if df is not None and "SAV" in df else []
+        return gr.update(value=build_viewer_html(job_folder, savs, row_idx))
+
+    def _pred_page(self, job_folder, param, search, sort, descending, page):
+        """Return (DataFrame of one predictions page with the model column renamed, query result)."""
+        model = (param or {}).get("model", "TANDEM")
+        sort = "TANDEM-DIMPLE" if sort and sort == model else sort
+        result = query_page(job_folder, page, sort=sort, descending=descending, search=search) if job_folder else None
+        if result is None:
+            return None, None
+        columns = [model if col == "TANDEM-DIMPLE" else col for col in result["columns"]]
+        return pd.DataFrame(result["rows"], columns=columns), result
+
+    def on_pred_query(self, job_folder, param, search, sort, descending, page):
+        """Fetch one page of predictions, searched and sorted on the server.
+
+        Output:
+        - pred_table_udt: the page as a DataFrame.
+        - pred_page_udt: the page number actually served.
+        - pred_page_info_udt: "Page x / y · n SAVs" text.
+        """
+        df_page, result = self._pred_page(job_folder, param, search, sort, descending, page)
+        if result is None:
+            return gr.update(value=None), 1, ""
+        pred_page_info_udt = f"Page {result['page']} / {result['pages']} · {result['total']} SAVs"
+        return gr.update(value=df_page), result["page"], pred_page_info_udt
+
+    def on_pred_filter(self, job_folder, param, search, sort, descending):
+        return self.on_pred_query(job_folder, param, search, sort, descending, 1)
+
+    def on_pred_prev(self, job_folder, param, search, sort, descending, page):
+        return self.on_pred_query(job_folder, param, search, sort, descending, (page or 1) - 1)
+
+    def on_pred_next(self, job_folder, param, search, sort, descending, page):
+        return self.on_pred_query(job_folder, param, search, sort, descending, (page or 1) + 1)
 
     def on_select_sav_set(self, selection, folds):
         """Update the SAV list for the selected fold."""
         return folds[selection]
 
-    def zip_folder(self, folder):
-        """Create a zip archive for download."""
-        folder = os.path.abspath(folder)
-        base_dir = os.path.basename(folder)
-        root_dir = os.path.dirname(folder)
+    def update_finished_job(self, param, folder, userlog, render_hashes):
+        """Load and render result artifacts when a job finishes.
 
-        temp_base_name = os.path.join(root_dir, base_dir) # 1️⃣ Create zip NEXT TO the folder (safe)
-        temp_zip_path = temp_base_name + ".zip"
-        final_zip_path = os.path.join(folder, "result.zip") # 2️⃣ Move zip INTO the folder
-
-        if not os.path.exists(final_zip_path):
-            shutil.make_archive(base_name=temp_base_name, format="zip", root_dir=root_dir, base_dir=base_dir)
-            shutil.move(temp_zip_path, final_zip_path)
-        return final_zip_path
-
-    def update_finished_job(self, param, folder, userlog):
-        """Load and render result artifacts when a job finishes."""
+        Returns 17 no-op updates when this client already rendered the same
+        job state.
+        """
+        render_hashes = render_hashes if isinstance(render_hashes, dict) else {}
         _session_id = param.get("session_id")
         _job_status = param.get("status")
         _job_name = param.get("job_name")
@@ -329,15 +407,19 @@ class ResultPage:
             last_event = events[-1] if events else last_event
         last_event_level = str((last_event or {}).get("level", "")).lower()
             
+        inputs = (folder, _session_id, _job_name, _job_status, _mode, param.get("model"), param.get("job_end"), param.get("postprocessed"), last_event_level)
+        if unchanged(render_hashes, "finished_job", inputs):
+            return [gr.update() for _ in range(17)] + [render_hashes]
+
         # ----------- defaults (IMPORTANT) -----------
         if _job_status != "finished" or last_event_level == "error":
-            return [gr.update(visible=False) for _ in range(14)]
+            return [gr.update(visible=False) for _ in range(17)] + [render_hashes]
 
         job_folder = os.path.join(folder, _session_id, _job_name)
 
         output_section_udt = gr.update(visible=True)
         results_heading_udt = gr.update(value=self.render_results_heading(_mode), visible=True)
-        result_zip_udt = gr.update(value=None, interactive=False, visible=False)
+        result_zip_udt = gr.update(value="", visible=False)
 
         inf_output_secion_udt = gr.update(visible=False)
         pred_table_udt = gr.update(visible=False)
@@ -351,84 +433,112 @@ class ResultPage:
         test_eval_udt = gr.update()
         model_saved_udt = gr.update()
         job_folder_udt = job_folder
+        pred_sort_udt = gr.update()
+        pred_page_info_udt = gr.update()
+        pred_page_udt = 1
 
         # ----------- common outputs -----------
-        zip_path = self.zip_folder(job_folder)
-        result_zip_udt = gr.update(value=zip_path, interactive=True, visible=bool(zip_path))
+        # Streamed on the fly by the download route (src/downloads.py); nothing is written to disk.
+        download_url = html.escape(build_download_url(_session_id, _job_name))
+        result_zip_udt = gr.update(value=f'<a class="download-results-btn" href="{download_url}" download>Download Results</a>', visible=True)
 
         # ----------- Inferencing mode -----------
         if _mode == "Inferencing":
             inf_output_secion_udt = gr.update(visible=True)
 
-            pred_file = os.path.join(job_folder, "Main_Predictions.txt")
-            df_pred = pd.read_csv(pred_file)
-
-            # Change column name TANDEM-DIMPLE to model
-            model = param.get("model", 'TANDEM')
-            if "TANDEM-DIMPLE" in df_pred.columns:
-                df_pred = df_pred.rename(columns={"TANDEM-DIMPLE": model})
-
-            prediction_cols = [col for col in df_pred.columns if col != "SAV"]
-            if prediction_cols:
-                predicted_mask = df_pred[prediction_cols].apply(
-                    lambda row: any(str(value).strip() != "Not available" for value in row),
-                    axis=1,
-                )
-                df_pred = df_pred[predicted_mask].copy()
-
-            # ---- Add index column FIRST ----
-            df_pred = df_pred.reset_index(drop=True)
-            df_pred.insert(0, "#", df_pred.index + 1)
-
-            # ---- Send to Gradio ----
-            pred_table_udt = gr.update(value=df_pred, visible=not df_pred.empty)
-
-            tandem_shap = os.path.join(job_folder, "tandem_shap")
-            predicted_savs = set(df_pred["SAV"].tolist()) if not df_pred.empty else set()
-            list_images = []
-            if os.path.isdir(tandem_shap):
-                for image_name in sorted(os.listdir(tandem_shap)):
-                    sav_name, ext = os.path.splitext(image_name)
-                    if sav_name in predicted_savs:
-                        list_images.append(image_name)
-
-            first_image = os.path.join(tandem_shap, list_images[0]) if list_images else None
-            image_viewer_udt = gr.update(value=first_image, visible=bool(list_images))
+            bundle = get_result_bundle(job_folder, _mode)
+            df_page, result = self._pred_page(job_folder, param, "", None, False, 1)
+            has_predictions = bool(result and result["total"])
+            pred_table_udt = gr.update(value=df_page, visible=has_predictions)
+            pred_sort_udt = gr.update(choices=list(df_page.columns) if has_predictions else [], value=None, visible=has_predictions)
+            pred_page_info_udt = gr.update(value=f"Page 1 / {result['pages']} · {result['total']} SAVs" if has_predictions else "", visible=has_predictions)
+            first_sav = os.path.splitext(bundle["images"][0])[0] if bundle["images"] else None
+            page_savs = df_page["SAV"].tolist() if has_predictions else []
+            viewer_savs, viewer_index = (page_savs, page_savs.index(first_sav)) if first_sav in page_savs else ([first_sav], 0)
+            image_viewer_udt = gr.update(value=build_viewer_html(job_folder, viewer_savs, viewer_index) if first_sav else "", visible=bool(first_sav))
         # ----------- Transfer Learning mode -----------
         elif _mode == "Training":
             tf_output_secion_udt = gr.update(visible=True)
 
-            folds_path = os.path.join(job_folder, "cross_validation_SAVs.json")
-            with open(folds_path) as f:
-                folds = json.load(f)
-
-            folds_state_udt = {}
-            folds_state_udt['Test set'] = folds["1"]['test']
-            for fold_id in sorted(k for k in folds.keys() if k != "test"):
-                fold_num = fold_id.replace("fold_", "")
-                folds_state_udt[f"Fold {fold_num} - Training set"] = folds[str(fold_num)]['train']
-                folds_state_udt[f"Fold {fold_num} - Validation set"] = folds[str(fold_num)]['val']
-            choices = folds_state_udt.keys()
-
-            fold_dropdown_udt = gr.update(choices=choices, value='Test set', visible=True)
+            bundle = get_result_bundle(job_folder, _mode)
+            folds_state_udt = bundle["sav_sets"]
+            fold_dropdown_udt = gr.update(choices=folds_state_udt.keys(), value='Test set', visible=True)
             SAV_textbox_udt = gr.update(value=folds_state_udt['Test set'], visible=True)
-
-            loss_img = os.path.join(job_folder, "loss.png")
-            loss_image_udt = gr.update(value=loss_img, visible=os.path.exists(loss_img))
-
-            test_eval = os.path.join(job_folder, "test_evaluation.txt")
-            df_test_eval = pd.read_csv(test_eval)
-            test_eval_udt = gr.update(value=df_test_eval, visible=True)
+            loss_image_udt = gr.update(value=bundle["loss_image"], visible=bool(bundle["loss_image"]))
+            test_eval_udt = gr.update(value=bundle["test_evaluation"], visible=True)
             model_saved_udt = gr.update(value=f"Your models have been saved under name '{_job_name}'!", visible=True)
+
+        record_first_view(param)
         return (
             output_section_udt, results_heading_udt, result_zip_udt, inf_output_secion_udt, pred_table_udt, image_viewer_udt,
             tf_output_secion_udt, folds_state_udt, fold_dropdown_udt, SAV_textbox_udt,
-            loss_image_udt, test_eval_udt, model_saved_udt, job_folder_udt
+            loss_image_udt, test_eval_udt, model_saved_udt, job_folder_udt, pred_sort_udt, pred_page_info_udt, pred_page_udt, render_hashes
         )
 
+    def load_page(self, request: gr.Request):
+        """Resolve the request and render the whole page in one round trip.
+
+        Replaces the chained load steps: the job record is read once through a
+        request-scoped `RequestReads` and reused for the existence check, the
+        revision token and the first render.
+
+        Output:
+        - Dict of component updates.
+        """
+        started = time.perf_counter()
+        reads = RequestReads()
+        session_id, job_name, example_name, example_action = request2result_payload(request)
+        session_id, job_name, launch_session_id = resolve_result_request(session_id, job_name, example_name, example_action)
+        loaded = {
+            self.session_id: session_id, self.job_name: job_name, self.example_name: example_name,
+            self.example_action: example_action, self.launch_session_id: launch_session_id,
+        }
+        error_url = job_exists(session_id, job_name, reads)
+        if error_url:
+            loaded[self.error_url] = error_url
+            return loaded
+
+        param = dict(reads.find_record(session_id, job_name) or {})
+        job_folder = os.path.join(JOB_DIR, session_id, job_name)
+        rendered_rev = self._revision_token(param.get("rev", 0) if param else None, job_folder)
+        if param:
+            param["launch_session_id"] = launch_session_id
+
+        param, userlog, session_id, job_name, job_status, mode = self.__update__(param, job_folder, {}, False)
+        render_hashes = {}
+        top_bar, render_hashes = self.update_topbar(param, session_id, job_name, job_status, render_hashes)
+        process_status, render_hashes = self.update_process_status(param, userlog, session_id, job_name, job_status, mode, render_hashes)
+        finished = list(self.update_finished_job(param, self.folder, userlog, render_hashes))
+        finished[13] = job_folder
+
+        loaded.update({
+            self.session_id: session_id, self.job_name: job_name, self.error_url: "",
+            self.param_state: param, self.rendered_rev: rendered_rev, self.userlog: userlog,
+            self.job_status: job_status, self.mode: mode, self.top_bar: top_bar,
+            self.process_status: process_status, self.render_hashes: render_hashes,
+        })
+        loaded.update(zip(self.finished_outputs(), finished))
+        LOGGER.debug(f"Results page load {session_id}/{job_name}: {(time.perf_counter() - started) * 1000:.1f} ms, {reads.count} MongoDB read(s)")
+        return loaded
+
+    def finished_outputs(self):
+        """Output components of `update_finished_job`, in order."""
+        return [
+            self.output_section, self.results_heading, self.result_zip, self.inf_output_secion, self.pred_table, self.image_viewer,
+            self.tf_output_secion, self.folds_state, self.fold_dropdown, self.sav_textbox, self.loss_image, self.test_evaluation,
+            self.model_save, self.job_folder, self.pred_sort, self.pred_page_info, self.pred_page, self.render_hashes,
+        ]
+
+    def load_outputs(self):
+        """Every component `load_page` may update."""
+        return [
+            self.session_id, self.job_name, self.example_name, self.example_action, self.launch_session_id, self.error_url,
+            self.param_state, self.rendered_rev, self.userlog, self.job_status, self.mode, self.top_bar, self.process_status,
+        ] + self.finished_outputs()
+
     def search_param(self, session_id, job_name):
         """Fetch a job record and compute the job folder path."""
-        param = collections.find_one({"session_id": session_id, "job_name": job_name}, {"_id": 0})
+        param = find_record(session_id, job_name)
         job_folder = os.path.join(JOB_DIR, session_id, job_name)
         return param, job_folder
 
@@ -450,7 +560,7 @@ def resolve_result_request(session_id, job_name, example_name, example_action):
     if example_action != "view_output" or not example_name:
         return session_id, job_name, ""
 
-    ex = EXAMPLES.get(example_name, "")
+    ex = get_examples().get(example_name, "")
     if ex == "":
         return session_id, job_name, ""
 
@@ -468,18 +578,9 @@ def results_page():
             ui = ResultPage(JOB_DIR).build()
         build_footer()
 
-        page.load(fn=request2result_payload, inputs=None, outputs=[ui.session_id, ui.job_name, ui.example_name, ui.example_action], queue=False,
-        ).then(fn=resolve_result_request, inputs=[ui.session_id, ui.job_name, ui.example_name, ui.example_action], outputs=[ui.session_id, ui.job_name, ui.launch_session_id], queue=False,
-        ).then(fn=job_exists, inputs=[ui.session_id, ui.job_name], outputs=[ui.error_url], queue=False,
-        ).then(fn=passthrough_url, inputs=[ui.error_url], outputs=[ui.error_url], js=js.direct2url_refresh, queue=False,
-        ).then(fn=ui.search_param, inputs=[ui.session_id, ui.job_name], outputs=[ui.param_state, ui.job_folder], queue=False,
-        ).then(fn=lambda param, launch_session_id: ({**param, "launch_session_id": launch_session_id} if param else param), inputs=[ui.param_state, ui.launch_session_id], outputs=[ui.param_state], queue=False,
-        ).then(fn=ui.__update__, inputs=[ui.param_state, ui.job_folder, ui.userlog, gr.State(False)], outputs=[ui.param_state, ui.userlog, ui.session_id, ui.job_name, ui.job_status, ui.mode], queue=False,
-        ).then(fn=build_topbar_html, inputs=[ui.param_state, ui.session_id, ui.job_name, ui.job_status], outputs=[ui.top_bar], queue=False,
-        ).then(fn=ui.update_process_status, inputs=[ui.param_state, ui.userlog, ui.session_id, ui.job_name, ui.job_status, ui.mode], outputs=[ui.process_status], queue=False,
-        ).then(fn=ui.update_finished_job,inputs=[ui.param_state, ui.jobs_folder_state, ui.userlog],
-            outputs=[ui.output_section, ui.results_heading, ui.result_zip, ui.inf_output_secion, ui.pred_table, ui.image_viewer, ui.tf_output_secion, ui.folds_state, ui.fold_dropdown, ui.sav_textbox, ui.loss_image, ui.test_evaluation, ui.model_save, ui.job_folder,],
-        ).then(fn=ui.update_timer, inputs=[ui.job_status], outputs=[ui.timer], queue=False,
+        page.load(fn=ui.load_page, inputs=None, outputs=ui.load_outputs(), queue=False,
+        ).then(fn=None, inputs=[ui.error_url], outputs=[], js=js.direct2url_refresh,
+        ).then(fn=watch_job, inputs=[ui.session_id, ui.job_name, ui.job_status], outputs=[ui.push_rev, ui.eta_tick], concurrency_limit=None, show_progress="hidden",
         )
 
     return page
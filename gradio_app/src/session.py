@@ -1,28 +1,22 @@
-import json
 import os
 import shutil
 import time
 from datetime import datetime
 
 import gradio as gr
-from pymongo import MongoClient
 
-from . import js
+from . import js, queue_stats
 from .logger import LOGGER
-from .request import build_job_url,build_session_url,passthrough_url,request2info,request2session_payload,session_exists
-from .settings import EXAMPLES_JSON, FIGURE_1, HTML_DIR, JOB_DIR, TITLE, TAIPEI_TIME_ZONE, TMP_DIR, JOB_RETENTION_SECONDS
+from .request import build_job_url,build_session_download_url,build_session_url,passthrough_url,request2info,request2session_payload,session_exists
+from .settings import FIGURE_1, HTML_DIR, JOB_DIR, TITLE, TAIPEI_TIME_ZONE, TMP_DIR, JOB_RETENTION_SECONDS
 from .update_input import handle_SAV, handle_STR
+from .registry import get_examples
 from .base import build_footer, build_header, build_last_updated
-
-client = MongoClient("mongodb://mongodb:27017/")
-db = client["app_db"]
-collections = db["input_queue"]
+from .tracing import new_trace_id
+from .mongodb import RequestReads, find_created_record, list_session_job_names, upsert_job_record, upsert_session_created_record
 
 READ_ONLY_SESSION_ID = "test"
 
-with open(EXAMPLES_JSON, "r", encoding="utf-8") as f:
-    EXAMPLES = json.load(f)
-
 UPLOAD_ROW_HTML = """
 <div class="structure-upload-demo">
     <div class="native-file-shell">
@@ -245,7 +239,7 @@ class SessionPage:
             gr.Warning("Please select an example first.")
             return self.empty_example_updates(param)
 
-        ex = EXAMPLES.get(example_name, "")
+        ex = get_examples().get(example_name, "")
         if ex == "":
             gr.Warning(f"No example configuration is available for '{example_name}'.")
             return self.empty_example_updates(param)
@@ -296,7 +290,7 @@ class SessionPage:
             gr.Warning("Please select an example first.")
             return ""
 
-        ex = EXAMPLES.get(example_name, "")
+        ex = get_examples().get(example_name, "")
         if ex == "":
             gr.Warning(f"No example configuration is available for '{example_name}'.")
             return ""
@@ -362,6 +356,7 @@ class SessionPage:
         return structure_section_udt
 
     def update_input_param(self, session_id, mode, inf_sav_txt, model_dropdown, tf_sav_txt, str_txt, str_file, job_name_txt, param, request: gr.Request):
+        trace_start = time.time()
         ip, tz_final, geo_info = request2info(request)
         if session_id == READ_ONLY_SESSION_ID:
             gr.Warning("Session 'test' is read-only. Please start a new session to submit jobs.")
@@ -430,6 +425,8 @@ class SessionPage:
         param_udt["country"] = geo_info.get("country", "")
         param_udt["continent"] = geo_info.get("continent", "")
         param_udt["job_url"] = job_url
+        param_udt["trace_id"] = new_trace_id()
+        param_udt["trace"] = {"submit": [round(trace_start, 3)]}
         return param_udt, job_url
 
     def send_job(self, _param):
@@ -437,8 +434,14 @@ class SessionPage:
             return _param
         param_udt = _param.copy()
         param_udt.pop("_id", None)
-        collections.update_one({"session_id": param_udt.get("session_id"), "job_name": param_udt.get("job_name")}, {"$set": param_udt}, upsert=True,)
-        LOGGER.info(f"✅ Submitted with payload: {param_udt}")
+        trace = dict(param_udt.get("trace") or {})
+        submit_start = (trace.get("submit") or [time.time()])[0]
+        trace["submit"] = [submit_start, round(time.time(), 3)]
+        param_udt["trace"] = trace
+        param_udt.pop("rev", None)
+        upsert_job_record(param_udt)
+        queue_stats.invalidate()
+        LOGGER.info(f"✅ Submitted trace {param_udt.get('trace_id')} with payload: {param_udt}")
         return param_udt
 
     def refresh_job_dropdown(self, param):
@@ -448,13 +451,54 @@ class SessionPage:
             job_dropdown_udt = gr.update()
             return job_dropdown_udt
 
-        job_names = collections.distinct("job_name", {"session_id": session_id, "status": {"$in": ["pending", "processing", "finished"]}},)
+        job_names = list_session_job_names(session_id, statuses=["pending", "processing", "finished"])
         if current_job not in job_names:
             job_names.append(current_job)
         job_dropdown_udt = gr.update(visible=True, choices=sorted(job_names), value=current_job, interactive=True)
         return job_dropdown_udt
 
-def on_session_id(session_id, param):
+    def load_page(self, param, request: gr.Request):
+        """Resolve the request and fill the session page in one round trip.
+
+        Replaces the chained load steps; MongoDB reads go through one
+        request-scoped `RequestReads`.
+
+        Output:
+        - Dict of component updates.
+        """
+        started = time.perf_counter()
+        reads = RequestReads()
+        session_id, example_name, example_action = request2session_payload(request)
+        loaded = {self.session_id: session_id, self.example_name: example_name, self.example_action: example_action}
+        error_url = session_exists(session_id, reads)
+        if error_url:
+            loaded[self.error_url] = error_url
+            return loaded
+
+        session_udts = on_session_id(session_id, param, reads)
+        loaded.update(zip([self.session_id, self.session_status, self.job_dropdown, self.model_dropdown, self.submit_btn, self.param_state], session_udts))
+
+        example_outputs = [self.mode, self.inf_section, self.tf_section, self.inf_sav_txt, self.tf_sav_txt, self.str_check, self.structure_section, self.upload_html, self.str_btn, self.str_file, self.job_name_txt, self.param_state]
+        example_udts = self.apply_request_payload(example_name, example_action, session_udts[-1])
+        loaded.update(zip(example_outputs, example_udts))
+
+        str_file_udt = example_udts[9]
+        str_file = str_file_udt.get("value", "") if isinstance(str_file_udt, dict) else str_file_udt
+        loaded.update(zip([self.upload_html, self.str_btn, self.str_file], self.on_str_upload(str_file)))
+        loaded[self.error_url] = ""
+        LOGGER.debug(f"Session page load {session_id}: {(time.perf_counter() - started) * 1000:.1f} ms, {reads.count} MongoDB read(s)")
+        return loaded
+
+    def load_outputs(self):
+        """Every component `load_page` may update."""
+        return [
+            self.session_id, self.example_name, self.example_action, self.error_url, self.session_status, self.job_dropdown, self.model_dropdown, self.submit_btn,
+            self.param_state, self.mode, self.inf_section, self.tf_section, self.inf_sav_txt, self.tf_sav_txt, self.str_check, self.structure_section, self.upload_html,
+            self.str_btn, self.str_file, self.job_name_txt,
+        ]
+
+
+def on_session_id(session_id, param, reads=None):
     base_model_choices = ["TANDEM", "TANDEM-DIMPLE for GJB2", "TANDEM-DIMPLE for RYR1"]
     session_id_udt = gr.update(value=session_id, interactive=False)
     is_read_only = session_id == READ_ONLY_SESSION_ID
@@ -462,19 +506,22 @@ def on_session_id(session_id, param):
     if is_read_only:
         session_status_udt = "\n⚠️ Demo session 'test' is read-only. Job submission is disabled."
 
-    existing_jobs = collections.distinct("job_name", {"session_id": session_id, "status": {"$in": ["pending", "processing", "finished"]}},)
+    reads = reads or RequestReads()
+    existing_jobs = reads.distinct("job_name", {"session_id": session_id, "status": {"$in": ["pending", "processing", "finished"]}},)
     if existing_jobs:
         job_dropdown_udt = gr.update(visible=True, value=None, choices=existing_jobs, interactive=True)
-        pre_trained_models = collections.distinct("job_name", {"session_id": session_id, "status": "finished", "mode": {"$in": ["Training", "Transfer Learning"]}},)
+        pre_trained_models = reads.distinct("job_name", {"session_id": session_id, "status": "finished", "mode": {"$in": ["Training", "Transfer Learning"]}},)
+        finished_jobs = reads.distinct("job_name", {"session_id": session_id, "status": "finished"},)
+        if len(finished_jobs) > 1:
+            session_status_udt += f"\n\n⬇️ [Download all {len(finished_jobs)} finished jobs]({build_session_download_url(session_id)})"
         model_dropdown_udt = gr.update(choices=base_model_choices + pre_trained_models)
-        created_param = collections.find_one({"session_id": session_id, "status": "created"}) or {}
+        created_param = find_created_record(session_id) or {}
     else:
-        collections.update_one({"session_id": session_id}, {"$set": {"session_id": session_id, "status": "created"}}, upsert=True,)
+        upsert_session_created_record(session_id)
         job_dropdown_udt = gr.update(visible=False, value=None, choices=[])
         model_dropdown_udt = gr.update(choices=base_model_choices)
-        created_param = collections.find_one({"session_id": session_id, "status": "created"}) or {}
+        created_param = find_created_record(session_id) or {}
 
-    created_param.pop("_id", None)
     param_state_udt = (param or {}).copy()
     param_state_udt.update(created_param)
     submit_btn_udt = gr.update(interactive=not is_read_only)
@@ -491,12 +538,8 @@ def session_page():
             build_last_updated()
         build_footer()
 
-        page.load(fn=request2session_payload, inputs=None, outputs=[ui.session_id, ui.example_name, ui.example_action], queue=False,
-        ).then(fn=session_exists,inputs=[ui.session_id],outputs=[ui.error_url],queue=False,
-        ).then(fn=passthrough_url,inputs=[ui.error_url],outputs=[ui.error_url],js=js.direct2url_refresh,queue=False,
-        ).then(fn=on_session_id,inputs=[ui.session_id, param_state],outputs=[ui.session_id, ui.session_status, ui.job_dropdown, ui.model_dropdown, ui.submit_btn, ui.param_state],queue=False,
-        ).then(fn=ui.apply_request_payload,inputs=[ui.example_name, ui.example_action, ui.param_state], outputs=[ui.mode, ui.inf_section, ui.tf_section, ui.inf_sav_txt, ui.tf_sav_txt, ui.str_check, ui.structure_section, ui.upload_html, ui.str_btn, ui.str_file, ui.job_name_txt, ui.param_state], queue=False,
-        ).then(fn=ui.on_str_upload, inputs=[ui.str_file], outputs=[ui.upload_html, ui.str_btn, ui.str_file], queue=False,
+        page.load(fn=ui.load_page, inputs=[param_state], outputs=ui.load_outputs(), queue=False,
+        ).then(fn=None,inputs=[ui.error_url],outputs=[],js=js.direct2url_refresh,
         ).then(fn=None, inputs=[ui.example_name], outputs=[], js=js.sync_session_example_select, queue=False,
         )
 
@@ -17,6 +17,66 @@ HTML_DIR = os.path.join(GRADIO_DIR, 'src/html')
 
 SASS_DIR = os.path.join(GRADIO_DIR, "sass")
 ASSETS_DIR = os.path.join(GRADIO_DIR, "assets")
+# Where the compiled CSS is kept (scripts/build_assets.py). The image sets it outside
+# /gradio_app, which docker-compose bind-mounts over the build output.
+BUILD_ASSETS_DIR = os.environ.get("GRADIO_BUILD_ASSETS_DIR", ASSETS_DIR)
 FIGURE_1 = os.path.join(ASSETS_DIR, 'images/figure_1.jpg')
 
 EXAMPLES_JSON = os.path.join(GRADIO_DIR, 'examples/examples.json')
+
+# Queue estimates replay the worker's scheduling: the same tandem containers,
+# SCHEDULING_POLICY and TRAINING_POOL_SIZE (docker-compose passes the worker's
+# values to both services) and the worker's own scheduling.py from WORKER_DIR.
+# The snapshot behind the estimates is rebuilt every ETA_REFRESH_SECONDS.
+TANDEM_URLS = [url.strip() for url in os.environ.get("TANDEM_URLS", "").split(",") if url.strip()]
+TANDEM_SLOTS = len(TANDEM_URLS) or int(os.environ.get("TANDEM_SLOTS", "4"))
+SCHEDULING_POLICY = os.environ.get("SCHEDULING_POLICY", "fifo").strip().lower()
+TRAINING_POOL_SIZE = int(os.environ.get("TRAINING_POOL_SIZE", "1"))
+WORKER_DIR = os.path.join(ROOT_DIR, 'worker')
+ETA_REFRESH_SECONDS = 15
+
+# Pipeline stages of a tandem job, as named in user_log.jsonl, in run order.
+# Shared by the status panel and the per-stage cost model.
+STAGES = [
+    "Validating SAVs",
+    "Mapping SAVs to structures",
+    "Feature calculation",
+    "Model inferencing/Training",
+    "Summary",
+]
+
+# Stage-timing table built from finished jobs' user_log.jsonl files, and the
+# per-stage cost model fitted on it (see scripts/build_stage_timings.py).
+STAGE_TIMINGS_PATH = os.path.join(TANDEM_DIR, 'stage_timings.jsonl')
+STAGE_MODEL_PATH = os.path.join(TANDEM_DIR, 'stage_model.json')
+
+# Results pages are pushed updates by a shared job watcher (src/job_watcher.py);
+# this is how often (seconds) it checks watched jobs' user logs, and their
+# records when MongoDB change streams are unavailable.
+WATCH_INTERVAL_SECONDS = 2
+
+# Between pushes, a watched job's queue position and ETA text are refreshed on
+# a cadence derived from its state: a fraction of the time until its next
+# milestone (start when pending, finish when processing), clamped to these
+# bounds (seconds).
+REFRESH_ETA_FRACTION = 0.1
+REFRESH_MIN_SECONDS = 5
+REFRESH_MAX_SECONDS = 120
+
+# Pending/running counts shown on the status panel come from one shared
+# snapshot (src/queue_stats.py) rebuilt at most this often (seconds).
+QUEUE_STATS_REFRESH_SECONDS = 5
+
+# Prepared result bundles of finished jobs, shared by all viewers
+# (src/result_cache.py).
+RESULT_CACHE_MAX_ENTRIES = 128
+RESULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# MongoDB: one pooled client shared by the whole app (src/mongodb.py). Commands
+# slower than MONGODB_SLOW_QUERY_MS are logged with their call site.
+MONGODB_URI = os.environ.get("MONGODB_URI", "mongodb://mongodb:27017/")
+MONGODB_MAX_POOL_SIZE = int(os.environ.get("MONGODB_MAX_POOL_SIZE", "32"))
+MONGODB_MIN_POOL_SIZE = int(os.environ.get("MONGODB_MIN_POOL_SIZE", "2"))
+MONGODB_MAX_IDLE_MS = 5 * 60 * 1000
+MONGODB_TIMEOUT_MS = 5000
+MONGODB_SLOW_QUERY_MS = float(os.environ.get("MONGODB_SLOW_QUERY_MS", "100"))
@@ -0,0 +1,181 @@
+"""WebP derivatives of SHAP images, served with immutable HTTP caching.
+
+Each `tandem_shap/<SAV>.png` gets, once, a thumbnail and a display-sized WebP
+variant under `tandem_shap_derived/<variant>/<SAV>.webp`. The worker's
+post-finish pipeline writes them for new jobs; older jobs get them lazily on
+the first request. The original PNG is also servable as the `full` variant.
+
+URLs carry a version derived from the source PNG's content hash (or mtime and
+size), so a URL's content never changes and responses can be cached for a
+year (`immutable`). The `ETag` is a hash of the served file's content. For
+post-processed jobs, versions, hashes and existence checks all come from the
+job manifest (see `manifest`), and variants built here are recorded in it.
+"""
+
+import hashlib
+import html
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from urllib.parse import quote
+
+from PIL import Image
+
+from .manifest import file_entry, record_files
+from .settings import MOUNT_POINT
+
+SHAP_DIR = "tandem_shap"
+DERIVED_DIR = "tandem_shap_derived"
+VARIANTS = {"thumb": (320, 320), "display": (1024, 1024)}
+WEBP_QUALITY = 82
+MAX_CACHED_ETAGS = 4096
+PREFETCH_DISPLAY_ROWS = 2
+PREFETCH_THUMB_ROWS = 10
+
+_lock = threading.Lock()
+_etags = OrderedDict()  # (path, mtime_ns, size) -> quoted content hash
+_build_locks = {}
+
+
+def source_relpath(sav):
+    return f"{SHAP_DIR}/{sav}.png"
+
+
+def derivative_relpath(sav, variant):
+    return f"{DERIVED_DIR}/{variant}/{sav}.webp"
+
+
+def source_version(job_folder, sav):
+    """Short version tag of the source PNG, or None if it does not exist."""
+    entry = file_entry(job_folder, source_relpath(sav))
+    if entry is None:
+        return None
+    if entry.get("hash"):
+        return entry["hash"][:12]
+    return hashlib.blake2b(f"{entry['mtime']}:{entry['size']}".encode(), digest_size=6).hexdigest()
+
+
+def image_url(job_folder, sav, variant, version):
+    """URL of one variant of a SAV's SHAP image (see `get_variant`)."""
+    session_id = os.path.basename(os.path.dirname(os.path.normpath(job_folder)))
+    job_name = os.path.basename(os.path.normpath(job_folder))
+    parts = "/".join(quote(part, safe="") for part in (session_id, job_name, variant, sav))
+    return f"/{MOUNT_POINT}/shap/{parts}.webp?v={version}" if variant != "full" else f"/{MOUNT_POINT}/shap/{parts}.png?v={version}"
+
+
+def _is_current(job_folder, sav, variant):
+    source = file_entry(job_folder, source_relpath(sav))
+    target = file_entry(job_folder, derivative_relpath(sav, variant))
+    return source is not None and target is not None and target["mtime"] >= source["mtime"]
+
+
+def build_variant(job_folder, sav, variant):
+    """Write the WebP `variant` of a SAV's SHAP image if it is missing or older than the source."""
+    source = os.path.join(job_folder, source_relpath(sav))
+    target = os.path.join(job_folder, derivative_relpath(sav, variant))
+    if _is_current(job_folder, sav, variant):
+        return target
+
+    with _lock:
+        build_lock = _build_locks.setdefault(target, threading.Lock())
+    with build_lock:
+        if _is_current(job_folder, sav, variant):
+            return target
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".webp", dir=os.path.dirname(target))
+        os.close(fd)
+        try:
+            with Image.open(source) as image:
+                image.thumbnail(VARIANTS[variant])
+                image.save(tmp_path, format="WEBP", quality=WEBP_QUALITY, method=4)
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, target)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        record_files(job_folder, [derivative_relpath(sav, variant)])
+    with _lock:
+        _build_locks.pop(target, None)
+    return target
+
+
+def content_etag(job_folder, relpath):
+    """Quoted content hash of a job file: from the manifest, or hashed once per (path, mtime, size)."""
+    entry = file_entry(job_folder, relpath)
+    if entry is not None and entry.get("hash"):
+        return f'"{entry["hash"]}"'
+    path = os.path.join(job_folder, relpath)
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        etag = _etags.get(key)
+        if etag is not None:
+            _etags.move_to_end(key)
+            return etag
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 16), b""):
+            digest.update(chunk)
+    etag = f'"{digest.hexdigest()}"'
+    with _lock:
+        _etags[key] = etag
+        while len(_etags) > MAX_CACHED_ETAGS:
+            _etags.popitem(last=False)
+    return etag
+
+
+def get_variant(job_folder, sav, variant):
+    """Return (path, media type, ETag) of a SAV's SHAP image variant, or None.
+
+    Inputs:
+    - job_folder: job directory.
+    - sav: SAV name (the image file stem).
+    - variant: 'thumb', 'display' or 'full' (the original PNG).
+    """
+    if sav in {"", ".", ".."} or "/" in sav or "\\" in sav or "\0" in sav:
+        return None
+    if file_entry(job_folder, source_relpath(sav)) is None:
+        return None
+    if variant == "full":
+        return os.path.join(job_folder, source_relpath(sav)), "image/png", content_etag(job_folder, source_relpath(sav))
+    if variant not in VARIANTS:
+        return None
+    path = build_variant(job_folder, sav, variant)
+    return path, "image/webp", content_etag(job_folder, derivative_relpath(sav, variant))
+
+
+def build_viewer_html(job_folder, savs, index):
+    """Render the SHAP viewer for `savs[index]` and prefetch its neighbours.
+
+    The display variant of the selected SAV is shown over its thumbnail (so
+    a cached thumbnail appears at once) and links to the full PNG. Display
+    variants of the nearest rows and thumbnails of the rows around them are
+    requested by hidden images, so the next clicks hit the browser cache.
+    """
+    if not savs or not 0 <= index < len(savs):
+        return ""
+    sav = savs[index]
+    version = source_version(job_folder, sav)
+    if version is None:
+        return ""
+
+    prefetch = []
+    for position in range(max(index - PREFETCH_THUMB_ROWS, 0), min(index + PREFETCH_THUMB_ROWS + 1, len(savs))):
+        neighbour = savs[position]
+        neighbour_version = source_version(job_folder, neighbour) if position != index else None
+        if neighbour_version is None:
+            continue
+        variants = ("thumb", "display") if abs(position - index) <= PREFETCH_DISPLAY_ROWS else ("thumb",)
+        for variant in variants:
+            prefetch.append(f'<img src="{html.escape(image_url(job_folder, neighbour, variant, neighbour_version))}" alt="" decoding="async" hidden>')
+
+    thumb_url = html.escape(image_url(job_folder, sav, "thumb", version))
+    display_url = html.escape(image_url(job_folder, sav, "display", version))
+    full_url = html.escape(image_url(job_folder, sav, "full", version))
+    return (
+        f'<figure class="shap-viewer"><a href="{full_url}" target="_blank" rel="noopener">'
+        f'<img src="{display_url}" alt="SHAP values of {html.escape(sav)}" '
+        f'style="background:url(\'{thumb_url}\') center / contain no-repeat;"></a>'
+        f'<figcaption>{html.escape(sav)}</figcaption></figure>' + "".join(prefetch)
+    )
@@ -0,0 +1,215 @@
+"""Per-stage runtime model learned from finished jobs' `user_log.jsonl` timings.
+
+Every stage's closing `info` event carries a `duration_text`. Finished jobs are
+folded into a compact stage-timing table (one JSON line per job, see
+`scripts/build_stage_timings.py`), and a linear cost model is fitted per
+(mode, stage) on the SAV count, the protein count and the structure type:
+
+    seconds = b0 + b1 * n_savs + b2 * n_proteins + sum(b_s * [structure == s])
+
+The table doubles as a benchmark dataset for tandem pipeline regressions, and
+the fitted model is used for live "remaining time" estimates.
+"""
+
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from .logger import LOGGER
+from .settings import STAGE_MODEL_PATH, STAGES
+
+STRUCTURE_TYPES = ["auto", "file", "pdb", "af2"]
+FEATURES = ["intercept", "n_savs", "n_proteins"] + [f"str_{name}" for name in STRUCTURE_TYPES[1:]]
+MIN_SAMPLES = 5
+
+_DURATION_UNITS = {"h": 3600, "m": 60, "s": 1, "ms": 0.001}
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)\s*(ms|h|m|s)[a-z]*", re.I)
+_PDB_ID = re.compile(r"^[1-9][A-Za-z0-9]{3}$")
+
+_model_cache = {"mtime": None, "model": {}}
+
+
+def parse_duration_text(text):
+    """Convert a `duration_text` value to seconds.
+
+    Accepts plain numbers ("12.5"), unit strings ("1h 2m 3s", "4.2 sec",
+    "3 minutes", "120 ms") and clock strings ("01:02:03", "02:03.5").
+
+    Output:
+    - Float seconds, or None if the text cannot be parsed.
+    """
+    if isinstance(text, (int, float)):
+        return float(text)
+    text = str(text or "").strip().lower()
+    if not text:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        pass
+
+    if ":" in text:
+        try:
+            parts = [float(part) for part in text.split(":")]
+        except ValueError:
+            return None
+        seconds = 0.0
+        for part in parts:
+            seconds = seconds * 60 + part
+        return seconds
+
+    parts = _DURATION_PART.findall(text)
+    if not parts:
+        return None
+    return sum(float(value) * _DURATION_UNITS[unit.lower()] for value, unit in parts)
+
+
+def stage_durations(events):
+    """Return `{stage: seconds}` from the last timed `info` event of each stage."""
+    durations = {}
+    for event in events:
+        if event.get("level") != "info" or event.get("stage") not in STAGES:
+            continue
+        seconds = parse_duration_text((event.get("context") or {}).get("duration_text"))
+        if seconds is not None:
+            durations[event["stage"]] = seconds
+    return durations
+
+
+def read_userlog_events(userlog_path):
+    """Parse a `user_log.jsonl` file into a list of event dicts."""
+    events = []
+    with open(userlog_path, "r", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return events
+
+
+def structure_type(str_value):
+    """Classify a job's `STR` value as auto, file, pdb or af2."""
+    if not str_value:
+        return "auto"
+    str_value = str(str_value).strip()
+    if os.path.splitext(str_value)[1].lower() in {".pdb", ".cif"} or os.sep in str_value:
+        return "file"
+    if _PDB_ID.fullmatch(str_value):
+        return "pdb"
+    return "af2"
+
+
+def job_features(param):
+    """Extract the model features from a job record.
+
+    Output:
+    - Dict with `n_savs`, `n_proteins` and `structure`.
+    """
+    savs = param.get("SAV") or []
+    proteins = {str(sav).split()[0].upper() for sav in savs if str(sav).strip()}
+    return {
+        "n_savs": len(savs),
+        "n_proteins": len(proteins),
+        "structure": structure_type(param.get("STR")),
+    }
+
+
+def _feature_vector(features):
+    structure = features.get("structure", "auto")
+    return [1.0, float(features.get("n_savs", 0)), float(features.get("n_proteins", 1))] + [
+        1.0 if structure == name else 0.0 for name in STRUCTURE_TYPES[1:]
+    ]
+
+
+def fit_stage_model(rows):
+    """Fit one least-squares cost model per (mode, stage).
+
+    Input:
+    - rows: stage-timing table rows with `mode`, `n_savs`, `n_proteins`,
+      `structure` and `stages` ({stage: seconds}).
+
+    Output:
+    - JSON-serialisable dict `{mode: {stage: {coef, n, median, p95}}}`.
+      Groups with fewer than `MIN_SAMPLES` rows only keep their median.
+    """
+    grouped = {}
+    for row in rows:
+        for stage, seconds in (row.get("stages") or {}).items():
+            grouped.setdefault((row.get("mode"), stage), []).append((_feature_vector(row), seconds))
+
+    model = {}
+    for (mode, stage), samples in grouped.items():
+        X = np.array([sample[0] for sample in samples])
+        y = np.array([sample[1] for sample in samples])
+        entry = {
+            "n": len(samples),
+            "median": float(np.median(y)),
+            "p95": float(np.percentile(y, 95)),
+            "coef": None,
+        }
+        if len(samples) >= MIN_SAMPLES:
+            coef, *_ = np.linalg.lstsq(X, y, rcond=None)
+            entry["coef"] = [float(value) for value in coef]
+        model.setdefault(mode, {})[stage] = entry
+    return model
+
+
+def load_stage_model():
+    """Load the fitted model from `STAGE_MODEL_PATH`, reloading when it changes."""
+    try:
+        mtime = os.path.getmtime(STAGE_MODEL_PATH)
+    except OSError:
+        return {}
+    if _model_cache["mtime"] != mtime:
+        try:
+            with open(STAGE_MODEL_PATH, "r", encoding="utf-8") as handle:
+                _model_cache["model"] = json.load(handle).get("model", {})
+        except (OSError, ValueError) as exc:
+            LOGGER.warning(f"Failed to load stage model {STAGE_MODEL_PATH}: {exc}")
+            _model_cache["model"] = {}
+        _model_cache["mtime"] = mtime
+    return _model_cache["model"]
+
+
+def predict_stage_seconds(mode, stage, features, model=None):
+    """Predict one stage's run time in seconds, or None without a model."""
+    model = load_stage_model() if model is None else model
+    entry = model.get(mode, {}).get(stage)
+    if not entry:
+        return None
+    if entry.get("coef"):
+        seconds = float(np.dot(entry["coef"], _feature_vector(features)))
+        return max(seconds, 0.0)
+    return entry.get("median")
+
+
+def predict_job_seconds(mode, features, model=None):
+    """Predict a whole job's run time as the sum of its stages, or None."""
+    model = load_stage_model() if model is None else model
+    predictions = [predict_stage_seconds(mode, stage, features, model) for stage in STAGES]
+    predictions = [value for value in predictions if value is not None]
+    return sum(predictions) if predictions else None
+
+
+def remaining_stage_seconds(param, events, stage, now=None):
+    """Estimate the remaining time of the stage that is currently running.
+
+    The time already spent in `stage` is the wall time since `job_start`
+    minus the recorded durations of the stages that already finished.
+    """
+    job_start = param.get("job_start")
+    if not isinstance(job_start, (int, float)):
+        return None
+    predicted = predict_stage_seconds(param.get("mode"), stage, job_features(param))
+    if predicted is None:
+        return None
+    now = time.time() if now is None else now
+    done = sum(seconds for name, seconds in stage_durations(events).items() if name != stage)
+    return predicted - max(now - job_start - done, 0.0)
@@ -0,0 +1,131 @@
+"""End-to-end job tracing from submission to the first result view.
+
+A trace id is created when a job is submitted and stored on the job record as
+`trace_id`. Span timings are stored in compact form under `trace`, as
+`{span_name: [start, end]}` epoch seconds:
+
+- submit: input validation in the session page until the job is queued.
+- queue: queued until the worker claims the job (worker).
+- dispatch: claim until the request is sent to a tandem container (worker).
+- backend: tandem run, request sent until response received (worker).
+- finish: marking the job finished and writing params.json (worker).
+- first_view: job finished until results are first rendered for a viewer.
+"""
+
+import html
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from .logger import LOGGER
+from .mongodb import update_records
+from .stage_model import STAGES, stage_durations
+
+SPAN_ORDER = ["submit", "queue", "dispatch", "backend", "finish", "first_view"]
+
+MAX_RECORDED_FIRST_VIEWS = 1024
+
+_lock = threading.Lock()
+# Trace ids recently recorded by this process, least recently used first. It only
+# saves repeat updates from clients holding a stale record; the update's
+# `$exists: False` guard keeps it correct after eviction.
+_first_view_recorded = OrderedDict()
+
+
+def new_trace_id():
+    """Return a short random trace id."""
+    return uuid.uuid4().hex[:16]
+
+
+def record_first_view(param):
+    """Record the `first_view` span the first time a finished job is rendered.
+
+    The update only matches while the span is missing, so concurrent first
+    viewers record it once.
+    """
+    trace = param.get("trace") or {}
+    trace_id = param.get("trace_id")
+    if "first_view" in trace or not trace_id:
+        return
+    with _lock:
+        if trace_id in _first_view_recorded:
+            _first_view_recorded.move_to_end(trace_id)
+            return
+    job_end = param.get("job_end")
+    if not isinstance(job_end, (int, float)):
+        return
+    query = {
+        "session_id": param.get("session_id"),
+        "job_name": param.get("job_name"),
+        "trace.first_view": {"$exists": False},
+    }
+    try:
+        update_records(query, {"trace.first_view": [job_end, round(time.time(), 3)]})
+        with _lock:
+            _first_view_recorded[trace_id] = True
+            while len(_first_view_recorded) > MAX_RECORDED_FIRST_VIEWS:
+                _first_view_recorded.popitem(last=False)
+    except Exception as exc:
+        LOGGER.warning(f"Failed to record first view for trace {trace_id}: {exc}")
+
+
+def _format_seconds(seconds):
+    if seconds < 1:
+        return f"{seconds * 1000:.0f} ms"
+    if seconds < 120:
+        return f"{seconds:.1f} s"
+    return f"{seconds / 60:.1f} min"
+
+
+def build_waterfall_html(param, events=None):
+    """Render the stored spans of a job as a waterfall table.
+
+    Inputs:
+    - param: job record with `trace_id` and `trace`.
+    - events: optional user-log events; their stage durations are drawn as
+      consecutive sub-spans of the backend span.
+
+    Output:
+    - HTML string, or a short note when the job has no trace.
+    """
+    trace = (param or {}).get("trace") or {}
+    spans = [
+        (name, trace[name][0], trace[name][1])
+        for name in SPAN_ORDER
+        if isinstance(trace.get(name), (list, tuple)) and len(trace[name]) == 2
+    ]
+    if not spans:
+        return "<p>No trace recorded for this job.</p>"
+
+    durations = stage_durations(events or [])
+    rows = []
+    for name, start, end in spans:
+        rows.append((name, start, end))
+        if name == "backend":
+            cursor = start
+            for stage in STAGES:
+                if stage in durations:
+                    rows.append((f"  {stage}", cursor, cursor + durations[stage]))
+                    cursor += durations[stage]
+
+    origin = min(start for _, start, _ in rows)
+    total = max(max(end for _, _, end in rows) - origin, 1e-6)
+    body = []
+    for name, start, end in rows:
+        offset = (start - origin) / total * 100
+        width = max((end - start) / total * 100, 0.3)
+        body.append(
+            "<tr><td style='white-space:pre'>{}</td><td style='width:70%'>"
+            "<div style='position:relative;height:12px;background:rgba(127,127,127,0.12)'>"
+            "<div style='position:absolute;left:{:.2f}%;width:{:.2f}%;height:100%;background:#4f7cff'></div>"
+            "</div></td><td style='text-align:right;white-space:nowrap'>{}</td></tr>".format(
+                html.escape(name), offset, width, _format_seconds(end - start),
+            )
+        )
+    return (
+        "<div class='trace-waterfall'><p><strong>Trace</strong> {} · total {}</p>"
+        "<table style='width:100%'>{}</table></div>".format(
+            html.escape(str(param.get("trace_id", "-"))), _format_seconds(total), "".join(body),
+        )
+    )
@@ -7,15 +7,10 @@ import gradio as gr
 import numpy as np
 from io import StringIO
 from datetime import datetime
-from pymongo import MongoClient
 from .logger import LOGGER
 from .settings import TAIPEI_TIME_ZONE
 from .request import request2info
 
-client = MongoClient("mongodb://mongodb:27017/")
-db = client["app_db"]
-collections = db["input_queue"]
-
 VALID_AA = set("ACDEFGHIKLMNPQRSTVWY")
 INF_PATTERN = re.compile(r"^(?P<acc>\S+)\s+(?P<wt>[ACDEFGHIKLMNPQRSTVWY])(?P<resid>[0-9]+)(?P<mt>[ACDEFGHIKLMNPQRSTVWY])$")
 TL_PATTERN = re.compile(r"^(?P<acc>\S+)\s+(?P<wt>[ACDEFGHIKLMNPQRSTVWY])(?P<resid>[0-9]+)(?P<mt>[ACDEFGHIKLMNPQRSTVWY])\s+(?P<label>[01])$")
@@ -0,0 +1,148 @@
+"""Shared incremental reader for jobs' `user_log.jsonl` files.
+
+Each job folder gets one process-wide entry holding the parsed events, the
+byte offset read so far and the file's inode. A read only parses the lines
+appended since the previous read, so every viewer of a running job shares one
+event buffer and the cost of a refresh is proportional to the new lines.
+
+A file that shrinks (truncated) or whose inode changes (rotated or rewritten)
+is re-read from the start. A trailing line without a newline is left for the
+next read, since the writer may still be appending it.
+
+Events are also indexed per stage as they are ingested (see `index_events`),
+so the status panel renders in O(stages) however many warnings a job logs.
+"""
+
+import itertools
+import json
+import os
+import threading
+from collections import OrderedDict
+
+USERLOG_NAME = "user_log.jsonl"
+MAX_TAILED_JOBS = 256
+
+_lock = threading.Lock()
+_tails = OrderedDict()  # userlog path -> tail entry, least recently used first
+# Versions come from one process-wide counter, so a tail evicted and recreated
+# never hands out a version a client already holds for different events.
+_versions = itertools.count(1)
+
+
+def _new_tail():
+    return {"inode": None, "offset": 0, "mtime": None, "version": 0, "events": [], "index": {}, "lock": threading.Lock()}
+
+
+def _stage_record():
+    return {"info": None, "important": None, "warning": [], "error": []}
+
+
+def index_events(events, index=None):
+    """Fold events into a per-stage index.
+
+    Inputs:
+    - events: iterable of user-log event dicts, in file order.
+    - index: existing index to extend in place, or None for a new one.
+
+    Output:
+    - Dict `{stage: {"info", "important", "warning", "error"}}` holding the
+      last info and important events and the lists of warning and error
+      events of each stage.
+    """
+    index = {} if index is None else index
+    for event in events:
+        level = event.get("level")
+        if level not in {"info", "important", "warning", "error"}:
+            continue
+        record = index.get(event.get("stage"))
+        if record is None:
+            record = index[event.get("stage")] = _stage_record()
+        if level in {"warning", "error"}:
+            record[level].append(event)
+        else:
+            record[level] = event
+    return index
+
+
+def _get_tail(path):
+    with _lock:
+        tail = _tails.get(path)
+        if tail is None:
+            tail = _tails[path] = _new_tail()
+        _tails.move_to_end(path)
+        while len(_tails) > MAX_TAILED_JOBS:
+            _tails.popitem(last=False)
+        return tail
+
+
+def _parse_lines(chunk):
+    events = []
+    for line in chunk.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            events.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return events
+
+
+def _catch_up(path, tail):
+    """Read the lines appended to `path` since the last call. Caller holds `tail["lock"]`."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        if tail["inode"] is not None:
+            tail.update(inode=None, offset=0, mtime=None, events=[], index={})
+            tail["version"] = next(_versions)
+        return
+
+    if stat.st_ino == tail["inode"] and stat.st_mtime_ns == tail["mtime"] and stat.st_size == tail["offset"]:
+        return
+
+    if stat.st_ino != tail["inode"] or stat.st_size < tail["offset"]:
+        # New, rotated or truncated file: start over with a fresh buffer.
+        tail.update(inode=stat.st_ino, offset=0, events=[], index={})
+        tail["version"] = next(_versions)
+
+    with open(path, "rb") as handle:
+        handle.seek(tail["offset"])
+        chunk = handle.read(stat.st_size - tail["offset"])
+    complete = chunk.rfind(b"\n") + 1
+    if complete:
+        new_events = _parse_lines(chunk[:complete].decode("utf-8", errors="replace"))
+        tail["offset"] += complete
+        if new_events:
+            tail["events"].extend(new_events)
+            index_events(new_events, tail["index"])
+            tail["version"] = next(_versions)
+    tail["mtime"] = stat.st_mtime_ns
+
+
+def read_userlog(job_folder):
+    """Return the shared, up-to-date user-log state of a job.
+
+    Input:
+    - job_folder: path to the job directory that contains user_log.jsonl.
+
+    Output:
+    - Dict with `version` (changes whenever events change), `events` (the
+      shared list of parsed event dicts) and `index` (see `index_events`), or
+      an empty dict if the job has no user log yet. Callers must not modify
+      the shared events or index.
+    """
+    if not job_folder:
+        return {}
+    path = os.path.join(job_folder, USERLOG_NAME)
+    tail = _get_tail(path)
+    with tail["lock"]:
+        _catch_up(path, tail)
+        if tail["inode"] is None:
+            return {}
+        return {"version": tail["version"], "events": tail["events"], "index": tail["index"]}
+
+
+def read_events(job_folder):
+    """Return the parsed events of a job's user log (shared list, read-only)."""
+    return read_userlog(job_folder).get("events", [])
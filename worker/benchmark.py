@@ -0,0 +1,161 @@
+"""End-to-end throughput benchmark for the worker against fake tandem containers.
+
+Starts `--containers` fake tandem servers (see `fake_tandem.py`) on local
+ports, seeds `--jobs` pending jobs into a scratch database of a local
+`mongod`, runs the real worker loop (`main.run`) until every job is finished,
+and reports:
+
+- jobs per second, from the first submission to the last `job_end`;
+- claim latency, the duration of each `claim_pending_job` call;
+- queue wait, from submission to the final claim of each job;
+- failure-recovery time, from an injected backend failure until the same job
+  is claimed again.
+
+Runs on a laptop without GPU; only a local mongod is required:
+
+    docker run --rm -p 27017:27017 mongo:8
+    python benchmark.py --jobs 200 --containers 4 --latency uniform:0.2,1 --failure-rate 0.05
+"""
+
+import argparse
+import importlib
+import os
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+from pymongo import MongoClient
+
+from fake_tandem import make_server
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(round(q / 100 * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def seed_jobs(collection, n_jobs, rng_seed):
+    collection.delete_many({})
+    now = time.time()
+    docs = []
+    for index in range(n_jobs):
+        n_savs = 1 + (index * 7 + rng_seed) % 40
+        docs.append({
+            "session_id": f"bench{index % 10}",
+            "job_name": f"job{index:05d}",
+            "status": "pending",
+            "mode": "Training" if index % 5 == 0 else "Inferencing",
+            "SAV": [f"P{index:05d} A{k + 1}C" for k in range(n_savs)],
+            "submission_timestamp": now,
+            "trace_id": f"bench{index:05d}",
+        })
+    collection.insert_many(docs)
+    return now
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the worker against fake tandem containers.")
+    parser.add_argument("--mongo-uri", default="mongodb://localhost:27017/", help="Local mongod URI.")
+    parser.add_argument("--db", default="tandem_bench", help="Scratch database; its input_queue is cleared. Default: tandem_bench")
+    parser.add_argument("--jobs", type=int, default=100, help="Number of jobs. Default: 100")
+    parser.add_argument("--containers", type=int, default=4, help="Fake tandem containers. Default: 4")
+    parser.add_argument("--latency", default="uniform:0.2,1", help="Fake latency spec. Default: uniform:0.2,1")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Injected failure rate. Default: 0")
+    parser.add_argument("--poll-seconds", type=float, default=0.1, help="Worker poll interval. Default: 0.1")
+    parser.add_argument("--policy", default="fifo", help="Worker SCHEDULING_POLICY. Default: fifo")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed. Default: 0")
+    parser.add_argument("--timeout", type=float, default=600, help="Give up after this many seconds. Default: 600")
+    args = parser.parse_args()
+
+    jobs_folder = tempfile.mkdtemp(prefix="tandem_bench_")
+    servers = []
+    urls = []
+    for index in range(args.containers):
+        port = free_port()
+        server, state = make_server(port, jobs_folder, args.latency, args.failure_rate, seed=args.seed + index)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append((server, state))
+        urls.append(f"http://127.0.0.1:{port}/run_tandem_job")
+
+    os.environ.update({
+        "MONGO_URI": args.mongo_uri,
+        "MONGO_DB": args.db,
+        "JOBS_FOLDER": jobs_folder,
+        "TANDEM_URLS": ",".join(urls),
+        "POLL_INTERVAL_SECONDS": str(args.poll_seconds),
+        "SCHEDULING_POLICY": args.policy,
+    })
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    worker = importlib.import_module("main")
+    worker.LOGGER.verbosity = "warning"
+
+    collection = MongoClient(args.mongo_uri)[args.db]["input_queue"]
+    submitted = seed_jobs(collection, args.jobs, args.seed)
+
+    claim_latencies = []
+    claims = []  # (job key, claim time)
+    claim_pending_job = worker.claim_pending_job
+
+    def timed_claim(tandem_url, inflight):
+        start = time.perf_counter()
+        task = claim_pending_job(tandem_url, inflight)
+        claim_latencies.append(time.perf_counter() - start)
+        if task:
+            claims.append((f"{task['session_id']}/{task['job_name']}", time.time()))
+        return task
+
+    worker.claim_pending_job = timed_claim
+
+    stop_event = threading.Event()
+    worker_thread = threading.Thread(target=worker.run, args=(stop_event,), daemon=True)
+    worker_thread.start()
+
+    deadline = time.time() + args.timeout
+    while time.time() < deadline:
+        if collection.count_documents({"status": "finished"}) >= args.jobs:
+            break
+        time.sleep(0.2)
+    stop_event.set()
+    worker_thread.join()
+    for server, _ in servers:
+        server.shutdown()
+
+    finished = list(collection.find({"status": "finished"}, {"_id": 0, "job_start": 1, "job_end": 1}))
+    if not finished:
+        print("No job finished before the timeout.")
+        return 1
+    elapsed = max(record["job_end"] for record in finished) - submitted
+    waits = [record["job_start"] - submitted for record in finished]
+
+    failures = [failure for _, state in servers for failure in state.failures]
+    recoveries = []
+    for key, failed_at in failures:
+        reclaimed = [claimed_at for claim_key, claimed_at in claims if claim_key == key and claimed_at >= failed_at]
+        if reclaimed:
+            recoveries.append(min(reclaimed) - failed_at)
+
+    print(f"jobs finished      {len(finished)}/{args.jobs} in {elapsed:.2f}s")
+    print(f"throughput         {len(finished) / elapsed:.2f} jobs/s")
+    print(f"claim latency      p50 {percentile(claim_latencies, 50) * 1000:.2f} ms, "
+          f"p95 {percentile(claim_latencies, 95) * 1000:.2f} ms ({len(claim_latencies)} calls)")
+    print(f"queue wait         p50 {percentile(waits, 50):.2f}s, p95 {percentile(waits, 95):.2f}s")
+    if failures:
+        mean_recovery = statistics.mean(recoveries) if recoveries else float("nan")
+        print(f"failure recovery   {len(failures)} failure(s), mean {mean_recovery:.2f}s, "
+              f"p95 {percentile(recoveries, 95):.2f}s")
+    return 0 if len(finished) >= args.jobs else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
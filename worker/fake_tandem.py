@@ -0,0 +1,165 @@
+"""Lightweight stand-in for the tandem inference container.
+
+Implements the two endpoints the worker uses:
+
+- GET /available: 200 when idle, 503 while a job is running.
+- POST /run_tandem_job: sleeps for a sampled latency, writes the stage events
+  of a real run to `<jobs_folder>/<session_id>/<job_name>/user_log.jsonl`, and
+  answers 200, or 500 with probability `failure_rate`.
+
+Latency specs: `const:SECONDS`, `uniform:LOW,HIGH`, `exp:MEAN`,
+`lognormal:MU,SIGMA` (of the underlying normal, in log-seconds), or `per_sav:BASE,PER_SAV`.
+No GPU, TensorFlow or network access is needed.
+
+Example:
+
+    python fake_tandem.py --port 5000 --latency uniform:1,4 --failure-rate 0.05
+"""
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from logger import LOGGER
+
+STAGES = [
+    "Validating SAVs",
+    "Mapping SAVs to structures",
+    "Feature calculation",
+    "Model inferencing/Training",
+    "Summary",
+]
+STAGE_WEIGHTS = [0.05, 0.25, 0.5, 0.15, 0.05]
+
+
+def latency_sampler(spec, rng):
+    """Build a `sampler(task) -> seconds` function from a latency spec string."""
+    kind, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(",") if value.strip()]
+    if kind == "const":
+        return lambda task: values[0]
+    if kind == "uniform":
+        return lambda task: rng.uniform(values[0], values[1])
+    if kind == "exp":
+        return lambda task: rng.expovariate(1 / values[0])
+    if kind == "lognormal":
+        return lambda task: rng.lognormvariate(values[0], values[1])
+    if kind == "per_sav":
+        return lambda task: values[0] + values[1] * len(task.get("SAV") or [])
+    raise ValueError(f"Unknown latency spec: {spec!r}")
+
+
+class FakeTandem:
+    """State shared by the request handlers of one fake container."""
+
+    def __init__(self, jobs_folder, latency="uniform:1,3", failure_rate=0.0, seed=None):
+        self.jobs_folder = jobs_folder
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.sample_latency = latency_sampler(latency, self.rng)
+        self.lock = threading.Lock()
+        self.busy = False
+        self.failures = []  # (job key, failure time)
+        self.completed = 0
+
+    def run_job(self, task):
+        """Simulate one job; return True on success."""
+        with self.lock:
+            latency = self.sample_latency(task)
+            fail = self.rng.random() < self.failure_rate
+
+        job_folder = os.path.join(self.jobs_folder, task.get("session_id", ""), task.get("job_name", ""))
+        os.makedirs(job_folder, exist_ok=True)
+        n_stages = self.rng.randint(1, len(STAGES) - 1) if fail else len(STAGES)
+        with open(os.path.join(job_folder, "user_log.jsonl"), "w", encoding="utf-8") as handle:
+            for stage, weight in list(zip(STAGES, STAGE_WEIGHTS))[:n_stages]:
+                seconds = latency * weight
+                time.sleep(seconds)
+                event = {
+                    "stage": stage,
+                    "level": "info",
+                    "message": f"{stage} done",
+                    "context": {"duration_text": f"{seconds:.2f}s"},
+                }
+                handle.write(json.dumps(event) + "\n")
+                handle.flush()
+
+        if fail:
+            with self.lock:
+                self.failures.append((f"{task.get('session_id')}/{task.get('job_name')}", time.time()))
+            return False
+        with self.lock:
+            self.completed += 1
+        return True
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/available":
+                return self._reply(404, {"error": "not found"})
+            return self._reply(503 if state.busy else 200, {"busy": state.busy})
+
+        def do_POST(self):
+            if self.path.split("?")[0] != "/run_tandem_job":
+                return self._reply(404, {"error": "not found"})
+            length = int(self.headers.get("Content-Length", 0))
+            task = json.loads(self.rfile.read(length) or b"{}")
+            with state.lock:
+                if state.busy:
+                    return self._reply(503, {"error": "busy"})
+                state.busy = True
+            try:
+                ok = state.run_job(task)
+            finally:
+                state.busy = False
+            if ok:
+                return self._reply(200, {"status": "finished"})
+            return self._reply(500, {"error": "injected failure"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def make_server(port, jobs_folder, latency="uniform:1,3", failure_rate=0.0, seed=None, host="127.0.0.1"):
+    """Create a fake tandem HTTP server; call `serve_forever()` to start it.
+
+    Output:
+    - (server, state) where `state` is the `FakeTandem` holding counters.
+    """
+    state = FakeTandem(jobs_folder, latency=latency, failure_rate=failure_rate, seed=seed)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake tandem container for worker load tests.")
+    parser.add_argument("--host", default="0.0.0.0", help="Bind address. Default: 0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000, help="Port. Default: 5000")
+    parser.add_argument("--jobs-folder", default=os.environ.get("JOBS_FOLDER", "/tandem/jobs"), help="Jobs root folder.")
+    parser.add_argument("--latency", default="uniform:1,3", help="Latency spec. Default: uniform:1,3")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability of a 500 answer. Default: 0")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed.")
+    args = parser.parse_args()
+
+    server, _ = make_server(args.port, args.jobs_folder, args.latency, args.failure_rate, args.seed, args.host)
+    LOGGER.info(f"Fake tandem listening on {args.host}:{args.port} (latency {args.latency}, failure rate {args.failure_rate})")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -12,13 +12,15 @@ import requests
 from pymongo import MongoClient, ReturnDocument
 
 from logger import LOGGER
+from postprocess import postprocess_job
+from scheduling import POLICIES, pool_modes, select_job
 
 
 TANDEM_WEBSITE_ROOT = os.path.dirname(os.path.dirname(__file__))  # ./tandem_website
-jobs_folder = os.path.join(TANDEM_WEBSITE_ROOT, "tandem/jobs")
+jobs_folder = os.environ.get("JOBS_FOLDER", os.path.join(TANDEM_WEBSITE_ROOT, "tandem/jobs"))
 
-client = MongoClient("mongodb://mongodb:27017/")
-db = client["app_db"]
+client = MongoClient(os.environ.get("MONGO_URI", "mongodb://mongodb:27017/"))
+db = client[os.environ.get("MONGO_DB", "app_db")]
 collections = db["input_queue"]
 
 time_zone = ZoneInfo("Asia/Taipei")
@@ -34,6 +36,16 @@ TANDEM_URLS = [
 if not TANDEM_URLS:
     TANDEM_URLS = [DEFAULT_TANDEM_URL]
 
+SCHEDULING_POLICY = os.environ.get("SCHEDULING_POLICY", "fifo").strip().lower()
+if SCHEDULING_POLICY not in POLICIES:
+    raise ValueError(f"SCHEDULING_POLICY must be one of {POLICIES}, got {SCHEDULING_POLICY!r}")
+TRAINING_POOL_SIZE = int(os.environ.get("TRAINING_POOL_SIZE", "1"))
+CONTAINER_MODES = pool_modes(TANDEM_URLS, TRAINING_POOL_SIZE)
+
+# Processes building the predictions file, SHAP image variants and manifest of
+# finished jobs (see postprocess.py).
+POSTPROCESS_WORKERS = int(os.environ.get("POSTPROCESS_WORKERS", "2"))
+
 
 def available_url(tandem_url):
     parsed = urlparse(tandem_url)
@@ -52,11 +64,30 @@ def container_is_available(tandem_url, inflight):
         return False
 
 
-def claim_pending_job(tandem_url):
+def select_pending_id(tandem_url, inflight):
+    """Choose the `_id` of the next pending job under `SCHEDULING_POLICY`."""
+    pending = list(collections.find(
+        {"status": "pending"},
+        {"_id": 1, "session_id": 1, "mode": 1, "n_savs": {"$size": {"$ifNull": ["$SAV", []]}}},
+        sort=[("_id", 1)],
+    ))
+    running = [slot["task"] for slot in inflight.values()]
+    job = select_job(SCHEDULING_POLICY, pending, running, CONTAINER_MODES.get(tandem_url))
+    return job["_id"] if job else None
+
+
+def claim_pending_job(tandem_url, inflight):
+    query = {"status": "pending"}
+    if SCHEDULING_POLICY != "fifo":
+        job_id = select_pending_id(tandem_url, inflight)
+        if job_id is None:
+            return None
+        query["_id"] = job_id
+
     job_start = time.time()
     job_start_str = datetime.now(time_zone).strftime("%Y-%m-%d_%H-%M-%S")
     return collections.find_one_and_update(
-        {"status": "pending"},
+        query,
         {
             "$set": {
                 "status": "processing",
@@ -64,38 +95,62 @@ def claim_pending_job(tandem_url):
                 "job_start_str": job_start_str,
                 "worker_id": WORKER_ID,
                 "tandem_url": tandem_url,
-            }
+            },
+            "$inc": {"rev": 1},
         },
         sort=[("_id", 1)],
         return_document=ReturnDocument.BEFORE,
     )
 
 
-def dispatch_job(task, tandem_url):
+def dispatch_job(task, tandem_url, timings):
+    """Send one claimed job to a tandem container and wait for it to finish.
+
+    `timings` holds the `claimed` time and receives the `sent` and `received`
+    epoch seconds of the request, used for the trace spans.
+    """
     task_to_send = copy.deepcopy(task)
     task_to_send.pop("_id", None)
-    response = requests.post(tandem_url, json=task_to_send)
+    headers = {"X-Trace-Id": task.get("trace_id") or ""}
+    timings["sent"] = time.time()
+    try:
+        response = requests.post(tandem_url, json=task_to_send, headers=headers)
+    finally:
+        timings["received"] = time.time()
     response.raise_for_status()
     return response.json()
 
 
-def mark_finished(task):
+def trace_spans(task, timings, end):
+    """Return the worker's trace spans as `$set` fields for the job document."""
+    claimed = timings["claimed"]
+    sent = timings.get("sent", claimed)
+    received = timings.get("received", end)
+    submitted = task.get("submission_timestamp") or claimed
+    return {
+        "trace.queue": [round(submitted, 3), round(claimed, 3)],
+        "trace.dispatch": [round(claimed, 3), round(sent, 3)],
+        "trace.backend": [round(sent, 3), round(received, 3)],
+        "trace.finish": [round(received, 3), round(end, 3)],
+    }
+
+
+def mark_finished(task, timings):
     session_id = task.get("session_id")
     job_name = task.get("job_name")
     job_end = time.time()
     job_end_str = datetime.now(time_zone).strftime("%Y-%m-%d_%H-%M-%S")
 
-    collections.update_one(
-        {"_id": task["_id"]},
-        {"$set": {"status": "finished", "job_end": job_end, "job_end_str": job_end_str}},
-    )
+    values = {"status": "finished", "job_end": job_end, "job_end_str": job_end_str}
+    values.update(trace_spans(task, timings, job_end))
+    collections.update_one({"_id": task["_id"]}, {"$set": values, "$inc": {"rev": 1}})
 
     updated_task = collections.find_one({"_id": task["_id"]}, {"_id": 0})
     params_path = os.path.join(jobs_folder, session_id, job_name, "params.json")
     with open(params_path, "w") as f:
         json.dump(updated_task, f, indent=4)
 
-    LOGGER.info(f"✅ Finished job {session_id}/{job_name}")
+    LOGGER.info(f"✅ Finished job {session_id}/{job_name} (trace {task.get('trace_id')})")
 
 
 def return_to_pending(task):
@@ -111,55 +166,90 @@ def return_to_pending(task):
                 "worker_id": "",
                 "tandem_url": "",
             },
+            "$inc": {"rev": 1},
         },
     )
 
 
-def handle_done_slot(tandem_url, slot):
+def submit_postprocess(postprocess_pool, task):
+    """Queue the artifact pipeline of a finished job; failures are only logged.
+
+    On success the record gets `postprocessed` and a `rev` bump, so open
+    results pages re-render from the new manifest and precomputed artifacts.
+    """
+    session_id = task.get("session_id")
+    job_name = task.get("job_name")
+    job_folder = os.path.join(jobs_folder, session_id, job_name)
+
+    def log_outcome(future):
+        try:
+            seconds = future.result()
+            collections.update_one({"_id": task["_id"]}, {"$set": {"postprocessed": time.time()}, "$inc": {"rev": 1}})
+            LOGGER.info(f"Post-processed {session_id}/{job_name} in {seconds:.1f}s")
+        except Exception:
+            LOGGER.warning(f"Post-processing failed for {session_id}/{job_name}: {traceback.format_exc()}")
+
+    postprocess_pool.submit(postprocess_job, job_folder).add_done_callback(log_outcome)
+
+
+def handle_done_slot(tandem_url, slot, postprocess_pool=None):
     task = slot["task"]
     session_id = task.get("session_id")
     job_name = task.get("job_name")
 
     try:
         slot["future"].result()
-        mark_finished(task)
+        mark_finished(task, slot["timings"])
     except Exception:
         LOGGER.warning(traceback.format_exc())
         LOGGER.warning(f"Job failed, returning to pending: {session_id}/{job_name}")
         return_to_pending(task)
+        return
     finally:
         LOGGER.info(f"Released Tandem container: {tandem_url}")
 
+    if postprocess_pool is not None:
+        try:
+            submit_postprocess(postprocess_pool, task)
+        except RuntimeError as exc:  # pool broken or shutting down
+            LOGGER.warning(f"Cannot post-process {session_id}/{job_name}: {exc}")
+
 
 def fill_free_slots(executor, inflight):
     for tandem_url in TANDEM_URLS:
         if not container_is_available(tandem_url, inflight):
             continue
 
-        task = claim_pending_job(tandem_url)
+        task = claim_pending_job(tandem_url, inflight)
         if not task:
             continue
+        timings = {"claimed": time.time()}
 
         session_id = task.get("session_id")
         job_name = task.get("job_name")
-        LOGGER.info(f"🚀 Dispatching job {session_id}/{job_name} to {tandem_url}")
+        LOGGER.info(f"🚀 Dispatching job {session_id}/{job_name} to {tandem_url} (trace {task.get('trace_id')})")
 
         inflight[tandem_url] = {
             "task": task,
-            "future": executor.submit(dispatch_job, task, tandem_url),
+            "timings": timings,
+            "future": executor.submit(dispatch_job, task, tandem_url, timings),
         }
 
 
-def main():
-    LOGGER.info(f"Worker started with Tandem containers: {TANDEM_URLS}")
+def run(stop_event=None):
+    """Run the worker loop until `stop_event` (a threading.Event) is set."""
+    LOGGER.info(f"Worker started with Tandem containers: {TANDEM_URLS} (policy: {SCHEDULING_POLICY})")
+    # Job lookups (results-page revision checks, claims by id) go through this index.
+    collections.create_index([("session_id", 1), ("job_name", 1)])
 
     inflight = {}
-    with concurrent.futures.ThreadPoolExecutor(max_workers=len(TANDEM_URLS)) as executor:
-        while True:
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(TANDEM_URLS)) as executor, \
+            concurrent.futures.ProcessPoolExecutor(max_workers=POSTPROCESS_WORKERS) as postprocess_pool:
+        while stop_event is None or not stop_event.is_set():
             for tandem_url, slot in list(inflight.items()):
                 if slot["future"].done():
                     inflight.pop(tandem_url)
-                    handle_done_slot(tandem_url, slot)
+                    handle_done_slot(tandem_url, slot, postprocess_pool)
 
             fill_free_slots(executor, inflight)
 
@@ -168,6 +258,15 @@ def main():
 
             time.sleep(POLL_INTERVAL_SECONDS)
 
+        # Stopping: let in-flight jobs finish and record their outcome.
+        concurrent.futures.wait([slot["future"] for slot in inflight.values()])
+        for tandem_url, slot in inflight.items():
+            handle_done_slot(tandem_url, slot, postprocess_pool)
+
+
+def main():
+    run()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,183 @@
+"""Post-finish artifact pipeline for finished jobs.
+
+After `mark_finished`, the worker hands the job folder to a process pool that
+precomputes what the results page used to build inside Gradio callbacks on the
+first view:
+
+- predictions.columns.json: `Main_Predictions.txt` without the SAVs that have
+  no prediction, with a 1-based `#` column, stored column by column.
+- tandem_shap_derived/: WebP thumbnail and display variants of the SHAP images
+  of predicted SAVs, served by the web app's `/shap` route.
+- manifest.json: what was built, and every file of the job folder with its
+  size, mtime and content hash (read by gradio_app/src/manifest.py).
+
+Files are written under a temporary name and renamed, so readers never see a
+partial file. (Downloads are streamed by the web app, not prebuilt here.)
+
+Every step is skipped when its input is missing (failed jobs, Training jobs
+without predictions), and the page falls back to its own computation for jobs
+without a manifest.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from PIL import Image
+
+from logger import LOGGER
+
+MANIFEST_NAME = "manifest.json"
+PREDICTIONS_NAME = "predictions.columns.json"
+# Must match gradio_app/src/shap_images.py.
+DERIVED_DIR = "tandem_shap_derived"
+VARIANTS = {"thumb": (320, 320), "display": (1024, 1024)}
+WEBP_QUALITY = 82
+
+
+def _write_atomic(path, write):
+    """Call `write(tmp_path)` and move the result to `path` in one rename."""
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.chmod(tmp_path, 0o644)  # mkstemp creates 0600; the web app reads these files
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _column_values(values):
+    """Return a column as ints or floats when every value parses, else as strings."""
+    for cast in (int, float):
+        try:
+            return [cast(value) for value in values]
+        except ValueError:
+            continue
+    return values
+
+
+def build_predictions(job_folder):
+    """Write the predicted rows of `Main_Predictions.txt` column by column.
+
+    Output:
+    - Name of the written file and the predicted SAVs, or (None, []) when the
+      job has no predictions.
+    """
+    source = os.path.join(job_folder, "Main_Predictions.txt")
+    if not os.path.exists(source):
+        return None, []
+
+    with open(source, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        rows = [row for row in reader if row]
+
+    prediction_idx = [i for i, name in enumerate(header) if name != "SAV"]
+    if prediction_idx:
+        rows = [row for row in rows if any(row[i].strip() != "Not available" for i in prediction_idx if i < len(row))]
+
+    columns = ["#"] + header
+    data = [list(range(1, len(rows) + 1))]
+    data += [_column_values([row[i] if i < len(row) else "" for row in rows]) for i in range(len(header))]
+
+    def write(tmp_path):
+        with open(tmp_path, "w") as f:
+            json.dump({"columns": columns, "data": data}, f)
+
+    _write_atomic(os.path.join(job_folder, PREDICTIONS_NAME), write)
+    savs = data[columns.index("SAV")] if "SAV" in columns else []
+    return PREDICTIONS_NAME, savs
+
+
+def build_shap_derivatives(job_folder, savs):
+    """Write the WebP variants of the SHAP images of `savs` into `tandem_shap_derived/<variant>/`.
+
+    Output:
+    - Sorted image names that have a SHAP image (and its variants).
+    """
+    shap_dir = os.path.join(job_folder, "tandem_shap")
+    if not os.path.isdir(shap_dir):
+        return []
+    for variant in VARIANTS:
+        os.makedirs(os.path.join(job_folder, DERIVED_DIR, variant), exist_ok=True)
+
+    wanted = set(savs)
+    images = []
+    for image_name in sorted(os.listdir(shap_dir)):
+        sav_name, ext = os.path.splitext(image_name)
+        if sav_name not in wanted or ext.lower() != ".png":
+            continue
+        try:
+            with Image.open(os.path.join(shap_dir, image_name)) as image:
+                image.load()
+                for variant, size in VARIANTS.items():
+                    resized = image.copy()
+                    resized.thumbnail(size)
+                    _write_atomic(
+                        os.path.join(job_folder, DERIVED_DIR, variant, f"{sav_name}.webp"),
+                        lambda tmp_path: resized.save(tmp_path, format="WEBP", quality=WEBP_QUALITY, method=4),
+                    )
+        except OSError as exc:
+            LOGGER.warning(f"Cannot make WebP variants of {image_name}: {exc}")
+            continue
+        images.append(image_name)
+    return images
+
+
+def _file_hash(path):
+    """Hex content hash of a file (must match `file_hash` in gradio_app/src/manifest.py)."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest(job_folder, built):
+    """Write `manifest.json` from the built outputs and the job folder's files.
+
+    Every file is listed with its size, mtime and content hash, so the web
+    app never has to probe the folder of a post-processed job.
+    """
+    files = {}
+    for root, dirs, names in os.walk(job_folder):
+        dirs[:] = [name for name in dirs if not name.startswith(".tmp-")]
+        for name in names:
+            if root == job_folder and name == MANIFEST_NAME or name.startswith(".tmp-"):
+                continue
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            relpath = "/".join(os.path.relpath(path, job_folder).split(os.sep))
+            files[relpath] = {"size": stat.st_size, "mtime": stat.st_mtime, "hash": _file_hash(path)}
+
+    manifest = {"created": time.time(), **built, "files": dict(sorted(files.items()))}
+
+    def write(tmp_path):
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=1)
+
+    _write_atomic(os.path.join(job_folder, MANIFEST_NAME), write)
+    return manifest
+
+
+def postprocess_job(job_folder):
+    """Run the whole pipeline for one finished job (executed in a worker process).
+
+    Output:
+    - Seconds spent.
+    """
+    started = time.time()
+    predictions, savs = build_predictions(job_folder)
+    images = build_shap_derivatives(job_folder, savs) if predictions else []
+    build_manifest(job_folder, {
+        "predictions": predictions,
+        "shap_images": images,
+        "shap_derivatives": DERIVED_DIR if images else None,
+    })
+    return time.time() - started
@@ -0,0 +1,67 @@
+"""Scheduling policies used by the worker to pick the next pending job.
+
+The policies are pure functions over plain job dicts so that the worker and
+the offline simulator (`simulate.py`) share exactly the same decisions:
+
+- fifo: oldest submission first (the historical behaviour).
+- fair_share: the session with the fewest running jobs first, then oldest.
+- mode_pools: containers are split into a Training pool and an Inferencing
+  pool; a container only claims jobs of its own pool's mode.
+- sjf: shortest job first, by SAV count, then oldest.
+
+Pending jobs are always passed in FIFO order, so every policy breaks ties by
+submission order.
+"""
+
+from collections import Counter
+
+POLICIES = ("fifo", "fair_share", "mode_pools", "sjf")
+
+
+def pool_modes(containers, training_pool_size):
+    """Assign a mode to each container for the `mode_pools` policy.
+
+    The last `training_pool_size` containers serve Training jobs, the others
+    serve Inferencing jobs.
+    """
+    n_training = min(max(training_pool_size, 0), len(containers))
+    split = len(containers) - n_training
+    return {
+        container: ("Inferencing" if index < split else "Training")
+        for index, container in enumerate(containers)
+    }
+
+
+def select_job(policy, pending, running, container_mode=None):
+    """Pick the next job for a free container.
+
+    Inputs:
+    - policy: one of `POLICIES`.
+    - pending: pending job dicts in FIFO order, with `session_id`, `mode` and
+      `n_savs`.
+    - running: job dicts currently running on any container.
+    - container_mode: mode served by the free container (`mode_pools` only).
+
+    Output:
+    - The selected job dict, or None if the container should stay idle.
+    """
+    if not pending:
+        return None
+
+    if policy == "fifo":
+        return pending[0]
+
+    if policy == "fair_share":
+        running_per_session = Counter(job.get("session_id") for job in running)
+        return min(
+            enumerate(pending),
+            key=lambda item: (running_per_session[item[1].get("session_id")], item[0]),
+        )[1]
+
+    if policy == "mode_pools":
+        return next((job for job in pending if job.get("mode") == container_mode), None)
+
+    if policy == "sjf":
+        return min(enumerate(pending), key=lambda item: (item[1].get("n_savs") or 0, item[0]))[1]
+
+    raise ValueError(f"Unknown scheduling policy: {policy!r}")
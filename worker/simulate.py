@@ -0,0 +1,176 @@
+"""Replay historical jobs through the worker's scheduling logic in virtual time.
+
+Input is an export of `app_db.input_queue`, e.g.
+
+    mongoexport --db app_db --collection input_queue --jsonArray \\
+        --query '{"status": "finished"}' --out jobs.json
+
+Each finished job contributes its `submission_timestamp`, its measured run
+time (`job_end - job_start`), its `mode` and its SAV count. The simulator then
+re-runs the worker loop with virtual time: every `--poll-seconds` tick, done
+containers are released and free containers claim jobs in container order
+using `scheduling.select_job`, just like `main.fill_free_slots`.
+
+Example:
+
+    python simulate.py jobs.json --containers 4 --policy all
+"""
+
+import argparse
+import json
+import math
+
+from scheduling import POLICIES, pool_modes, select_job
+
+
+def load_jobs(path):
+    """Load finished jobs from a mongoexport JSON array or JSON-lines file."""
+    with open(path, "r", encoding="utf-8") as handle:
+        text = handle.read().strip()
+    if text.startswith("["):
+        records = json.loads(text)
+    else:
+        records = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    jobs = []
+    for record in records:
+        submitted = _number(record.get("submission_timestamp"))
+        job_start = _number(record.get("job_start"))
+        job_end = _number(record.get("job_end"))
+        if submitted is None or job_start is None or job_end is None or job_end < job_start:
+            continue
+        savs = record.get("SAV") or []
+        jobs.append({
+            "key": f"{record.get('session_id')}/{record.get('job_name')}",
+            "session_id": record.get("session_id"),
+            "mode": record.get("mode"),
+            "n_savs": record.get("n_savs", len(savs)),
+            "submitted": submitted,
+            "service": job_end - job_start,
+        })
+    jobs.sort(key=lambda job: job["submitted"])
+    return jobs
+
+
+def _number(value):
+    """Read plain numbers and mongoexport `{"$numberDouble": ...}` wrappers."""
+    if isinstance(value, dict):
+        value = next(iter(value.values()), None)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(math.ceil(q / 100 * len(ordered))) - 1, len(ordered) - 1)
+    return ordered[max(index, 0)]
+
+
+def simulate(jobs, policy, n_containers, poll_seconds, training_pool_size):
+    """Run one policy over the jobs and return summary metrics."""
+    containers = [f"tandem{index + 1}" for index in range(n_containers)]
+    modes = pool_modes(containers, training_pool_size)
+    arrivals = list(jobs)
+    arrival_index = 0
+    pending = []
+    inflight = {}  # container -> (finish_time, job)
+    waits = {}
+    busy = 0.0
+
+    t0 = jobs[0]["submitted"]
+    now = t0
+    done = 0
+    while done < len(jobs):
+        while arrival_index < len(arrivals) and arrivals[arrival_index]["submitted"] <= now:
+            pending.append(arrivals[arrival_index])
+            arrival_index += 1
+
+        for container, (finish, job) in list(inflight.items()):
+            if finish <= now:
+                inflight.pop(container)
+                done += 1
+
+        for container in containers:
+            if container in inflight:
+                continue
+            running = [job for _, job in inflight.values()]
+            job = select_job(policy, pending, running, modes[container])
+            if job is None:
+                continue
+            pending.remove(job)
+            inflight[container] = (now + job["service"], job)
+            waits[job["key"]] = (job["mode"], now - job["submitted"])
+            busy += job["service"]
+
+        # Jump to the poll tick of the next arrival or completion.
+        candidates = [finish for finish, _ in inflight.values()]
+        if arrival_index < len(arrivals):
+            candidates.append(arrivals[arrival_index]["submitted"])
+        if not candidates:
+            if pending:
+                raise RuntimeError(f"{policy}: {len(pending)} job(s) can never be claimed (empty mode pool?)")
+            break
+        next_event = max(min(candidates), now + poll_seconds)
+        now = t0 + math.ceil((next_event - t0) / poll_seconds) * poll_seconds
+
+    makespan = max(now - t0, 1e-9)
+    all_waits = [wait for _, wait in waits.values()]
+    result = {
+        "policy": policy,
+        "jobs": len(jobs),
+        "throughput_per_hour": len(jobs) / makespan * 3600,
+        "wait_p50": percentile(all_waits, 50),
+        "wait_p95": percentile(all_waits, 95),
+        "wait_p99": percentile(all_waits, 99),
+        "utilization": busy / (makespan * n_containers),
+        "by_mode": {},
+    }
+    for mode in sorted({mode for mode, _ in waits.values() if mode}):
+        mode_waits = [wait for m, wait in waits.values() if m == mode]
+        result["by_mode"][mode] = {"p50": percentile(mode_waits, 50), "p95": percentile(mode_waits, 95)}
+    return result
+
+
+def print_results(results):
+    header = f"{'policy':<12} {'jobs':>6} {'jobs/h':>8} {'wait p50':>10} {'wait p95':>10} {'wait p99':>10} {'util':>6}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        print(
+            f"{result['policy']:<12} {result['jobs']:>6} {result['throughput_per_hour']:>8.2f} "
+            f"{result['wait_p50'] / 60:>8.1f}m {result['wait_p95'] / 60:>8.1f}m "
+            f"{result['wait_p99'] / 60:>8.1f}m {result['utilization'] * 100:>5.1f}%"
+        )
+    for result in results:
+        for mode, stats in result["by_mode"].items():
+            print(f"  {result['policy']:<10} {mode:<12} wait p50 {stats['p50'] / 60:.1f}m, p95 {stats['p95'] / 60:.1f}m")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay an input_queue export through the worker scheduling policies.")
+    parser.add_argument("export", help="mongoexport JSON array or JSON-lines file of finished jobs.")
+    parser.add_argument("--policy", default="all", choices=("all",) + POLICIES, help="Policy to simulate. Default: all")
+    parser.add_argument("--containers", type=int, default=4, help="Number of tandem containers. Default: 4")
+    parser.add_argument("--poll-seconds", type=float, default=2, help="Worker poll interval. Default: 2")
+    parser.add_argument("--training-pool", type=int, default=1, help="Training containers for mode_pools. Default: 1")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON.")
+    args = parser.parse_args()
+
+    jobs = load_jobs(args.export)
+    if not jobs:
+        parser.error("no finished jobs with submission_timestamp, job_start and job_end in the export")
+
+    policies = POLICIES if args.policy == "all" else (args.policy,)
+    results = [simulate(jobs, policy, args.containers, args.poll_seconds, args.training_pool) for policy in policies]
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_results(results)
+
+
+if __name__ == "__main__":
+    main()